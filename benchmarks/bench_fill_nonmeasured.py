@@ -0,0 +1,51 @@
+"""
+Benchmark of the local hole-filling methods of Surface.fill_nonmeasured against the previous implementation, which
+interpolated the holes with scipy.interpolate.griddata using all measured points of the surface.
+
+Usage: python benchmarks/bench_fill_nonmeasured.py [size] [nholes]
+"""
+import sys
+import time
+
+import numpy as np
+from scipy.interpolate import griddata
+
+from surfalize.inpainting import inpaint
+
+METHODS = ('nearest', 'linear', 'cubic', 'harmonic', 'biharmonic')
+
+
+def fill_reference(data, method):
+    grid_x, grid_y = np.meshgrid(np.arange(data.shape[1]), np.arange(data.shape[0]))
+    points = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+    values = data.ravel()
+    mask = ~np.isnan(values)
+    return griddata(points[mask], values[mask], (grid_x, grid_y), method=method)
+
+
+def main(size=1000, nholes=300):
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:size, 0:size]
+    data = np.sin(x / 50) + np.cos(y / 70) + rng.normal(size=x.shape) * 0.01
+    # Sparse dropouts consisting of small patches and isolated points
+    for row, col, radius in zip(rng.integers(0, size, nholes), rng.integers(0, size, nholes),
+                                rng.integers(1, 6, nholes)):
+        data[max(row - radius, 0):row + radius, max(col - radius, 0):col + radius] = np.nan
+    data[rng.random(data.shape) < 0.001] = np.nan
+    print(f'Non-measured points: {np.isnan(data).mean() * 100:.2f} %')
+
+    for method in METHODS:
+        start = time.perf_counter()
+        inpaint(data, method)
+        time_local = time.perf_counter() - start
+        if method in ('nearest', 'linear', 'cubic'):
+            start = time.perf_counter()
+            fill_reference(data, method)
+            time_reference = time.perf_counter() - start
+            print(f'{method:>10}: {time_local * 1e3:8.1f} ms (griddata on all points: {time_reference * 1e3:8.1f} ms)')
+        else:
+            print(f'{method:>10}: {time_local * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,35 @@
+"""
+Benchmark of the Gaussian filter applied by spatial convolution and in the frequency domain for increasing cutoff
+wavelengths.
+
+Usage: python benchmarks/bench_filter.py [size]
+"""
+import sys
+import time
+
+import numpy as np
+
+from surfalize import Surface
+from surfalize.filter import GaussianFilter
+
+STEP = 0.5
+CUTOFFS = (8, 25, 80, 250, 800)
+
+
+def main(size=2000):
+    data = np.random.default_rng(0).normal(size=(size, size))
+    surface = Surface(data, STEP, STEP)
+    for cutoff in CUTOFFS:
+        timings = {}
+        results = {}
+        for method in ('spatial', 'fft'):
+            start = time.perf_counter()
+            results[method] = GaussianFilter(cutoff, 'lowpass', method=method).apply(surface).data
+            timings[method] = time.perf_counter() - start
+        deviation = np.abs(results['fft'] - results['spatial']).max() / np.abs(results['spatial']).max()
+        print(f'Cutoff {cutoff:>4} µm: spatial {timings["spatial"] * 1e3:8.1f} ms, fft {timings["fft"] * 1e3:8.1f} ms, '
+              f'relative deviation {deviation:.1e}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
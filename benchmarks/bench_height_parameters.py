@@ -0,0 +1,56 @@
+"""
+Benchmark of the blocked height parameter kernel against the previous implementation, which allocated multiple
+full-size temporaries. Peak memory is measured with tracemalloc, which tracks the allocations of numpy arrays.
+
+Usage: python benchmarks/bench_height_parameters.py [size]
+"""
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from surfalize import Surface
+
+
+def height_parameters_reference(data):
+    mean = data.mean()
+    centered_data = data - mean
+    abs_centered_data = np.abs(centered_data)
+    centered_data_sq = abs_centered_data ** 2
+
+    size = data.size
+    sa = np.sum(abs_centered_data) / size
+    sq = np.sqrt(np.sum(centered_data_sq) / size)
+    sv = np.abs(centered_data.min())
+    sp = centered_data.max()
+    sz = sp + sv
+    ssk = np.sum(centered_data_sq * centered_data) / size / sq ** 3
+    sku = np.sum(centered_data_sq ** 2) / size / sq ** 4
+    return {'Sa': sa, 'Sq': sq, 'Sv': sv, 'Sp': sp, 'Sz': sz, 'Ssk': ssk, 'Sku': sku}
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(n=4096):
+    data = np.random.default_rng(0).normal(size=(n, n))
+    surface = Surface(data, 0.1, 0.1)
+    reference, time_reference, peak_reference = measure(lambda: height_parameters_reference(data))
+    result, time_blocked, peak_blocked = measure(surface.height_parameters)
+    for key, value in reference.items():
+        assert np.isclose(value, result[key]), key
+    print(f'Array size: {n} x {n} ({data.nbytes / 1e6:.1f} MB)')
+    print(f'Reference: {time_reference * 1e3:8.1f} ms, peak memory {peak_reference / 1e6:8.1f} MB')
+    print(f'Blocked:   {time_blocked * 1e3:8.1f} ms, peak memory {peak_blocked / 1e6:8.1f} MB')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,54 @@
+"""
+Benchmark of the vectorized unit cell evaluation of Surface.homogeneity against the previous implementation, which
+created a Surface object for every unit cell.
+
+Usage: python benchmarks/bench_homogeneity.py [period]
+"""
+import sys
+import time
+
+import numpy as np
+
+from surfalize import Surface
+from surfalize.unitcells import UnitCells
+
+PARAMETERS = ('Sa', 'Sku', 'Sdr', 'Sk', 'Vmp')
+
+
+def evaluate_cells_reference(surface, cell_length):
+    ncells_x = surface.size.x // cell_length
+    ncells_y = surface.size.y // cell_length
+    results = np.zeros((len(PARAMETERS), ncells_x * ncells_y))
+    for i in range(ncells_y):
+        for j in range(ncells_x):
+            data = surface.data[cell_length * i:cell_length * (i + 1), cell_length * j:cell_length * (j + 1)]
+            cell_surface = Surface(data, surface.step_x, surface.step_y)
+            for k, parameter in enumerate(PARAMETERS):
+                results[k, i * ncells_x + j] = getattr(cell_surface, parameter)()
+    return results
+
+
+def main(period=2.0):
+    y, x = np.mgrid[0:1000, 0:1000] * 0.1
+    data = np.sin(2 * np.pi * x / period) + np.random.default_rng(0).normal(size=x.shape) * 0.2
+    surface = Surface(data, 0.1, 0.1)
+    cell_length = int(period / surface.step_x)
+
+    start = time.perf_counter()
+    reference = evaluate_cells_reference(surface, cell_length)
+    time_reference = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cells = UnitCells(surface.data, cell_length, cell_length, surface.step_x, surface.step_y)
+    result = cells.evaluate(PARAMETERS)
+    time_vectorized = time.perf_counter() - start
+
+    for k, parameter in enumerate(PARAMETERS):
+        assert np.allclose(reference[k], result[parameter], rtol=1e-9), parameter
+    print(f'Number of cells: {len(cells)}')
+    print(f'Reference:  {time_reference * 1e3:8.1f} ms')
+    print(f'Vectorized: {time_vectorized * 1e3:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main(*[float(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of material ratio interpolation. Compares the previous np.vectorize based interpolation with the
+array-based Interpolator for single and batched Smc queries.
+
+Usage: python benchmarks/bench_interpolation.py
+"""
+import timeit
+
+import numpy as np
+
+from surfalize import Surface
+from surfalize.mathutils import interp1d
+
+
+def interp1d_vectorized(xdata, ydata):
+    idx_sorted = np.argsort(xdata)
+    xdata = xdata[idx_sorted]
+    ydata = ydata[idx_sorted]
+
+    @np.vectorize
+    def y(x):
+        return np.interp(x, xdata, ydata)
+
+    return y
+
+
+def main(number=100):
+    surface = Surface(np.random.default_rng(0).normal(size=(1000, 1000)), 0.1, 0.1)
+    curve = surface.get_abbott_firestone_curve()
+    height, material_ratio = curve._get_material_ratio_curve()
+    mr = np.linspace(0, 100, 100)
+
+    vectorized = interp1d_vectorized(material_ratio, height)
+    interpolator = interp1d(material_ratio, height)
+    assert np.allclose(vectorized(mr), interpolator(mr))
+
+    cases = {
+        'construction (vectorize)': lambda: interp1d_vectorized(material_ratio, height),
+        'construction (Interpolator)': lambda: interp1d(material_ratio, height),
+        'single query (vectorize)': lambda: vectorized(50.0),
+        'single query (Interpolator)': lambda: interpolator(50.0),
+        '100 queries (vectorize)': lambda: vectorized(mr),
+        '100 queries (Interpolator)': lambda: interpolator(mr),
+        '100 x Surface.Smc': lambda: [surface.Smc(value) for value in mr],
+        'Surface.Smc(array of 100)': lambda: surface.Smc(mr),
+    }
+    for name, func in cases.items():
+        elapsed = timeit.timeit(func, number=number) / number
+        print(f'{name:30s} {elapsed * 1e6:10.1f} µs')
+
+
+if __name__ == '__main__':
+    main()
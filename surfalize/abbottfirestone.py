@@ -1,13 +1,13 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-from .mathutils import argclosest, interp1d, trapezoid
+from .mathutils import argclosest, interp1d, trapezoid, QuantileSketch
 from .cache import CachedInstance, cache
 
 class AbbottFirestoneCurve(CachedInstance):
     """
     Represents the Abbott-Firestone curve of a Surface object and provides methods to calculate the functional
-    roughness parameters derived from it.
+    roughness parameters derived from it. Non-measured points of the surface are excluded from the curve.
 
     Parameters
     ----------
@@ -15,20 +15,74 @@ class AbbottFirestoneCurve(CachedInstance):
         Surface object from which to calcualte the Abbott-Firestone curve
     nbins : int, default 10000
         Number of bins for the material density histogram. Large numbers result in longer computation time but increased
-        accuracy of results. The default value of 10000 represents a reasonable compromise.
+        accuracy of results. The default value of 10000 represents a reasonable compromise. For the methods 'exact' and
+        'sketch', the curve is evaluated at nbins + 1 equally spaced material ratios instead.
+    method : {'histogram', 'exact', 'sketch'}, default 'histogram'
+        Method by which the material ratio curve is computed.
+
+        - 'histogram': The heights are divided into nbins equally spaced bins. The height resolution of the curve is
+          limited to the bin width.
+        - 'exact': The heights at the material ratios are determined exactly from the data by partial sorting
+          (np.partition). Requires a copy of the height data.
+        - 'sketch': The data is streamed in blocks into a bounded-memory quantile sketch (see
+          surfalize.mathutils.QuantileSketch). The material ratio of each point on the curve deviates from the exact
+          value by at most `AbbottFirestoneCurve.error_bound()` in %, which is typically well below 0.5% for
+          sketch_size=4096 even for surfaces with 100 megapixels.
+    sketch_size : int, default 4096
+        Capacity parameter of the quantile sketch. Only used for method='sketch'.
     """
     # Width of the equivalence line in % as defined by ISO 25178-2
     EQUIVALENCE_LINE_WIDTH = 40
+    # Approximate number of values streamed into the quantile sketch at once
+    SKETCH_BLOCK_SIZE = 2**16
 
-    def __init__(self, surface, nbins=10000):
-        if surface.has_missing_points:
-            raise ValueError("Missing points must be filled before the "
-                             "Abbott-Firestone curve can be instantiated.") from None
+    def __init__(self, surface, nbins=10000, method='histogram', sketch_size=4096):
+        if method not in ('histogram', 'exact', 'sketch'):
+            raise ValueError(f'Invalid method "{method}".')
         super().__init__()
         self._surface = surface
         self._nbins = nbins
+        self._method = method
+        self._sketch_size = sketch_size
+        self._error_bound = 0
         self._calculate_curve()
 
+    def error_bound(self):
+        """
+        Returns the maximum deviation of the material ratio of the curve from the exact material ratio in %. The value
+        is zero for method='exact'. For method='histogram', the error is expressed in height instead and amounts to at
+        most one bin width, which is not included here.
+
+        Returns
+        -------
+        float
+        """
+        return self._error_bound
+
+    def _get_measured_data(self):
+        """
+        Returns the height values of the measured points as a flat array. Non-measured points are excluded from the
+        material ratio curve.
+
+        Returns
+        -------
+        ndarray[float]
+        """
+        data = self._surface.data
+        if self._surface.has_missing_points:
+            return data[~np.isnan(data)]
+        return data.ravel()
+
+    def _get_material_ratio_grid(self):
+        """
+        Returns the equally spaced material ratios at which the curve is evaluated for the methods 'exact' and 'sketch'.
+
+        Returns
+        -------
+        ndarray[float]
+        """
+        return np.linspace(0, 100, self._nbins + 1)
+
     @cache
     def _get_material_ratio_curve(self):
         """
@@ -38,13 +92,53 @@ class AbbottFirestoneCurve(CachedInstance):
         -------
         height, material_ratio : tuple[ndarray[float], ndarray[float]]
         """
-        hist, height = np.histogram(self._surface.data, bins=self._nbins)
+        if self._method == 'exact':
+            return self._get_material_ratio_curve_exact()
+        if self._method == 'sketch':
+            return self._get_material_ratio_curve_sketch()
+        hist, height = np.histogram(self._get_measured_data(), bins=self._nbins)
         hist = hist[::-1]  # sort descending
         height = height[::-1]  # sort descending
         material_ratio = np.append(1, np.cumsum(hist))  # prepend 1 for first bin edge after cumsum
         material_ratio = material_ratio / material_ratio.max() * 100
         return height, material_ratio
 
+    def _get_material_ratio_curve_exact(self):
+        """
+        Computes the exact heights at equally spaced material ratios by partial sorting of the height data.
+
+        Returns
+        -------
+        height, material_ratio : tuple[ndarray[float], ndarray[float]]
+        """
+        data = self._get_measured_data()
+        size = data.size
+        material_ratio = self._get_material_ratio_grid()
+        # The material ratio of the i-th largest value (counting from 0) is (i + 1) / size. We compute the index of the
+        # value at each material ratio in ascending order.
+        rank_descending = np.clip(np.ceil(material_ratio / 100 * size).astype(np.int64) - 1, 0, size - 1)
+        idx = size - 1 - rank_descending
+        height = np.partition(data, np.unique(idx))[idx]
+        self._error_bound = 0
+        return height, material_ratio
+
+    def _get_material_ratio_curve_sketch(self):
+        """
+        Computes approximate heights at equally spaced material ratios by streaming the data into a quantile sketch.
+
+        Returns
+        -------
+        height, material_ratio : tuple[ndarray[float], ndarray[float]]
+        """
+        data = self._get_measured_data()
+        sketch = QuantileSketch(k=self._sketch_size)
+        for start in range(0, data.size, self.SKETCH_BLOCK_SIZE):
+            sketch.update(data[start:start + self.SKETCH_BLOCK_SIZE])
+        material_ratio = self._get_material_ratio_grid()
+        height = sketch.quantile(1 - material_ratio / 100)
+        self._error_bound = sketch.error_bound() * 100
+        return height, material_ratio
+
     # This is a bit hacky right now with the modified state. Maybe clean that up in the future
     def _calculate_curve(self):
         """
@@ -56,36 +150,23 @@ class AbbottFirestoneCurve(CachedInstance):
         -------
         None
         """
-        parameters = dict()
         # Using the potentially cached values here
         height, material_ratio = self._get_material_ratio_curve()
-        slope_min = None
-        istart = 0
-        istart_final = 0
 
         # Interpolation function for bin_centers(cumsum)
         self._smc_fit = interp1d(material_ratio, height)
 
-        while True:
-            # The width in material distribution % is 40, so we have to interpolate to find the index
-            # where the distance to the starting value is 40
-            if material_ratio[istart] > 100 - self.EQUIVALENCE_LINE_WIDTH:
-                break
-            # Here we interpolate to get exactly 40% width. The remaining inaccuracy comes from the
-            # start index resoltion.
-            slope = (self._smc_fit(material_ratio[istart] + self.EQUIVALENCE_LINE_WIDTH) - height[
-                istart]) / self.EQUIVALENCE_LINE_WIDTH
-
-            # Since slope is always negative, we check that the value is greater if we want
-            # minimal gradient. If we find other instances with same slope, we take the first
-            # occurence according to ISO 13565-2
-            if slope_min is None:
-                slope_min = slope
-            elif slope > slope_min:
-                slope_min = slope
-                # Start index of the 40% width equivalence line
-                istart_final = istart
-            istart += 1
+        # The equivalence line can start at every point of the curve that is at most 100% - 40% into the material
+        # ratio. The material ratio is monotonically increasing, so the start indices form a contiguous range.
+        nstart = max(1, np.searchsorted(material_ratio, 100 - self.EQUIVALENCE_LINE_WIDTH, side='right'))
+        # Here we interpolate to get exactly 40% width for all start indices in a single call. The remaining
+        # inaccuracy comes from the start index resolution.
+        end_height = self._smc_fit(material_ratio[:nstart] + self.EQUIVALENCE_LINE_WIDTH)
+        slopes = (end_height - height[:nstart]) / self.EQUIVALENCE_LINE_WIDTH
+        # Since slope is always negative, the minimal gradient corresponds to the maximum value. If there are other
+        # instances with same slope, argmax returns the first occurence according to ISO 13565-2
+        istart_final = np.argmax(slopes)
+        slope_min = slopes[istart_final]
 
         self._slope = slope_min
 
@@ -114,33 +195,37 @@ class AbbottFirestoneCurve(CachedInstance):
 
     def Smr(self, c):
         """
-        Calculates Smr(c).
+        Calculates Smr(c). If c is array-like, the material ratio is evaluated for all heights in a single call.
 
         Parameters
         ----------
-        c : float
+        c : float | array-like
             Material height.
 
         Returns
         -------
-        float
+        float | np.ndarray
         """
-        return float(self._smr_fit(c))
+        if np.ndim(c) == 0:
+            return float(self._smr_fit(c))
+        return self._smr_fit(c)
 
     def Smc(self, mr):
         """
-        Calculates Smc(mr).
+        Calculates Smc(mr). If mr is array-like, the height is evaluated for all material ratios in a single call.
 
         Parameters
         ----------
-        mr : float
+        mr : float | array-like
             Material ratio.
 
         Returns
         -------
-        float
+        float | np.ndarray
         """
-        return float(self._smc_fit(mr))
+        if np.ndim(mr) == 0:
+            return float(self._smc_fit(mr))
+        return self._smc_fit(mr)
 
     @cache
     def Smr1(self):
@@ -223,7 +308,8 @@ class AbbottFirestoneCurve(CachedInstance):
             fig, ax = plt.subplots()
         else:
             fig = ax.figure
-        dist_bars, bins_bars = np.histogram(self._surface.data, bins=nbars)
+        data = self._get_measured_data()
+        dist_bars, bins_bars = np.histogram(data, bins=nbars)
         dist_bars = np.flip(dist_bars)
         bins_bars = np.flip(bins_bars)
 
@@ -235,10 +321,10 @@ class AbbottFirestoneCurve(CachedInstance):
         ax2.set_xlabel('Material ratio (%)')
         ax.set_box_aspect(1)
         ax2.set_xlim(0, 100)
-        ax.set_ylim(self._surface.data.min(), self._surface.data.max())
+        ax.set_ylim(data.min(), data.max())
 
         ax.barh(bins_bars[:-1] + np.diff(bins_bars) / 2, dist_bars / dist_bars.cumsum().max() * 100,
-                height=(self._surface.data.max() - self._surface.data.min()) / nbars, edgecolor='k', color='lightblue')
+                height=(data.max() - data.min()) / nbars, edgecolor='k', color='lightblue')
         ax2.plot(material_ratio, height, c='r', clip_on=True)
 
         return fig, (ax, ax2)
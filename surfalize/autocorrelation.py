@@ -1,4 +1,5 @@
 import numpy as np
+import scipy.fft
 import scipy.ndimage as ndimage
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1 import make_axes_locatable
@@ -16,25 +17,59 @@ class AutocorrelationFunction(CachedInstance):
     ----------
     surface : Surface
         Surface object on which to calculate the 2d autocorrelation function.
+    padded : bool, default False
+        If False, the circular autocorrelation function is computed, which treats the surface as periodic. If True,
+        the data is zero-padded to a fast FFT length of at least twice its size, which yields the linear
+        autocorrelation function without wrap-around effects.
+    workers : int | None, default None
+        Number of workers used by scipy.fft. If None, a single worker is used. Negative values wrap around the number
+        of CPU cores, e.g. -1 uses all cores.
+    dtype : np.float64 | np.float32, default np.float64
+        Floating point precision of the computation. Single precision halves the memory usage and is faster for large
+        surfaces at the expense of accuracy.
     """
-    def __init__(self, surface):
+    def __init__(self, surface, padded=False, workers=None, dtype=np.float64):
         if surface.has_missing_points:
             raise ValueError("Missing points must be filled before "
                              "the autocorrelation function can be instantiated.") from None
         super().__init__()
-        # For now we level and center. In the future, we should replace that with lookups of booleans
-        # to avoid double computation
         self._surface = surface
         self._current_threshold = None
+        self._padded = padded
+        self._workers = workers
+        self._dtype = dtype
         self.data = self.calculate_autocorrelation()
         self.center = np.array(self.data.shape) // 2
 
     def calculate_autocorrelation(self):
-        data = self._surface.center().data
-        data_fft = np.fft.fft2(data)
-        # Compute ACF from FFT and normalize
-        acf_data = np.fft.fftshift(np.fft.ifft2(data_fft * np.conj(data_fft)).real / data.size)
-        return acf_data
+        """
+        Computes the autocorrelation function from the power spectrum of the centered height data using real-input
+        FFTs. The result is shifted so that the zero lag lies at the center of the array.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        if not self._padded and self._workers is None and self._dtype == np.float64:
+            # Reuse the Fourier transform that is shared with the period and orientation calculation
+            return self._surface.get_spectrum().autocorrelation()
+        data = self._surface.data.astype(self._dtype)
+        data -= data.mean()
+        if self._padded:
+            # Padding to at least 2n - 1 avoids the overlap of the periodic continuations
+            shape = tuple(scipy.fft.next_fast_len(2 * n - 1, real=True) for n in data.shape)
+        else:
+            shape = data.shape
+        data_fft = scipy.fft.rfft2(data, s=shape, workers=self._workers)
+        power_spectrum = data_fft.real ** 2 + data_fft.imag ** 2
+        del data_fft
+        acf_data = scipy.fft.irfft2(power_spectrum, s=shape, workers=self._workers)
+        acf_data /= data.size
+        # Select the lags from -n // 2 to n - n // 2 - 1 along each axis, which corresponds to fftshift in the
+        # unpadded case
+        rows = np.arange(-(data.shape[0] // 2), data.shape[0] - data.shape[0] // 2) % shape[0]
+        cols = np.arange(-(data.shape[1] // 2), data.shape[1] - data.shape[1] // 2) % shape[1]
+        return acf_data[np.ix_(rows, cols)]
 
     @cache
     def _calculate_decay_lengths(self, s):
@@ -1,5 +1,7 @@
 import inspect
 import io
+import pickle
+from multiprocessing import get_context
 from multiprocessing.pool import ThreadPool
 from functools import partial
 from dataclasses import dataclass
@@ -384,6 +386,9 @@ class _CustomParameter:
         self.func = func
         self.name = id(func)
 
+    def __repr__(self):
+        return f'{self.__class__.__name__}({getattr(self.func, "__qualname__", self.func)})'
+
     def calculate_from(self, surface, ignore_errors=True):
         try:
             result = self.func(surface)
@@ -398,6 +403,9 @@ class _CustomOperation:
     def __init__(self, func):
         self.func = func
 
+    def __repr__(self):
+        return f'{self.__class__.__name__}({getattr(self.func, "__qualname__", self.func)})'
+
     def execute_on(self, surface):
         self.func(surface)
 
@@ -653,19 +661,38 @@ class Batch:
             self._files.extend(list(dir_path.glob(f'*{extension}')))
         return self
 
+    def _check_picklable(self):
+        """
+        Checks whether all registered steps and files can be pickled, which is required to send them to worker
+        processes. Raises a BatchError if this is not the case.
+
+        Returns
+        -------
+        None
+        """
+        for obj in [*self._steps, *self._files]:
+            try:
+                pickle.dumps(obj)
+            except Exception:
+                raise BatchError(f'{obj!r} cannot be pickled, which is required for backend="process". Custom '
+                                 f'operations and parameters must be module-level functions and FileInput objects must '
+                                 f'wrap picklable buffers. Alternatively, use backend="thread".') from None
+
     def _disptach_tasks(self, multiprocessing=True, ignore_errors=True, on_file_complete=None,
-                        preserve_chaining_order=True):
+                        preserve_chaining_order=True, backend='thread', workers=None, chunksize=1):
         """
         Dispatches the individual tasks between CPU cores if multiprocessing is True, otherwise executes them
         sequentially.
 
         Notes
         -----
-        This implementation has switched from a true multiprocessing pool to a thread pool. The reason for the
-        change is that multiprocessing relies on pickling, which causes multiple issues when using Jupyter Notebooks.
-        Also, if the batch.execute method is not called in a main guard, an infinite spawning of child processes may
-        occur. These issues are avoided when using threads while maintaining most of the speedup, since most numpy-based
-        computations release the GIL anyway.
+        By default, the tasks are dispatched to a thread pool. Multiprocessing relies on pickling, which causes multiple
+        issues when using Jupyter Notebooks with functions defined in the notebook. Most numpy-based computations release
+        the GIL, so that threads maintain most of the speedup. However, some parts of the pipeline are Python-level code
+        that hold the GIL, which limits the scaling on machines with many cores. In that case, backend='process' can be
+        used to dispatch the tasks to a process pool. The pool uses the 'spawn' start method on all platforms, which
+        means that batch.execute must be called from within a main guard (if __name__ == '__main__') in scripts. Only
+        the file paths and the step descriptors are sent to the worker processes, the files are loaded by the workers.
 
         Parameters
         ----------
@@ -684,6 +711,12 @@ class Batch:
             (e.g batch.operation().parameter().operation()). If False, all operations will be performed before the
             parameter calculations, irrespective of the order they were called on the batch. The order within the
             operations and parameters themselves will be preserved nonetheless.
+        backend : {'thread', 'process'}, default 'thread'
+            Type of pool to which the tasks are dispatched if multiprocessing is True.
+        workers : int | None, default None
+            Number of worker threads or processes. If None, the number of CPU cores is used.
+        chunksize : int, default 1
+            Number of files that are sent to a worker at once.
 
         Returns
         -------
@@ -693,11 +726,18 @@ class Batch:
         """
         results = []
         if multiprocessing:
-            with ThreadPool() as pool:
+            if backend == 'thread':
+                pool = ThreadPool(workers)
+            elif backend == 'process':
+                self._check_picklable()
+                pool = get_context('spawn').Pool(workers)
+            else:
+                raise ValueError(f'Invalid backend "{backend}". Possible values are "thread" and "process".')
+            with pool:
                 task = partial(_task, steps=self._steps, ignore_errors=ignore_errors,
                                preserve_chaining_order=preserve_chaining_order)
                 with tqdm(total=len(self._files), desc='Processing files') as progress_bar:
-                    for result in pool.imap_unordered(task, self._files):
+                    for result in pool.imap_unordered(task, self._files, chunksize=chunksize):
                         results.append(result)
                         if on_file_complete is not None:
                             on_file_complete(result)
@@ -754,7 +794,7 @@ class Batch:
 
 
     def execute(self, multiprocessing=True, ignore_errors=True, saveto=None, on_file_complete=None,
-                preserve_chaining_order=True):
+                preserve_chaining_order=True, backend='thread', workers=None, chunksize=1):
         """
         Executes the Batch processing and returns the obtained data as a pandas DataFrame. The dataframe can be saved
         as an Excel file.
@@ -784,6 +824,16 @@ class Batch:
             (e.g batch.operation().parameter().operation()). If False, all operations will be performed before the
             parameter calculations, irrespective of the order they were called on the batch. The order within the
             operations and parameters themselves will be preserved nonetheless.
+        backend : {'thread', 'process'}, default 'thread'
+            Type of pool to which the files are dispatched if multiprocessing is True. The thread backend works in all
+            environments. The process backend scales better on machines with many cores, but requires all custom
+            operations and parameters to be picklable (i.e. defined at module level) and, in scripts, that execute is
+            called from within a main guard (if __name__ == '__main__').
+        workers : int | None, default None
+            Number of worker threads or processes. If None, the number of CPU cores is used.
+        chunksize : int, default 1
+            Number of files that are sent to a worker at once. Larger values reduce the communication overhead of the
+            process backend for large numbers of small files.
 
         Returns
         -------
@@ -794,7 +844,10 @@ class Batch:
         results = self._disptach_tasks(multiprocessing=multiprocessing,
                                        ignore_errors=ignore_errors,
                                        on_file_complete=on_file_complete,
-                                       preserve_chaining_order=preserve_chaining_order)
+                                       preserve_chaining_order=preserve_chaining_order,
+                                       backend=backend,
+                                       workers=workers,
+                                       chunksize=chunksize)
         df = self._construct_dataframe(results)
         if saveto is not None:
             df.to_excel(saveto)
@@ -1,15 +1,424 @@
 import functools
+import hashlib
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+# Lock that guards all cache instances as well as the global bookkeeping, since entries of one instance can be evicted
+# when another instance, potentially in another thread, exceeds the global budget.
+_lock = threading.RLock()
+
+
+def _make_hashable(obj):
+    """
+    Recursively converts an object into a hashable representation that can be used as part of a cache key. Numpy arrays
+    are represented by their dtype, shape and a digest of their contents instead of their string representation, which
+    would be both slow and ambiguous for large arrays since numpy abbreviates them.
+
+    Parameters
+    ----------
+    obj : any
+        Object to convert.
+
+    Returns
+    -------
+    hashable
+    """
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.hasobject:
+            return ('ndarray', obj.dtype.str, obj.shape, _make_hashable(obj.tolist()))
+        buffer = np.ascontiguousarray(obj).reshape(-1).view(np.uint8)
+        digest = hashlib.blake2b(buffer, digest_size=16).hexdigest()
+        return ('ndarray', obj.dtype.str, obj.shape, digest)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (list, tuple)):
+        return (type(obj).__name__, tuple(_make_hashable(item) for item in obj))
+    if isinstance(obj, dict):
+        items = sorted(obj.items(), key=lambda item: repr(item[0]))
+        return ('dict', tuple((_make_hashable(key), _make_hashable(value)) for key, value in items))
+    if isinstance(obj, (set, frozenset)):
+        return ('set', frozenset(_make_hashable(item) for item in obj))
+    try:
+        hash(obj)
+    except TypeError:
+        # Last resort for unhashable objects of unknown type
+        return (type(obj).__name__, repr(obj))
+    return obj
+
+
+def make_key(name, args, kwargs):
+    """
+    Constructs a hashable cache key from a method name and the positional and keyword arguments of the call.
+
+    Parameters
+    ----------
+    name : str
+        Name of the method.
+    args : tuple
+        Positional arguments.
+    kwargs : dict
+        Keyword arguments.
+
+    Returns
+    -------
+    tuple
+    """
+    return name, _make_hashable(tuple(args)), tuple(sorted((k, _make_hashable(v)) for k, v in kwargs.items()))
+
+
+def _nbytes(value, _depth=0):
+    """
+    Estimates the memory footprint of a cached value in bytes. Numpy arrays are counted by their data buffer and
+    containers are traversed recursively. Attributes of objects are only inspected for the cached object itself, not
+    for objects referenced by it, since these are typically shared with the owner of the cache (e.g. the Surface
+    referenced by an AbbottFirestoneCurve).
+
+    Parameters
+    ----------
+    value : any
+        Cached value.
+
+    Returns
+    -------
+    int
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, MethodCache):
+        return value.nbytes
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_nbytes(item, _depth) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(item, _depth) for item in value.values())
+    if _depth == 0 and hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + sum(_nbytes(item, _depth + 1) for item in vars(value).values())
+    return sys.getsizeof(value)
+
+
+class CacheStats:
+    """
+    Counters for cache hits, misses and evictions.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(hits={self.hits}, misses={self.misses}, evictions={self.evictions})'
+
+    def reset(self):
+        """
+        Resets all counters to zero.
+
+        Returns
+        -------
+        None
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class CachePolicy:
+    """
+    Least-recently-used cache policy with an optional byte and entry budget per instance. Subclasses can customize
+    which entry is evicted by overriding `select_victim`.
+
+    Parameters
+    ----------
+    max_bytes : int | None, default None
+        Maximum number of bytes held by the cache of a single instance. If None, the size is unbounded.
+    max_entries : int | None, default None
+        Maximum number of entries held by the cache of a single instance. If None, the number is unbounded.
+    """
+    def __init__(self, max_bytes=None, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(max_bytes={self.max_bytes}, max_entries={self.max_entries})'
+
+    def exceeded(self, nbytes, nentries):
+        """
+        Returns True if the given size exceeds the budget of the policy.
+
+        Parameters
+        ----------
+        nbytes : int
+            Total number of bytes in the cache.
+        nentries : int
+            Total number of entries in the cache.
+
+        Returns
+        -------
+        bool
+        """
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return True
+        if self.max_entries is not None and nentries > self.max_entries:
+            return True
+        return False
+
+    def select_victim(self, sizes):
+        """
+        Selects the key of the entry to evict.
+
+        Parameters
+        ----------
+        sizes : OrderedDict[key: int]
+            Sizes of the cache entries in bytes, ordered from least to most recently used.
+
+        Returns
+        -------
+        key
+        """
+        return next(iter(sizes))
+
+
+class SizeAwarePolicy(CachePolicy):
+    """
+    Cache policy that evicts the largest entry among the least recently used half of the entries first. This keeps
+    cheap scalar results cached while large derived objects, such as autocorrelation functions, are dropped first.
+
+    Parameters
+    ----------
+    max_bytes : int | None, default None
+        Maximum number of bytes held by the cache of a single instance. If None, the size is unbounded.
+    max_entries : int | None, default None
+        Maximum number of entries held by the cache of a single instance. If None, the number is unbounded.
+    """
+    def select_victim(self, sizes):
+        candidates = list(sizes.items())[:max(1, len(sizes) // 2)]
+        return max(candidates, key=lambda item: item[1])[0]
+
+
+class _GlobalBudget:
+    """
+    Keeps track of the entries of all method caches in least-recently-used order to enforce a process-wide byte budget.
+    """
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+
+    def add(self, cache, key, nbytes):
+        self._entries[(id(cache), key)] = (weakref.ref(cache), nbytes)
+        self.nbytes += nbytes
+        self.enforce()
+
+    def touch(self, cache, key):
+        item = (id(cache), key)
+        if item in self._entries:
+            self._entries.move_to_end(item)
+
+    def remove(self, cache_id, key):
+        _, nbytes = self._entries.pop((cache_id, key), (None, 0))
+        self.nbytes -= nbytes
+
+    def enforce(self):
+        while self.max_bytes is not None and self.nbytes > self.max_bytes and self._entries:
+            (cache_id, key), (ref, nbytes) = self._entries.popitem(last=False)
+            self.nbytes -= nbytes
+            cache = ref()
+            if cache is not None:
+                cache._discard(key)
+                cache.stats.evictions += 1
+            self.stats.evictions += 1
+
+
+# Default byte budget shared by the caches of all instances in the process
+DEFAULT_GLOBAL_CACHE_LIMIT = 2**30
+
+_default_policy = CachePolicy()
+_global_budget = _GlobalBudget(DEFAULT_GLOBAL_CACHE_LIMIT)
+
+
+def set_cache_policy(policy):
+    """
+    Sets the default cache policy for all subsequently created cached instances.
+
+    Parameters
+    ----------
+    policy : CachePolicy
+        Cache policy.
+
+    Returns
+    -------
+    None
+    """
+    global _default_policy
+    _default_policy = policy
+
+
+def get_cache_policy():
+    """
+    Returns the default cache policy.
+
+    Returns
+    -------
+    CachePolicy
+    """
+    return _default_policy
+
+
+def set_global_cache_limit(max_bytes):
+    """
+    Sets the maximum number of bytes held by the caches of all cached instances combined. If the limit is exceeded, the
+    least recently used entries across all instances are evicted.
+
+    Parameters
+    ----------
+    max_bytes : int | None
+        Byte budget. If None, the global cache size is unbounded. The default limit is 1 GiB.
+
+    Returns
+    -------
+    None
+    """
+    with _lock:
+        _global_budget.max_bytes = max_bytes
+        _global_budget.enforce()
+
+
+def get_cache_stats():
+    """
+    Returns the accumulated hit, miss and eviction counters as well as the current total size of all caches.
+
+    Returns
+    -------
+    dict[str: int]
+    """
+    with _lock:
+        return {'hits': _global_budget.stats.hits, 'misses': _global_budget.stats.misses,
+                'evictions': _global_budget.stats.evictions, 'nbytes': _global_budget.nbytes}
+
+
+def reset_cache_stats():
+    """
+    Resets the global hit, miss and eviction counters.
+
+    Returns
+    -------
+    None
+    """
+    with _lock:
+        _global_budget.stats.reset()
+
+
+def _release(cache_id, keys):
+    with _lock:
+        for key in keys:
+            _global_budget.remove(cache_id, key)
+
+
+class MethodCache:
+    """
+    Bounded storage for cached method results of a single instance. Entries are kept in least-recently-used order and
+    evicted according to the cache policy once the budget of the instance or the global budget is exceeded.
+
+    Parameters
+    ----------
+    policy : CachePolicy | None, default None
+        Cache policy. If None, the default policy set by `set_cache_policy` is used.
+    """
+    def __init__(self, policy=None):
+        self.policy = _default_policy if policy is None else policy
+        self.stats = CacheStats()
+        self.nbytes = 0
+        self._values = dict()
+        self._sizes = OrderedDict()
+        # The key set is shared with the finalizer so that the global bookkeeping can be released once the cache is
+        # garbage collected.
+        self._finalizer = weakref.finalize(self, _release, id(self), self._sizes.keys())
+
+    def __getstate__(self):
+        # Cached results are not transferred when pickling, e.g. when sending surfaces to worker processes
+        return {'policy': self.policy}
+
+    def __setstate__(self, state):
+        self.__init__(state['policy'])
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __getitem__(self, key):
+        with _lock:
+            try:
+                value = self._values[key]
+            except KeyError:
+                self.stats.misses += 1
+                _global_budget.stats.misses += 1
+                raise
+            self._sizes.move_to_end(key)
+            _global_budget.touch(self, key)
+            self.stats.hits += 1
+            _global_budget.stats.hits += 1
+            return value
+
+    def __setitem__(self, key, value):
+        nbytes = _nbytes(value)
+        with _lock:
+            if key in self._values:
+                self._discard(key)
+                _global_budget.remove(id(self), key)
+            if self.policy.exceeded(nbytes, 1):
+                # Values larger than the entire budget are not cached at all
+                return
+            self._values[key] = value
+            self._sizes[key] = nbytes
+            self.nbytes += nbytes
+            while self.policy.exceeded(self.nbytes, len(self._values)):
+                victim = self.policy.select_victim(self._sizes)
+                self._discard(victim)
+                _global_budget.remove(id(self), victim)
+                self.stats.evictions += 1
+                _global_budget.stats.evictions += 1
+            _global_budget.add(self, key, nbytes)
+
+    def _discard(self, key):
+        """
+        Removes an entry without updating the global bookkeeping. Must be called with the lock held.
+        """
+        if key in self._values:
+            del self._values[key]
+            self.nbytes -= self._sizes.pop(key)
+
+    def clear(self):
+        """
+        Removes all entries from the cache.
+
+        Returns
+        -------
+        None
+        """
+        with _lock:
+            for key in list(self._sizes):
+                _global_budget.remove(id(self), key)
+            self._values.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
 
 def cache(method):
     """
     Decorator that enables caching on class instance without creating memory leaks. This is accomplished by relying
-    on a cache inside the instance. Classes that want to use this decorator must implement a dictionary called
-    '_method_cache' or inherit from CachedInstance.
+    on a cache inside the instance. Classes that want to use this decorator must inherit from CachedInstance.
     This approach is necessary because functools.lru_cache keeps references to the class instance that prevent it from
     being garbage collected indefinitely, thus leaking a substantial amount of memory.
     See https://bugs.python.org/issue19859 for more details.
 
-    This implementation will not work on methods with unhashable arguments.
+    Cache keys are constructed from the method name and the arguments. Numpy arrays and unhashable containers such as
+    lists and dicts are converted into a hashable representation. The size of the cache is bounded by the cache policy
+    of the instance as well as the global cache limit, see `set_cache_policy` and `set_global_cache_limit`.
 
     Parameters
     ----------
@@ -22,16 +431,12 @@ def cache(method):
     """
     @functools.wraps(method)
     def wrapped_method(self, *args, **kwargs):
-        # This only work for hashable arguments
-        key = (method.__name__, str(args), str(kwargs.items()))
+        key = make_key(method.__name__, args, kwargs)
         try:
             # Cache hit
-            value = self._method_cache[key]
-            #print(f'Cache hit on {method.__name__}')
-            return value
+            return self._method_cache[key]
         except KeyError:
             # Cache miss
-            #print(f'Cache miss on {method.__name__}')
             value = method(self, *args, **kwargs)
             self._method_cache[key] = value
             return value
@@ -43,9 +448,25 @@ class CachedInstance:
     """
     Mixin class that provides the basic facilities necessary for the cache decorator as well as a method to clear the
     cache.
+
+    Parameters
+    ----------
+    cache_policy : CachePolicy | None, default None
+        Cache policy of the instance. If None, the default policy set by `set_cache_policy` is used.
     """
-    def __init__(self):
-        self._method_cache = dict()
+    def __init__(self, cache_policy=None):
+        self._method_cache = MethodCache(cache_policy)
+
+    @property
+    def cache_stats(self):
+        """
+        Returns the hit, miss and eviction counters of the instance cache.
+
+        Returns
+        -------
+        CacheStats
+        """
+        return self._method_cache.stats
 
     def clear_cache(self):
         """
@@ -55,7 +476,7 @@ class CachedInstance:
         -------
         None
         """
-        self._method_cache = dict()
+        self._method_cache.clear()
 
     def create_cache_entry(self, method, entry, args, kwargs):
         """
@@ -76,5 +497,5 @@ class CachedInstance:
         -------
         None
         """
-        key = (method.__name__, str(args), str(kwargs.items()))
-        self._method_cache[key] = entry
\ No newline at end of file
+        key = make_key(method.__name__, args, kwargs)
+        self._method_cache[key] = entry
@@ -0,0 +1,145 @@
+import time
+from multiprocessing.pool import ThreadPool
+
+# Intermediate products shared by multiple parameters. Each stage is computed by a cached method of the Surface, so that
+# the parameter getters retrieve the products from the cache instead of recomputing them. The second element lists the
+# stages that must be computed beforehand.
+STAGES = {
+    'moments': (lambda surface: surface.height_parameters(), ()),
+    'gradients': (lambda surface: surface._gradient_sums(), ()),
+    'material_ratio': (lambda surface: surface.get_abbott_firestone_curve(), ()),
+    'spectrum': (lambda surface: surface.get_spectrum(), ()),
+    'autocorrelation': (lambda surface: surface.get_autocorrelation_function(), ('spectrum',)),
+    # Decay lengths of the autocorrelation function for the default threshold of Sal and Str
+    'decay_lengths': (lambda surface: surface.get_autocorrelation_function()._calculate_decay_lengths(0.2),
+                      ('autocorrelation',)),
+}
+
+# Stages that cannot be computed on surfaces containing non-measured points
+MEASURED_POINTS_STAGES = {'spectrum', 'autocorrelation', 'decay_lengths'}
+
+# Intermediate products required by each parameter
+PARAMETER_STAGES = {
+    'Sa': ('moments',),
+    'Sq': ('moments',),
+    'Sp': ('moments',),
+    'Sv': ('moments',),
+    'Sz': ('moments',),
+    'Ssk': ('moments',),
+    'Sku': ('moments',),
+    'Sdr': ('gradients',),
+    'Sdq': ('gradients',),
+    'Sal': ('decay_lengths',),
+    'Str': ('decay_lengths',),
+    'Sk': ('material_ratio',),
+    'Spk': ('material_ratio',),
+    'Svk': ('material_ratio',),
+    'Smr1': ('material_ratio',),
+    'Smr2': ('material_ratio',),
+    'Sxp': ('material_ratio',),
+    'Vmp': ('material_ratio',),
+    'Vmc': ('material_ratio',),
+    'Vvv': ('material_ratio',),
+    'Vvc': ('material_ratio',),
+    'period': ('spectrum',),
+    'depth': ('spectrum',),
+    'aspect_ratio': ('spectrum',),
+    'homogeneity': ('spectrum',),
+    'stepheight': (),
+    'cavity_volume': (),
+}
+
+
+class EvaluationPlan:
+    """
+    Plan for the evaluation of multiple roughness parameters of a surface. The plan determines the minimal set of
+    intermediate products required by the parameters, such as the height moments, the finite difference gradients, the
+    material ratio curve and the spectrum or autocorrelation function. When the plan is executed, each intermediate
+    product is computed exactly once, whereby products that do not depend on each other can be computed in parallel
+    threads. Subsequently, all parameters are derived from the cached products. The duration of each stage is recorded
+    in the timings attribute.
+
+    Parameters
+    ----------
+    parameters : list-like[str]
+        Parameters to evaluate.
+
+    Examples
+    --------
+    >>> plan = EvaluationPlan(['Sa', 'Sdr', 'Sk', 'Sal'])
+    >>> plan.execute(surface)
+    {'Sa': 1.23, 'Sdr': 4.56, 'Sk': 2.34, 'Sal': 5.67}
+    >>> plan.timings
+    {'moments': 0.012, 'gradients': 0.008, 'material_ratio': 0.041, 'spectrum': 0.021, 'autocorrelation': 0.015,
+     'decay_lengths': 0.083, 'parameters': 0.004}
+    """
+    def __init__(self, parameters):
+        for parameter in parameters:
+            if parameter not in PARAMETER_STAGES:
+                raise ValueError(f'Parameter "{parameter}" is undefined.')
+        self.parameters = tuple(parameters)
+        required = set()
+        pending = [stage for parameter in self.parameters for stage in PARAMETER_STAGES[parameter]]
+        while pending:
+            stage = pending.pop()
+            if stage not in required:
+                required.add(stage)
+                pending.extend(STAGES[stage][1])
+        # Stages are grouped into levels, where every stage only depends on stages of previous levels
+        self.levels = []
+        done = set()
+        remaining = [stage for stage in STAGES if stage in required]
+        while remaining:
+            level = [stage for stage in remaining if set(STAGES[stage][1]) <= done]
+            self.levels.append(level)
+            done.update(level)
+            remaining = [stage for stage in remaining if stage not in done]
+        self.timings = {}
+
+    @property
+    def stages(self):
+        """
+        Returns the intermediate products computed by the plan in order of execution.
+
+        Returns
+        -------
+        tuple[str]
+        """
+        return tuple(stage for level in self.levels for stage in level)
+
+    def _run_stage(self, surface, stage):
+        start = time.perf_counter()
+        STAGES[stage][0](surface)
+        return stage, time.perf_counter() - start
+
+    def execute(self, surface, workers=1):
+        """
+        Computes the intermediate products and derives the parameters for a surface. The timings of the stages of the
+        last execution are stored in the timings attribute.
+
+        Parameters
+        ----------
+        surface : Surface
+            Surface object on which to evaluate the parameters.
+        workers : int, default 1
+            Maximum number of threads used to compute independent intermediate products. If 1, all products are
+            computed sequentially in the calling thread.
+
+        Returns
+        -------
+        dict[str: float]
+        """
+        if MEASURED_POINTS_STAGES.intersection(self.stages) and surface.has_missing_points:
+            raise ValueError("Non-measured points must be filled before any other operation.")
+        self.timings = {}
+        for level in self.levels:
+            if workers > 1 and len(level) > 1:
+                with ThreadPool(min(workers, len(level))) as pool:
+                    timings = pool.starmap(self._run_stage, [(surface, stage) for stage in level])
+            else:
+                timings = [self._run_stage(surface, stage) for stage in level]
+            self.timings.update(timings)
+        start = time.perf_counter()
+        results = {parameter: getattr(surface, parameter)() for parameter in self.parameters}
+        self.timings['parameters'] = time.perf_counter() - start
+        return results
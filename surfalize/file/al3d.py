@@ -1,7 +1,7 @@
 import struct
 import numpy as np
 from ..exceptions import CorruptedFileError
-from .common import RawSurface, FileHandler, read_array, write_array
+from .common import RawSurface, LazyArray, FileHandler, read_array, write_array
 
 MAGIC = b'AliconaImaging\x00\r\n'
 TAG_LAYOUT = '20s30s2s'
@@ -70,11 +70,12 @@ def read_al3d(filehandle, read_image_layers=False, encoding='utf-8'):
     step_y = float(header['PixelSizeYMeter']) * 1e6
     offset = int(header['DepthImageOffset'])
     filehandle.seek(offset)
-    data = read_array(filehandle, dtype=np.float32, count=nx * ny, offset=0).reshape(ny, nx)
-
+    raw_data = read_array(filehandle, dtype=np.float32, count=nx * ny, offset=0, mmap=True).reshape(ny, nx)
     invalidValue = float(header['InvalidPixelValue'])
-    data[data == invalidValue] = np.nan
 
-    data *= 1e6 # Conversion from m to um
+    def scale(raw_data):
+        data = raw_data * 1e6 # Conversion from m to um
+        data[raw_data == invalidValue] = np.nan
+        return data
 
-    return RawSurface(data, step_x, step_y)
+    return RawSurface(LazyArray.from_raw(raw_data, scale), step_x, step_y)
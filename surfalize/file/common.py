@@ -1,6 +1,9 @@
 import struct
+import operator
 import os
 import io
+import stat
+import time
 from contextlib import contextmanager
 from pathlib import Path
 import warnings
@@ -178,18 +181,127 @@ class Entry(BaseEntry):
             format = self.format
         size = struct.calcsize(format)
         unpacked_data = struct.unpack(f'{format}', filehandle.read(size))[0]
-        # The data is a string
-        if isinstance(unpacked_data, bytes):
-            if encoding == 'auto':
-                encoding = chardet.detect(unpacked_data)['encoding']
-            unpacked_data = unpacked_data.decode(encoding).rstrip(' \x00')
-        data[self.name] = unpacked_data
+        data[self.name] = _decode(unpacked_data, encoding)
+
+
+def _decode(value, encoding):
+    """
+    Decodes string values read from a binary layout and strips padding spaces and null bytes. Other values are
+    returned unchanged.
+
+    Parameters
+    ----------
+    value : any
+        Unpacked value.
+    encoding : str
+        Encoding of the string. If 'auto', the encoding is inferred by chardet unless the string is pure ASCII.
+
+    Returns
+    -------
+    any
+    """
+    # The data is a string
+    if isinstance(value, bytes):
+        if encoding == 'auto':
+            encoding = 'ascii' if value.isascii() else chardet.detect(value)['encoding']
+        value = value.decode(encoding).rstrip(' \x00')
+    return value
+
+
+# Byte order characters of the struct module, which must be the first character of a format string
+BYTE_ORDER_CHARACTERS = '@=<>!'
+# Format characters of the struct module whose values are independent of the byte order
+SINGLE_BYTE_CHARACTERS = 'xcbB?s'
+
+
+class _FixedBlock:
+    """
+    Contiguous entries of a layout whose formats do not depend on previously read values. The entries are compiled
+    into precompiled struct.Struct objects, one for each run of entries with the same byte order, such that the whole
+    block is read from the file with a single call and unpacked with one call per byte order.
+
+    Parameters
+    ----------
+    entries : list[Entry | Reserved]
+        Entries with fixed formats.
+    """
+
+    def __init__(self, entries):
+        segments = []
+        self._names = []
+        indices = []
+        # Indices of values that must be converted after unpacking, either by an Apply object or by decoding a string
+        self._conversions = []
+        n_values = 0
+        for entry in entries:
+            if isinstance(entry, Reserved):
+                if not segments:
+                    segments.append(['=', ''])
+                segments[-1][1] += f'{entry.nbytes}x'
+                continue
+            apply = entry.format if isinstance(entry.format, Apply) else None
+            format = apply.dtype if apply is not None else entry.format
+            byte_order, body = (format[0], format[1:]) if format[0] in BYTE_ORDER_CHARACTERS else ('@', format)
+            byte_order = '>' if byte_order == '!' else byte_order
+            # Native formats are read individually without alignment, which is equivalent to the standard sizes of
+            # '=' unless the format contains types of platform-dependent size
+            if byte_order == '@' and struct.calcsize('=' + body) == struct.calcsize('@' + body):
+                byte_order = '='
+            # Formats consisting of single bytes are independent of the byte order
+            if segments and byte_order != '@' and set(body) <= set('0123456789' + SINGLE_BYTE_CHARACTERS):
+                byte_order = segments[-1][0]
+            if not segments or segments[-1][0] != byte_order or byte_order == '@':
+                segments.append([byte_order, ''])
+            segments[-1][1] += body
+            unpacked = struct.unpack(format, bytes(struct.calcsize(format)))
+            self._names.append(entry.name)
+            # Only the first value is kept for formats with a repeat count
+            indices.append(n_values)
+            if apply is not None:
+                self._conversions.append((n_values, apply.read))
+            elif isinstance(unpacked[0], bytes):
+                self._conversions.append((n_values, None))
+            n_values += len(unpacked)
+        if len(indices) > 1:
+            self._select = operator.itemgetter(*indices)
+        else:
+            self._select = lambda values: [values[index] for index in indices]
+        self._structs = []
+        offset = 0
+        for byte_order, body in segments:
+            compiled = struct.Struct(byte_order + body)
+            self._structs.append((compiled, offset))
+            offset += compiled.size
+        self.size = offset
+
+    def read(self, filehandle, data, encoding):
+        buffer = filehandle.read(self.size)
+        values = []
+        for compiled, offset in self._structs:
+            values.extend(compiled.unpack_from(buffer, offset))
+        for index, convert in self._conversions:
+            values[index] = convert(values[index]) if convert is not None else _decode(values[index], encoding)
+        data.update(zip(self._names, self._select(values)))
 
 
 class Layout:
 
     def __init__(self, *entries):
         self._entries = entries
+        # Contiguous entries with fixed formats are compiled into blocks that are read with a single call. Entries
+        # whose format depends on previously read values are read individually.
+        self._blocks = []
+        fixed = []
+        for entry in entries:
+            if isinstance(entry, Reserved) or (isinstance(entry, Entry) and isinstance(entry.format, (str, Apply))):
+                fixed.append(entry)
+                continue
+            if fixed:
+                self._blocks.append(_FixedBlock(fixed))
+                fixed = []
+            self._blocks.append(entry)
+        if fixed:
+            self._blocks.append(_FixedBlock(fixed))
 
     def write(self, filehandle, data, encoding='utf-8'):
         """
@@ -242,38 +354,76 @@ class Layout:
         dict[str: any]
         """
         data = dict()
-        for entry in self._entries:
-            entry.read(filehandle, data, encoding)
+        for block in self._blocks:
+            block.read(filehandle, data, encoding)
         return data
 
-def read_array(fileobject, dtype, count=-1, offset=0):
+def _is_mappable(fileobject):
+    """
+    Checks whether a file object refers to a regular file on disk, which can be memory-mapped.
+
+    Parameters
+    ----------
+    fileobject : file-like
+        File object to check.
+
+    Returns
+    -------
+    bool
+    """
+    try:
+        fileno = fileobject.fileno()
+    except (AttributeError, OSError):
+        return False
+    return stat.S_ISREG(os.fstat(fileno).st_mode)
+
+def read_array(fileobject, dtype, count=-1, offset=0, mmap=False):
     """
-    Function that invokes either np.frombuffer or np.fromfile depending on whether the object is a file-like object
-    or a buffer.
+    Reads an array of the specified data-type from the current position of a file-like object.
+
+    If mmap is True and the file-like object refers to a regular file on disk, the data is not read into memory but
+    memory-mapped in copy-on-write mode, such that the pages are only loaded from disk when they are accessed and
+    modifications of the array are never written back to the file. The file pointer is advanced past the mapped data
+    in either case. The mapping remains valid after the file is closed, but the file must not be truncated or
+    overwritten while the array is in use.
 
     Parameters
     ----------
-    fileobject : buffer_like or file-like or str or Path
-        An object that exposes the buffer interface or a file-like object or a str or Path representing a filepath.
+    fileobject : file-like
+        File-like object to read the data from.
     dtype : data-type
         Data-type of the returned array.
     count : int, Default -1.
         Number of items to read. -1 means all data in the buffer or file.
     offset : int
-        Start reading the buffer from this offset (in bytes); default: 0.
+        Number of bytes to skip from the current position before reading; default: 0.
+    mmap : bool, default False
+        If True, the data is memory-mapped instead of read if the file-like object refers to a file on disk.
 
     Returns
     -------
     np.ndarray
     """
+    dtype = np.dtype(dtype)
     if offset > 0:
         fileobject.seek(offset, 1)
-    if count == -1:
-        buffer = fileobject.read()
-    else:
-        buffer = fileobject.read(count * np.dtype(dtype).itemsize)
-    result = np.frombuffer(buffer, dtype).copy()
-    return result
+    if mmap and _is_mappable(fileobject):
+        position = fileobject.tell()
+        available = (os.fstat(fileobject.fileno()).st_size - position) // dtype.itemsize
+        if count == -1:
+            count = available
+        # Empty or truncated data sections are handled by the regular code path below
+        if 0 < count <= available:
+            result = np.memmap(fileobject, dtype=dtype, mode='c', offset=position, shape=(count,))
+            fileobject.seek(position + count * dtype.itemsize, 0)
+            return result.view(np.ndarray)
+    if count == -1 or not hasattr(fileobject, 'readinto'):
+        buffer = fileobject.read() if count == -1 else fileobject.read(count * dtype.itemsize)
+        return np.frombuffer(buffer, dtype).copy()
+    # Reading directly into the array avoids an intermediate copy of the data as bytes
+    result = np.empty(count, dtype)
+    nbytes = fileobject.readinto(memoryview(result).cast('B')) or 0
+    return result[:nbytes // dtype.itemsize]
 
 def write_array(data, fileobject):
     try:
@@ -281,6 +431,139 @@ def write_array(data, fileobject):
     except io.UnsupportedOperation:
         fileobject.write(data.tobytes())
 
+class LazyArray:
+    """
+    Placeholder for an array that is computed on first access, e.g. height data that is scaled from a memory-mapped
+    raw array. A Surface object constructed from a LazyArray materializes the array when its data attribute is
+    accessed for the first time. LazyArrays created by from_raw can be cropped before materialization, in which case
+    only the cropped region of the raw array is read and scaled.
+
+    Parameters
+    ----------
+    loader : callable
+        Function without arguments that computes the array.
+    shape : tuple[int]
+        Shape of the array returned by the loader.
+    """
+
+    def __init__(self, loader, shape):
+        self._loader = loader
+        self._array = None
+        self._raw = None
+        self._transform = None
+        self.shape = tuple(shape)
+        self.ndim = len(self.shape)
+
+    @classmethod
+    def from_raw(cls, raw, transform):
+        """
+        Defers an elementwise transformation of a raw array, e.g. the conversion of memory-mapped integer data to
+        height values. Since the transformation is elementwise, a crop of the LazyArray is computed by transforming
+        only the corresponding crop of the raw array.
+
+        Parameters
+        ----------
+        raw : np.ndarray | LazyArray
+            Two-dimensional raw array.
+        transform : callable
+            Elementwise function that takes the raw array and returns the transformed array.
+
+        Returns
+        -------
+        LazyArray
+        """
+        lazy_array = cls(lambda: transform(np.asarray(raw)), raw.shape)
+        lazy_array._raw = raw
+        lazy_array._transform = transform
+        return lazy_array
+
+    def crop(self, rows, cols):
+        """
+        Returns a LazyArray of a rectangular region of the array without materializing the array. If the LazyArray was
+        created by from_raw, only the region of the raw array is accessed. Otherwise, the entire array is computed on
+        first access of the cropped array and the region is copied from it.
+
+        Parameters
+        ----------
+        rows : slice
+            Slice of the rows.
+        cols : slice
+            Slice of the columns.
+
+        Returns
+        -------
+        LazyArray
+        """
+        if self._raw is not None:
+            raw = self._raw.crop(rows, cols) if isinstance(self._raw, LazyArray) else self._raw[rows, cols]
+            return LazyArray.from_raw(raw, self._transform)
+        shape = (len(range(*rows.indices(self.shape[0]))), len(range(*cols.indices(self.shape[1]))))
+        if self._array is not None:
+            array = self._array
+            return LazyArray(lambda: array[rows, cols].copy(), shape)
+        loader = self._loader
+        return LazyArray(lambda: loader()[rows, cols].copy(), shape)
+
+    @classmethod
+    def from_file(cls, filehandle, shape, read):
+        """
+        Defers reading an array from the current position of a file on disk. When the array is accessed, the file is
+        reopened, the file pointer is set to the current position and the array is read by the provided function. The
+        caller is responsible for advancing the file pointer past the data if subsequent sections of the file are read.
+
+        Parameters
+        ----------
+        filehandle : file object
+            Handle to a file opened from a path.
+        shape : tuple[int]
+            Shape of the array returned by read.
+        read : callable
+            Function that takes a file object pointing to the beginning of the data and returns the array.
+
+        Returns
+        -------
+        LazyArray
+        """
+        path = filehandle.name
+        position = filehandle.tell()
+
+        def loader():
+            with open(path, 'rb') as file:
+                file.seek(position, 0)
+                return read(file)
+
+        return cls(loader, shape)
+
+    def materialize(self):
+        """
+        Computes the array on the first call and returns it. The loader and all references it holds, such as memory
+        maps, are released afterwards.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        if self._array is None:
+            self._array = self._loader()
+            self._loader = None
+            self._raw = None
+            self._transform = None
+        return self._array
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.materialize()
+        if copy:
+            return array.astype(array.dtype if dtype is None else dtype, copy=True)
+        if dtype is None or np.dtype(dtype) == array.dtype:
+            return array
+        if copy is False:
+            raise ValueError(f'Unable to avoid a copy while converting from {array.dtype} to {np.dtype(dtype)}.')
+        return array.astype(dtype)
+
+    def __reduce__(self):
+        # Memory maps cannot be sent to other processes, hence the materialized array is pickled instead
+        return np.asarray, (self.materialize(),)
+
 class RawSurface:
 
     def __init__(self, data: np.ndarray, step_x: float, step_y: float, metadata: dict=None,
@@ -290,11 +573,48 @@ class RawSurface:
         self.step_y = step_y
         self.metadata = {} if metadata is None else metadata
         self.image_layers = {} if image_layers is None else image_layers
+        # Durations of the format detection and of reading the file, set by FileHandler.read
+        self.timings = {}
+
+    def crop(self, roi):
+        """
+        Crops the height data and all image layers of the same size to a region of interest. Lazily loaded height data
+        is cropped without materializing it, such that only the region of interest is read from memory-mapped files.
+
+        Parameters
+        ----------
+        roi : tuple[int, int, int, int]
+            Region of interest as a (x0, x1, y0, y1) tuple of pixel indices, where the last row and column are
+            included. The convention is identical to Surface.crop with in_units=False.
+
+        Returns
+        -------
+        None
+        """
+        x0, x1, y0, y1 = roi
+        ny, nx = self.data.shape
+        if not (0 <= x0 <= x1 < nx and 0 <= y0 <= y1 < ny):
+            raise ValueError('Region of interest is out of bounds!')
+        rows, cols = slice(y0, y1 + 1), slice(x0, x1 + 1)
+        for name, layer in self.image_layers.items():
+            if layer.shape[:2] == (ny, nx):
+                self.image_layers[name] = layer[rows, cols].copy()
+        if isinstance(self.data, LazyArray):
+            self.data = self.data.crop(rows, cols)
+        else:
+            self.data = self.data[rows, cols].copy()
+
+# Number of bytes at the beginning of a file that are read once to detect its format
+DETECTION_PREFIX_SIZE = 4096
 
 class FileHandler:
 
     _readers_by_suffix = {}
     _readers_by_magic = {}
+    # Prefix trie of the registered magics. Each node maps the next byte to a child node, the key None maps to the
+    # reader of the magic ending at the node.
+    _magic_trie = {}
+    _sniffing_readers = []
     _writers = {}
 
     def __init__(self, file, format_=None):
@@ -302,6 +622,7 @@ class FileHandler:
         if self.is_path_like():
             self.file = Path(file)
         self.format = format_
+        self.timings = {}
 
     @classmethod
     def get_supported_formats_read(cls):
@@ -312,25 +633,86 @@ class FileHandler:
         return set(cls._writers.keys())
 
     @classmethod
-    def register_reader(cls, *, suffix, magic=None):
+    def register_reader(cls, *, suffix, magic=None, lazy=False, sniff=None):
+        """
+        Registers a reader function for one or multiple file suffixes. The reader is called with a file object and the
+        keyword arguments read_image_layers and encoding and must return a RawSurface.
+
+        Parameters
+        ----------
+        suffix : str | list-like[str]
+            File suffix or suffixes handled by the reader.
+        magic : bytes | list-like[bytes] | None, default None
+            File magic or magics by which the format is detected if the suffix is unknown or wrong.
+        lazy : bool, default False
+            Indicates that the reader supports lazy loading. If True, the reader additionally receives the keyword
+            argument lazy when a file is opened from a path with lazy=True. In this case, the reader should only parse
+            the header and return a RawSurface whose height data is a LazyArray, e.g. constructed by
+            LazyArray.from_file, which reads the data on first access.
+        sniff : callable | None, default None
+            Cheap check for formats without a file magic. The function receives the first bytes of a file and returns
+            True if the file might be of the format. If the format of a file cannot be detected by its magic, the file
+            is only decoded by the readers whose sniff function returns True.
+        """
         def decorator(func):
             func._suffix = suffix
             func._magic = magic
+            func._lazy = lazy
+            func._sniff = sniff
             if is_list_like(suffix):
                 for s in suffix:
                     cls._readers_by_suffix[s] = func
             else:
                 cls._readers_by_suffix[suffix] = func
+            if sniff is not None:
+                cls._sniffing_readers.append(func)
             if magic is None:
                 return func
-            if is_list_like(magic):
-                for m in magic:
-                    cls._readers_by_magic[m] = func
-            else:
-                cls._readers_by_magic[magic] = func
+            for m in (magic if is_list_like(magic) else (magic,)):
+                cls._readers_by_magic[m] = func
+                node = cls._magic_trie
+                for byte in m:
+                    node = node.setdefault(byte, {})
+                node[None] = func
             return func
         return decorator
 
+    @classmethod
+    def detect(cls, prefix):
+        """
+        Determines the readers that are candidates for a file from the first bytes of the file. The prefix is matched
+        against all registered magics at once by traversing a prefix trie, which costs O(length of the longest magic)
+        regardless of the number of registered readers. If a magic matches, the reader of the longest matching magic
+        is the only candidate. Otherwise, the candidates are the readers whose sniff function accepts the prefix.
+
+        Parameters
+        ----------
+        prefix : bytes
+            First bytes of the file, at least as many as the longest registered magic.
+
+        Returns
+        -------
+        list[callable]
+            Candidate readers in the order in which they should be tried.
+        """
+        node = cls._magic_trie
+        match = None
+        for byte in prefix:
+            node = node.get(byte)
+            if node is None:
+                break
+            match = node.get(None, match)
+        if match is not None:
+            return [match]
+        candidates = []
+        for reader in cls._sniffing_readers:
+            try:
+                if reader._sniff(prefix):
+                    candidates.append(reader)
+            except Exception:
+                pass
+        return candidates
+
     @classmethod
     def register_writer(cls, *, suffix):
         def decorator(func):
@@ -348,7 +730,52 @@ class FileHandler:
             return True
         return False
 
-    def read(self, read_image_layers=False, encoding="utf-8"):
+    def _read_with(self, reader, filehandle, read_image_layers, encoding, lazy):
+        if lazy and self.is_path_like() and getattr(reader, '_lazy', False):
+            return reader(filehandle, read_image_layers=read_image_layers, encoding=encoding, lazy=True)
+        return reader(filehandle, read_image_layers=read_image_layers, encoding=encoding)
+
+    def _finish_read(self, raw_surface, roi, start):
+        # The region of interest is applied outside the reader fallback, such that an invalid region of interest is
+        # raised directly instead of triggering the format detection
+        if roi is not None:
+            raw_surface.crop(roi)
+        self.timings['read'] = time.perf_counter() - start
+        raw_surface.timings = dict(self.timings)
+        return raw_surface
+
+    def _warn_suffix_mismatch(self, reader):
+        suffixes = reader._suffix if is_list_like(reader._suffix) else (reader._suffix,)
+        if self.is_path_like() and self.file.suffix not in suffixes:
+            warnings.warn(f'The file suffix indicates a file of type {self.file.suffix}. However, the file '
+                          f'seems to actually be of type {reader._suffix}. Check if the file extensions is '
+                          f'correct. The file was now loaded as {reader._suffix}.')
+
+    def read(self, read_image_layers=False, encoding="utf-8", lazy=False, roi=None):
+        """
+        Reads the file and returns a RawSurface. If the file is given as a path or the format is specified, the reader
+        registered for the suffix or format is used. If the format is unknown or the reader fails, the format is
+        detected from the first bytes of the file, which are read only once, see FileHandler.detect. The durations of
+        the detection and of reading the file in seconds are stored in the timings attribute of the FileHandler and
+        of the returned RawSurface, from which they are passed on to Surface.read_timings.
+
+        Parameters
+        ----------
+        read_image_layers : bool, default False
+            If True, reads all available image layers.
+        encoding : str, default 'utf-8'
+            Encoding of characters in the file.
+        lazy : bool, default False
+            If True, readers that support lazy loading defer reading the height data, see register_reader.
+        roi : tuple[int, int, int, int] | None, default None
+            Region of interest as a (x0, x1, y0, y1) tuple of pixel indices, see RawSurface.crop.
+
+        Returns
+        -------
+        RawSurface
+        """
+        self.timings = {'detection': 0.0}
+        start = time.perf_counter()
         exception = None
         # Surface is either a file on disk specified with a path or the format was explicitly specified
         # In this case, we know the file format
@@ -363,34 +790,31 @@ class FileHandler:
                 reader = self._readers_by_suffix[suffix]
                 try:
                     with open_file_like(self.file, 'rb') as filehandle:
-                        return reader(filehandle, read_image_layers=read_image_layers, encoding=encoding)
+                        raw_surface = self._read_with(reader, filehandle, read_image_layers, encoding, lazy)
                 except Exception as e:
                     exception = e
+                else:
+                    return self._finish_read(raw_surface, roi, start)
 
         # If the file format is unknown, the specified file format is not implemented or there is an exception while
-        # loading with the specified file format, we check if the file magic is compatible with another reader
-        for magic, reader in self._readers_by_magic.items():
-            with open_file_like(self.file, 'rb') as filehandle:
-                detected_magic = filehandle.read(len(magic))
-                if detected_magic == magic:
-                    if self.is_path_like() and reader._suffix != suffix:
-                        warnings.warn(f'The file suffix indicates a file of type {self.file.suffix}. However, the file '
-                                      f'seems to actually be of type {reader._suffix}. Check if the file extensions is '
-                                      f'correct. The file was now loaded as {reader._suffix}.')
-                    filehandle.seek(0, 0)
-                    return reader(filehandle, read_image_layers=read_image_layers, encoding=encoding)
-
-        # Else, as a last resort, we try all available readers:
-        for reader_suffix, reader in self._readers_by_suffix.items():
+        # loading with the specified file format, we detect the format from the first bytes of the file
+        detection_start = time.perf_counter()
+        with open_file_like(self.file, 'rb') as filehandle:
+            prefix = filehandle.read(max([DETECTION_PREFIX_SIZE, *map(len, self._readers_by_magic)]))
+        candidates = self.detect(prefix)
+        self.timings['detection'] = time.perf_counter() - detection_start
+
+        for reader in candidates:
             try:
                 with open_file_like(self.file, 'rb') as filehandle:
-                    result = reader(filehandle, read_image_layers=read_image_layers, encoding=encoding)
-                    warnings.warn(f'The file suffix indicates a file of type {self.file.suffix}. However, the file '
-                                  f'seems to actually be of type {reader_suffix}. Check if the file extensions is '
-                                  f'correct. The file was now loaded as {reader_suffix}.')
-                    return result
-            except Exception:
-                pass
+                    raw_surface = self._read_with(reader, filehandle, read_image_layers, encoding, lazy)
+            except Exception as e:
+                # A reader matched by its magic is authoritative, hence its exception is raised
+                if reader._magic is not None:
+                    raise
+                continue
+            self._warn_suffix_mismatch(reader)
+            return self._finish_read(raw_surface, roi, start)
 
         if exception is not None:
             raise exception
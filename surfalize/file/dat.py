@@ -1,6 +1,6 @@
 import numpy as np
 
-from .common import Layout, Entry, Reserved, FileHandler, get_unit_conversion, RawSurface, read_array
+from .common import Layout, Entry, Reserved, FileHandler, get_unit_conversion, RawSurface, LazyArray, read_array
 from ..exceptions import CorruptedFileError
 
 LEN_MAGIC = 4
@@ -252,8 +252,8 @@ LAYOUT_HEADER_3 = Layout(
 )
 
 
-@FileHandler.register_reader(suffix='.dat', magic=(MAGIC_1, MAGIC_2, MAGIC_3))
-def read_dat(filehandle, read_image_layers=False, encoding='utf-8'):
+@FileHandler.register_reader(suffix='.dat', magic=(MAGIC_1, MAGIC_2, MAGIC_3), lazy=True)
+def read_dat(filehandle, read_image_layers=False, encoding='utf-8', lazy=False):
     magic = filehandle.read(LEN_MAGIC)
     if magic not in (MAGIC_1, MAGIC_2, MAGIC_3):
         raise CorruptedFileError('Unrecognized magic detected.')
@@ -284,13 +284,20 @@ def read_dat(filehandle, read_image_layers=False, encoding='utf-8'):
         filehandle.seek(header['ac_n_bytes'], 1)
 
     n_points = header['cn_width'] * header['cn_height']
-    phase_data = read_array(filehandle, dtype='>i4', count=n_points).reshape(header['cn_height'],
-                                                                             header['cn_width']).astype('float64')
-    phase_data[phase_data >= INVALID_VALUE_PHASE] = np.nan
-    # Scale the phase data from zygo units to meters
-    height_data = phase_data * header['intf_scale_factor'] * header['wavelength_in'] * header['obliquity_factor'] / \
-                  RESOLUTION_MAP[header['phase_res']]
-    height_data = height_data * get_unit_conversion('m', 'um')
+    shape = (header['cn_height'], header['cn_width'])
+
+    def read_height_data(file):
+        phase_data = read_array(file, dtype='>i4', count=n_points).reshape(shape).astype('float64')
+        phase_data[phase_data >= INVALID_VALUE_PHASE] = np.nan
+        # Scale the phase data from zygo units to meters
+        height_data = (phase_data * header['intf_scale_factor'] * header['wavelength_in'] * header['obliquity_factor']
+                       / RESOLUTION_MAP[header['phase_res']])
+        return height_data * get_unit_conversion('m', 'um')
+
+    if lazy:
+        height_data = LazyArray.from_file(filehandle, shape, read_height_data)
+    else:
+        height_data = read_height_data(filehandle)
 
     step_x = step_y = header['lateral_res'] * get_unit_conversion('m', 'um')
 
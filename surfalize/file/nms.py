@@ -1,7 +1,7 @@
 import struct
 import numpy as np
 import dateutil
-from .common import RawSurface, FileHandler, read_array
+from .common import RawSurface, LazyArray, FileHandler, read_array
 from datetime import datetime
 
 
@@ -14,8 +14,14 @@ OFFSET_SPACING = 1376
 DTYPE_HEIGHT = np.uint16
 DTYPE_IMG = np.uint8
 
-@FileHandler.register_reader(suffix='.nms')
-def read_nms(filehandle, read_image_layers=False, encoding='utf-8'):
+def sniff_nms(prefix):
+    # The format has no magic, hence we check whether the header contains a plausible size and spacing
+    nx, ny = struct.unpack_from('<2I', prefix, OFFSET_POINTS)
+    dx, dy = struct.unpack_from('<2d', prefix, OFFSET_SPACING)
+    return 0 < nx < 2 ** 16 and 0 < ny < 2 ** 16 and 0 < dx < 1e6 and 0 < dy < 1e6
+
+@FileHandler.register_reader(suffix='.nms', lazy=True, sniff=sniff_nms)
+def read_nms(filehandle, read_image_layers=False, encoding='utf-8', lazy=False):
     filehandle.seek(OFFSET_Z, 0)
     zmin, zmax = struct.unpack('<2d', filehandle.read(16))
     filehandle.seek(OFFSET_DATE, 0)
@@ -26,11 +32,18 @@ def read_nms(filehandle, read_image_layers=False, encoding='utf-8'):
     dx, dy = struct.unpack('<2d', filehandle.read(16))
     filehandle.seek(HEADER_SIZE, 0)
 
-    data = read_array(filehandle, dtype=DTYPE_HEIGHT, count=nx * ny)
-    #nonmeasured_points_mask = (data == 0)
-    data = data / (2 ** 16 - 2) * (zmax - zmin) + zmax
-    #data[nonmeasured_points_mask] = np.nan
-    data = data.reshape(ny, nx)
+    def read_height_data(file):
+        data = read_array(file, dtype=DTYPE_HEIGHT, count=nx * ny)
+        #nonmeasured_points_mask = (data == 0)
+        data = data / (2 ** 16 - 2) * (zmax - zmin) + zmax
+        #data[nonmeasured_points_mask] = np.nan
+        return data.reshape(ny, nx)
+
+    if lazy:
+        data = LazyArray.from_file(filehandle, (ny, nx), read_height_data)
+        filehandle.seek(nx * ny * np.dtype(DTYPE_HEIGHT).itemsize, 1)
+    else:
+        data = read_height_data(filehandle)
 
     step_x = dx * 1e-3
     step_y = dy * 1e-3
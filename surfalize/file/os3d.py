@@ -5,7 +5,7 @@ import io
 import dateutil
 from PIL import Image
 import numpy as np
-from .common import FormatFromPrevious, RawSurface, Entry, Layout, FileHandler, read_array
+from .common import FormatFromPrevious, RawSurface, LazyArray, Entry, Layout, FileHandler, read_array
 from ..exceptions import CorruptedFileError
 
 MAGIC = b'OmniSurf3D'
@@ -33,9 +33,14 @@ def read_os3d(filehandle, read_image_layers=False, encoding='utf-8'):
     if magic != MAGIC:
         raise CorruptedFileError(f'Unknown file magic detected: {magic.decode()}')
     header = LAYOUT_HEADER.read(filehandle, encoding=encoding)
-    data = read_array(filehandle, count=header['nPointsAlongX'] * header['nPointsAlongY'], dtype='float32')
-    data = data.reshape(header['nPointsAlongY'], header['nPointsAlongX'])
-    data[data < THRESHOLD] = np.nan
+    shape = (header['nPointsAlongY'], header['nPointsAlongX'])
+    raw_data = read_array(filehandle, count=shape[0] * shape[1], dtype='float32', mmap=True).reshape(shape)
+
+    def scale(raw_data):
+        data = raw_data.copy()
+        data[data < THRESHOLD] = np.nan
+        return data
+
     step_x = header['dSpacingAlongXUM']
     step_y = header['dSpacingAlongYUM']
 
@@ -47,4 +52,4 @@ def read_os3d(filehandle, read_image_layers=False, encoding='utf-8'):
     if has_image and read_image_layers:
         img_data = io.BytesIO(filehandle.read())
         image_layers['RGBA'] = np.array(Image.open(img_data))
-    return RawSurface(data, step_x, step_y, image_layers=image_layers, metadata=metadata)
\ No newline at end of file
+    return RawSurface(LazyArray.from_raw(raw_data, scale), step_x, step_y, image_layers=image_layers, metadata=metadata)
\ No newline at end of file
@@ -1,6 +1,6 @@
 import dateutil
 import numpy as np
-from .common import RawSurface, Reserved, Entry, Layout, FileHandler, read_array
+from .common import RawSurface, LazyArray, Reserved, Entry, Layout, FileHandler, read_array
 
 NON_MEASURED_VALUE = 1000001
 
@@ -44,7 +44,12 @@ LAYOUT_MEASURE_CONFIG = Layout(
    Entry('factorio_delmacio', 'I')
 )
 
-@FileHandler.register_reader(suffix='.plu')
+def sniff_plu(prefix):
+    # The format has no magic, but begins with a null-terminated date string
+    date = prefix[:DATE_SIZE].rstrip(b'\x00')
+    return len(prefix) >= DATE_SIZE and 0 < len(date) and date.isascii() and b'\x00' not in date
+
+@FileHandler.register_reader(suffix='.plu', sniff=sniff_plu)
 def read_plu(filehandle, read_image_layers=False, encoding='utf-8'):
     date_block = filehandle.read(DATE_SIZE)
     timestamp = dateutil.parser.parse(date_block.decode().rstrip('\x00'))
@@ -52,7 +57,7 @@ def read_plu(filehandle, read_image_layers=False, encoding='utf-8'):
     calibration = LAYOUT_CALIBRATION.read(filehandle, encoding=encoding)
     measure_config = LAYOUT_MEASURE_CONFIG.read(filehandle, encoding=encoding)
     data_length = calibration['xres'] * calibration['yres']
-    data = read_array(filehandle, dtype=np.float32, count=data_length)
+    raw_data = read_array(filehandle, dtype=np.float32, count=data_length, mmap=True)
     image_layers = {}
     if read_image_layers:
         filehandle.seek(16, 1) # skip 16 bytes, no idea what they are doing
@@ -62,13 +67,17 @@ def read_plu(filehandle, read_image_layers=False, encoding='utf-8'):
             image_layers['Grayscale'] = img[:, :, 0]
         else:
             image_layers['RGB'] = img
-    data = data.reshape((calibration['yres'], calibration['xres']))
-    data[data == NON_MEASURED_VALUE] = np.nan
+    raw_data = raw_data.reshape((calibration['yres'], calibration['xres']))
+
+    def scale(raw_data):
+        data = raw_data.copy()
+        data[data == NON_MEASURED_VALUE] = np.nan
+        return data
 
     step_x = calibration['mppx']
     step_y = calibration['mppy']
 
     metadata = {'timestamp': timestamp}
 
-    return RawSurface(data, step_x, step_y, image_layers=image_layers, metadata=metadata)
+    return RawSurface(LazyArray.from_raw(raw_data, scale), step_x, step_y, image_layers=image_layers, metadata=metadata)
 
@@ -9,7 +9,10 @@ TOPOGRAPHY_FILE_NAME = 'LAYER_0.raw'
 IMAGE_FILE_NAME = 'LAYER_0.stack.raw'
 XML_METADATA_FILE_NAME = 'index.xml'
 
-@FileHandler.register_reader(suffix='.plux')
+# Plux files are zip archives, which begin with the magic of a local file header
+ZIP_MAGIC = b'PK\x03\x04'
+
+@FileHandler.register_reader(suffix='.plux', sniff=lambda prefix: prefix.startswith(ZIP_MAGIC))
 def read_plux(filehandle, read_image_layers=False, encoding='utf-8'):
     with zipfile.ZipFile(filehandle) as archive:
         contents = archive.namelist()
@@ -1,8 +1,7 @@
-import struct
 import re
 from datetime import datetime
 import numpy as np
-from .common import RawSurface, get_unit_conversion, Entry, Layout, FileHandler, write_array
+from .common import RawSurface, LazyArray, get_unit_conversion, Entry, Layout, FileHandler, read_array, write_array
 from ..exceptions import CorruptedFileError, UnsupportedFileFormatError
 
 # File format specifications taken from ISO 25178-71
@@ -105,24 +104,21 @@ def read_binary_sdf(filehandle, encoding="utf-8"):
         raise CorruptedFileError(f"Unsupported DataType in SDF file: {data_type}")
 
     data_format = DTYPE_MAP[data_type]
-    item_size = struct.calcsize(data_format)
-    data_size = item_size * num_points * num_profiles
-    data_bytes = filehandle.read(data_size)
+    raw_data = read_array(filehandle, dtype=data_format, count=num_points * num_profiles, mmap=True)
 
-    if len(data_bytes) != data_size:
+    if raw_data.size != num_points * num_profiles:
         raise CorruptedFileError("Unexpected end of file or corrupt data section.")
 
-    data = np.frombuffer(data_bytes, dtype=np.dtype(data_format))
-
     missing_value = BINARY_INVALID_VALUE_MAP[data_type]
-    invalid_mask = (data == missing_value)
 
-    data = data.astype('float64') * header["Zscale"] * CONVERSION_FACTOR
-    data[invalid_mask] = np.nan
-    data = data.reshape((num_profiles, num_points))
+    def scale(raw_data):
+        data = raw_data.astype('float64') * header["Zscale"] * CONVERSION_FACTOR
+        data[raw_data == missing_value] = np.nan
+        return data
 
     step_x = header["Xscale"] * CONVERSION_FACTOR
     step_y = header["Yscale"] * CONVERSION_FACTOR
+    data = LazyArray.from_raw(raw_data.reshape((num_profiles, num_points)), scale)
     return RawSurface(data, step_x, step_y, metadata=header)
 
 @FileHandler.register_reader(suffix='.sdf', magic=(MAGIC_ASCII, MAGIC_BINARY))
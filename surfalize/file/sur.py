@@ -6,7 +6,8 @@ from dataclasses import dataclass
 
 import numpy as np
 
-from .common import get_unit_conversion, RawSurface, Entry, Reserved, Layout, FileHandler, read_array, write_array
+from .common import (get_unit_conversion, RawSurface, LazyArray, Entry, Reserved, Layout, FileHandler, read_array,
+                     write_array)
 from ..exceptions import CorruptedFileError, UnsupportedFileFormatError
 
 # This is not fully implemented! Won't work with all SUR files.
@@ -181,8 +182,8 @@ def read_directory(filehandle):
     return Directory(*struct.unpack('<2I', filehandle.read(8)))
 
 
-def read_uncompressed_data(filehandle, dtype, num_points):
-    return read_array(filehandle, count=num_points, dtype=dtype)
+def read_uncompressed_data(filehandle, dtype, num_points, mmap=False):
+    return read_array(filehandle, count=num_points, dtype=dtype, mmap=mmap)
 
 
 def read_compressed_data(filehandle, dtype, expected_compressed_size):
@@ -273,7 +274,7 @@ def is_gwyddion_export(sur_obj):
             and sur_obj.header['name_operator'] == 'csm')
 
 
-def read_sur_object(filehandle, encoding='utf-8'):
+def read_sur_object(filehandle, encoding='utf-8', mmap=False, lazy=False):
     """
     Reads a sur object from a file. The function assumes that the filepointer points to the beginning of a sur object.
     A sur object consists of a 512-byte long header, followed by a variable length comment zone, private zone and
@@ -284,6 +285,14 @@ def read_sur_object(filehandle, encoding='utf-8'):
     ----------
     filehandle
         Handle to the file object.
+    encoding : str, default 'utf-8'
+        Encoding of the strings in the header.
+    mmap : bool, default False
+        If True, uncompressed data is memory-mapped instead of read if the file object refers to a file on disk.
+    lazy : bool, default False
+        If True, compressed data is not decompressed but read from the file on first access. Requires a file object
+        opened from a path.
+
     Returns
     -------
     SurObject
@@ -296,7 +305,13 @@ def read_sur_object(filehandle, encoding='utf-8'):
     # Since 2010 version, there are two formats: compressed and uncompressed.
     # Which of the versions is used for a sur object is indicated by the file magic
     if header['code'] == MAGIC_CLASSIC:
-        data = read_uncompressed_data(filehandle, dtype, header['n_total_points']).reshape(ny, nx)
+        data = read_uncompressed_data(filehandle, dtype, header['n_total_points'], mmap=mmap).reshape(ny, nx)
+    elif header['code'] == MAGIC_COMPRESSED and lazy:
+        data = LazyArray.from_file(
+            filehandle, (ny, nx),
+            lambda file: read_compressed_data(file, dtype, header['compressed_data_size']).reshape(ny, nx)
+        )
+        filehandle.seek(header['compressed_data_size'], 1)
     elif header['code'] == MAGIC_COMPRESSED:
         data = read_compressed_data(filehandle, dtype, header['compressed_data_size']).reshape(ny, nx)
     else:
@@ -306,29 +321,30 @@ def read_sur_object(filehandle, encoding='utf-8'):
 
 
 def get_surface(sur_obj):
-    if sur_obj.header['non_measured_points'] == 1:
-        invalidValue = sur_obj.header['min_point'] - 2
-        nan_mask = (sur_obj.data == invalidValue)
-
-    # The conversion from int to float needs to happen before multiply by the unit conversion factor!
-    # Otherwise, we might overflow the values in the array and end up with white noise
-    data = sur_obj.data * sur_obj.header['spacing_z']
-    data = data * get_unit_conversion(sur_obj.header['unit_step_z'], 'um')
-    step_x = get_unit_conversion(sur_obj.header['unit_step_x'], 'um') * sur_obj.header['spacing_x']
-    step_y = get_unit_conversion(sur_obj.header['unit_step_y'], 'um') * sur_obj.header['spacing_y']
-
-    if sur_obj.header['non_measured_points'] == 1:
-        data[nan_mask] = np.nan
-
-    data += sur_obj.header['offset_z']
+    header = sur_obj.header
+    conversion_factor_z = get_unit_conversion(header['unit_step_z'], 'um')
+    step_x = get_unit_conversion(header['unit_step_x'], 'um') * header['spacing_x']
+    step_y = get_unit_conversion(header['unit_step_y'], 'um') * header['spacing_y']
+
+    # The scaling is deferred until the height data is accessed, such that the raw data can remain memory-mapped
+    def scale(raw_data):
+        # The conversion from int to float needs to happen before multiply by the unit conversion factor!
+        # Otherwise, we might overflow the values in the array and end up with white noise
+        data = raw_data * header['spacing_z']
+        data *= conversion_factor_z
+        if header['non_measured_points'] == 1:
+            invalidValue = header['min_point'] - 2
+            data[raw_data == invalidValue] = np.nan
+        data += header['offset_z']
+        return data
 
     # This can be implemented in the future when metadata support is needed
     # timestamp = datetime.datetime(year=header['year'], month=header['month'], day=header['day'])
-    return (data, step_x, step_y)
+    return (LazyArray.from_raw(sur_obj.data, scale), step_x, step_y)
 
-@FileHandler.register_reader(suffix='.sur', magic=(MAGIC_CLASSIC.encode(), MAGIC_COMPRESSED.encode()))
-def read_sur(filehandle, read_image_layers=False, encoding='utf-8'):
-    top_level_sur_obj = read_sur_object(filehandle, encoding=encoding)
+@FileHandler.register_reader(suffix='.sur', magic=(MAGIC_CLASSIC.encode(), MAGIC_COMPRESSED.encode()), lazy=True)
+def read_sur(filehandle, read_image_layers=False, encoding='utf-8', lazy=False):
+    top_level_sur_obj = read_sur_object(filehandle, encoding=encoding, mmap=True, lazy=lazy)
     if top_level_sur_obj.header['n_objects'] > 1:
         raise UnsupportedFileFormatError(f'Multilayer or series studiables are currently not supported.')
     image_layers = {}
@@ -378,6 +394,9 @@ def write_sur(filehandle, surface, encoding='utf-8', compressed=False, comment='
     timestamp = datetime.now()
 
     comment = comment.encode(encoding)
+    if compressed:
+        uncompressed_data = data.tobytes()
+        compressed_data = zlib.compress(uncompressed_data)
 
     header = {
         'code': MAGIC_CLASSIC if not compressed else MAGIC_COMPRESSED,
@@ -425,7 +444,7 @@ def write_sur(filehandle, surface, encoding='utf-8', compressed=False, comment='
         'year': timestamp.year,
         'week_day': timestamp.weekday(),
         'measurement_duration': 0,
-        'compressed_data_size': 0,
+        'compressed_data_size': 0 if not compressed else 12 + len(compressed_data),
         'length_comment': len(comment),
         'length_private': 0,
         'client_zone': 'Exported by surfalize',
@@ -445,8 +464,6 @@ def write_sur(filehandle, surface, encoding='utf-8', compressed=False, comment='
         write_array(data, filehandle)
         return
     else:
-        uncompressed_data = data.tobytes()
-        compressed_data = zlib.compress(uncompressed_data)
         # Write directory count = 1 and the length of a single data stream containing all the compressed data
         filehandle.write(struct.pack('<3I', 1, len(uncompressed_data), len(compressed_data)))
         filehandle.write(compressed_data)
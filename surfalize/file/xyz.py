@@ -4,7 +4,15 @@ from ..exceptions import UnsupportedFileFormatError, CorruptedFileError
 from .common import RawSurface, FileHandler
 
 
-@FileHandler.register_reader(suffix='.xyz')
+def sniff_xyz(prefix):
+    # The first line of an ASCII xyz file contains three numbers
+    first_line = prefix.split(b'\n', 1)[0]
+    try:
+        return len([float(value) for value in first_line.split()]) == 3
+    except ValueError:
+        return False
+
+@FileHandler.register_reader(suffix='.xyz', sniff=sniff_xyz)
 def read_xyz(filehandle, read_image_layers=False, encoding='utf-8'):
     try:
         raw_data = np.loadtxt(filehandle)
@@ -1,6 +1,144 @@
+from functools import lru_cache
+
 import numpy as np
+import scipy.fft
 import scipy.ndimage as ndimage
 
+# Extension modes of scipy.ndimage and the equivalent modes of np.pad used to extend the data before the Fourier
+# transform
+PADDING_MODES = {'reflect': 'symmetric', 'mirror': 'reflect', 'nearest': 'edge', 'constant': 'constant', 'wrap': 'wrap'}
+
+# Radius of the Gaussian kernel in standard deviations, identical to the default of scipy.ndimage.gaussian_filter. The
+# data is extended by this radius before the Fourier transform.
+TRUNCATE = 4.0
+
+# Standard deviation of the Gaussian kernel in points above which method='auto' filters in the frequency domain
+FFT_SIGMA_THRESHOLD = 16
+
+
+@lru_cache(maxsize=128)
+def gaussian_transfer_function(n, step, cutoff, onesided=False):
+    """
+    Returns the transfer function of the Gaussian lowpass filter according to ISO 16610-61 along one axis,
+    H(f) = exp(-pi * (alpha * cutoff * f)^2) with alpha = sqrt(ln(2) / pi), evaluated at the frequencies of a discrete
+    Fourier transform of length n. The areal transfer function is the product of the transfer functions along both
+    axes. The result is cached, since it only depends on the arguments.
+
+    Parameters
+    ----------
+    n : int
+        Length of the transform.
+    step : float
+        Distance between two points.
+    cutoff : float
+        Cutoff wavelength, at which the amplitude transmission is 50%.
+    onesided : bool, default False
+        If True, the transfer function is evaluated at the non-negative frequencies of a real-input transform only.
+
+    Returns
+    -------
+    ndarray
+        Read-only array of the transfer function.
+    """
+    frequencies = np.fft.rfftfreq(n, d=step) if onesided else np.fft.fftfreq(n, d=step)
+    alpha = np.sqrt(np.log(2) / np.pi)
+    transfer = np.exp(-np.pi * (alpha * cutoff * frequencies) ** 2)
+    transfer.setflags(write=False)
+    return transfer
+
+
+class GaussianSpectrum:
+    """
+    Fourier transform of height data that is extended at the boundaries according to the end effect mode. The
+    transform can be shared by multiple Gaussian lowpass filters, which only require a multiplication with their
+    transfer function and an inverse transform. The data is extended by the radius of the widest kernel, such that the
+    result matches the spatial convolution with the respective boundary treatment of scipy.ndimage.gaussian_filter.
+    A stack of arrays of identical shape is transformed in a single call, whereby the filters are applied along the
+    last two axes.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data or stack of two-dimensional arrays along the leading axes.
+    step_x : float
+        Lateral step along the x-axis.
+    step_y : float
+        Lateral step along the y-axis.
+    max_cutoff : float
+        Largest cutoff wavelength that is applied to the spectrum, which determines the extension of the data.
+    endeffect_mode : {reflect, constant, nearest, mirror, wrap}, default reflect
+        Extension mode at the boundaries, see scipy.ndimage.gaussian_filter.
+    """
+    def __init__(self, data, step_x, step_y, max_cutoff, endeffect_mode='reflect'):
+        if endeffect_mode not in PADDING_MODES:
+            raise ValueError(f'Invalid endeffect_mode "{endeffect_mode}". Possible values are '
+                             f'{", ".join(PADDING_MODES)}.')
+        self.step_x = step_x
+        self.step_y = step_y
+        self.shape = data.shape[-2:]
+        if endeffect_mode == 'wrap':
+            # The discrete Fourier transform is periodic, so no extension is required
+            padding = ((0, 0), (0, 0))
+            padded = data
+        else:
+            padding = []
+            for n, step in zip(self.shape, (step_y, step_x)):
+                radius = int(TRUNCATE * GaussianFilter.sigma(max_cutoff / step) + 0.5)
+                length = scipy.fft.next_fast_len(n + 2 * radius, real=True)
+                padding.append((radius, length - n - radius))
+            padded = np.pad(data, [(0, 0)] * (data.ndim - 2) + padding, mode=PADDING_MODES[endeffect_mode])
+        self._crop = (Ellipsis,) + tuple(slice(before, before + n) for (before, _), n in zip(padding, self.shape))
+        self.padded_shape = padded.shape[-2:]
+        self.data = scipy.fft.rfft2(padded)
+
+    def transfer_function(self, cutoff):
+        """
+        Returns the areal transfer function of the Gaussian lowpass filter for the one-sided spectrum.
+
+        Parameters
+        ----------
+        cutoff : float
+            Cutoff wavelength.
+
+        Returns
+        -------
+        ndarray
+        """
+        transfer_y = gaussian_transfer_function(self.padded_shape[0], self.step_y, cutoff)
+        transfer_x = gaussian_transfer_function(self.padded_shape[1], self.step_x, cutoff, onesided=True)
+        return np.multiply.outer(transfer_y, transfer_x)
+
+    def inverse(self, transfer):
+        """
+        Applies a transfer function to the spectrum and returns the inverse transform cropped to the original shape.
+
+        Parameters
+        ----------
+        transfer : ndarray
+            Transfer function of the shape of the one-sided spectrum.
+
+        Returns
+        -------
+        ndarray
+        """
+        return scipy.fft.irfft2(self.data * transfer, s=self.padded_shape)[self._crop]
+
+    def lowpass(self, cutoff):
+        """
+        Returns the Gaussian lowpass filtered data.
+
+        Parameters
+        ----------
+        cutoff : float
+            Cutoff wavelength. Must not be larger than max_cutoff.
+
+        Returns
+        -------
+        ndarray
+        """
+        return self.inverse(self.transfer_function(cutoff))
+
+
 class GaussianFilter:
     """
     Constructs a Gaussian filter that can be applied on a topography using filter.apply or the __call__ syntax.
@@ -15,18 +153,26 @@ class GaussianFilter:
             The parameter determines how the endeffects of the filter at the boundaries of the data are managed.
             For details, see the documentation of scipy.ndimage.gaussian_filter.
             https://docs.scipy.org/doc/scipy/reference/generated/scipy.ndimage.gaussian_filter.html
+    method : {'auto', 'spatial', 'fft'}, default 'auto'
+        Method by which the filter is applied. 'spatial' convolves the data with the Gaussian kernel using
+        scipy.ndimage.gaussian_filter, whose cost grows linearly with the cutoff. 'fft' multiplies the Fourier transform
+        of the extended data with the transfer function defined by ISO 16610-61, whose cost is independent of the
+        cutoff. 'auto' uses 'fft' if the standard deviation of the kernel exceeds FFT_SIGMA_THRESHOLD points.
 
     Examples
     --------
     >>> lowpass_filter = GaussianFilter(1, 'lowpass')
     >>> filtered_surface = lowpass_filter(original_surface)
     """
-    def __init__(self, cutoff, filter_type, endeffect_mode='reflect'):
+    def __init__(self, cutoff, filter_type, endeffect_mode='reflect', method='auto'):
         self._cutoff = cutoff
         if filter_type not in ['lowpass', 'highpass']:
             raise ValueError('f"{filter_type}" is not a valid filter type.')
+        if method not in ('auto', 'spatial', 'fft'):
+            raise ValueError(f'Invalid method "{method}". Possible values are "auto", "spatial" and "fft".')
         self._filter_type = filter_type
         self._endeffect_mode = endeffect_mode
+        self._method = method
 
     @staticmethod
     def sigma(cutoff):
@@ -50,6 +196,48 @@ class GaussianFilter:
         """
         return cutoff / np.pi * np.sqrt(np.log(2) / 2)
 
+    def use_fft(self, step_x, step_y):
+        """
+        Returns whether the filter is applied in the frequency domain for the given lateral steps.
+
+        Parameters
+        ----------
+        step_x : float
+            Lateral step along the x-axis.
+        step_y : float
+            Lateral step along the y-axis.
+
+        Returns
+        -------
+        bool
+        """
+        if self._method == 'auto':
+            return self.sigma(self._cutoff / max(step_x, step_y)) > FFT_SIGMA_THRESHOLD
+        return self._method == 'fft'
+
+    def lowpass(self, data, step_x, step_y):
+        """
+        Returns the lowpass filtered height data.
+
+        Parameters
+        ----------
+        data : ndarray
+            Two-dimensional height data.
+        step_x : float
+            Lateral step along the x-axis.
+        step_y : float
+            Lateral step along the y-axis.
+
+        Returns
+        -------
+        ndarray
+        """
+        if self.use_fft(step_x, step_y):
+            return GaussianSpectrum(data, step_x, step_y, self._cutoff, self._endeffect_mode).lowpass(self._cutoff)
+        sigma_x = self.sigma(self._cutoff / step_x)
+        sigma_y = self.sigma(self._cutoff / step_y)
+        return ndimage.gaussian_filter(data, (sigma_y, sigma_x), mode=self._endeffect_mode)
+
     def __call__(self, surface, inplace=False):
         """
         Applied the filter to a Surface object
@@ -86,11 +274,7 @@ class GaussianFilter:
         -------
         filtered_surface : Surface
         """
-        cutoff_x_px = self._cutoff / surface.step_x
-        cutoff_y_px = self._cutoff / surface.step_y
-        sigma_x = self.sigma(cutoff_x_px)
-        sigma_y = self.sigma(cutoff_y_px)
-        data = ndimage.gaussian_filter(surface.data, (sigma_y, sigma_y), mode=self._endeffect_mode)
+        data = self.lowpass(surface.data, surface.step_x, surface.step_y)
         if self._filter_type == 'highpass':
             data = surface.data - data
         if inplace:
@@ -98,4 +282,267 @@ class GaussianFilter:
             return surface
         # We use surface.__class__ to obtain the class without needing to import it
         # This mitigates a circular import conflict
-        return surface.__class__(data, surface.step_x, surface.step_y)
\ No newline at end of file
+        return surface.__class__(data, surface.step_x, surface.step_y)
+
+class FilterBank:
+    """
+    Set of Gaussian lowpass filters with different cutoff wavelengths that are applied to the same surface. All
+    filters share a single intermediate: if the filters are applied in the frequency domain, the Fourier transform of
+    the surface is computed once and each filter only requires a multiplication with its transfer function and an
+    inverse transform. Otherwise, each convolution is computed exactly once.
+
+    The bank decomposes a surface into wavelength bands, e.g. into roughness, waviness and form using two cutoffs.
+    The bands are the differences of the lowpass filtered surfaces of adjacent cutoffs, such that the sum of all bands
+    is equal to the original surface.
+
+    Parameters
+    ----------
+    cutoffs : list-like[float]
+        Cutoff wavelengths in µm.
+    endeffect_mode : {reflect, constant, nearest, mirror, wrap}, default reflect
+        The parameter determines how the endeffects of the filter at the boundaries of the data are managed.
+    method : {'auto', 'spatial', 'fft'}, default 'auto'
+        Method by which the filters are applied, see GaussianFilter. If 'auto', the frequency domain is used if it
+        would be used for the largest cutoff.
+
+    Examples
+    --------
+    >>> roughness, waviness, form = FilterBank([80, 800]).decompose(surface)
+    """
+    def __init__(self, cutoffs, endeffect_mode='reflect', method='auto'):
+        cutoffs = sorted(cutoffs)
+        if not cutoffs or cutoffs[0] <= 0:
+            raise ValueError('At least one positive cutoff wavelength must be specified.')
+        if len(set(cutoffs)) != len(cutoffs):
+            raise ValueError('The cutoff wavelengths must be unique.')
+        self.cutoffs = tuple(cutoffs)
+        self._endeffect_mode = endeffect_mode
+        self._filters = [GaussianFilter(cutoff, 'lowpass', endeffect_mode=endeffect_mode, method=method)
+                         for cutoff in cutoffs]
+
+    def use_fft(self, step_x, step_y):
+        """
+        Returns whether the filters are applied in the frequency domain for the given lateral steps.
+
+        Parameters
+        ----------
+        step_x : float
+            Lateral step along the x-axis.
+        step_y : float
+            Lateral step along the y-axis.
+
+        Returns
+        -------
+        bool
+        """
+        return self._filters[-1].use_fft(step_x, step_y)
+
+    def lowpass(self, data, step_x, step_y):
+        """
+        Returns the lowpass filtered data for each cutoff in ascending order of the cutoffs.
+
+        Parameters
+        ----------
+        data : ndarray
+            Two-dimensional height data.
+        step_x : float
+            Lateral step along the x-axis.
+        step_y : float
+            Lateral step along the y-axis.
+
+        Returns
+        -------
+        list[ndarray]
+        """
+        if self.use_fft(step_x, step_y):
+            spectrum = GaussianSpectrum(data, step_x, step_y, self.cutoffs[-1], self._endeffect_mode)
+            return [spectrum.lowpass(cutoff) for cutoff in self.cutoffs]
+        return [lowpass_filter.lowpass(data, step_x, step_y) for lowpass_filter in self._filters]
+
+    def decompose(self, surface):
+        """
+        Decomposes a surface into wavelength bands. For n cutoffs, n + 1 surfaces are returned in order of increasing
+        wavelength: the highpass filtered surface of the smallest cutoff, the bandpass filtered surfaces between
+        adjacent cutoffs and the lowpass filtered surface of the largest cutoff.
+
+        Parameters
+        ----------
+        surface : Surface
+            Surface object to decompose.
+
+        Returns
+        -------
+        list[Surface]
+        """
+        lowpass = self.lowpass(surface.data, surface.step_x, surface.step_y)
+        bands = [surface.data - lowpass[0]]
+        bands.extend(shorter - longer for shorter, longer in zip(lowpass[:-1], lowpass[1:]))
+        bands.append(lowpass[-1])
+        # We use surface.__class__ to obtain the class without needing to import it
+        return [surface.__class__(band, surface.step_x, surface.step_y) for band in bands]
+
+
+def bandpass(data, step_x, step_y, cutoff, cutoff2, endeffect_mode='reflect', method='auto'):
+    """
+    Applies a lowpass filter with the cutoff wavelength cutoff followed by a highpass filter with the larger cutoff
+    wavelength cutoff2. In the frequency domain, the highpass filter applied to the lowpass filtered data corresponds
+    to the difference between the lowpass filters with the cutoffs cutoff and sqrt(cutoff^2 + cutoff2^2), since the
+    product of two Gaussian transfer functions is a Gaussian transfer function. Both are therefore computed from a
+    single Fourier transform. In the spatial domain, the second filter is applied to the result of the first one.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data.
+    step_x : float
+        Lateral step along the x-axis.
+    step_y : float
+        Lateral step along the y-axis.
+    cutoff : float
+        Cutoff wavelength of the lowpass filter.
+    cutoff2 : float
+        Cutoff wavelength of the highpass filter.
+    endeffect_mode : {reflect, constant, nearest, mirror, wrap}, default reflect
+        The parameter determines how the endeffects of the filter at the boundaries of the data are managed.
+    method : {'auto', 'spatial', 'fft'}, default 'auto'
+        Method by which the filters are applied, see GaussianFilter.
+
+    Returns
+    -------
+    ndarray
+    """
+    combined_cutoff = np.hypot(cutoff, cutoff2)
+    highpass_filter = GaussianFilter(cutoff2, 'highpass', endeffect_mode=endeffect_mode, method=method)
+    if highpass_filter.use_fft(step_x, step_y):
+        spectrum = GaussianSpectrum(data, step_x, step_y, combined_cutoff, endeffect_mode)
+        return spectrum.inverse(spectrum.transfer_function(cutoff) - spectrum.transfer_function(combined_cutoff))
+    lowpass_filter = GaussianFilter(cutoff, 'lowpass', endeffect_mode=endeffect_mode, method='spatial')
+    lowpass = lowpass_filter.lowpass(data, step_x, step_y)
+    return lowpass - highpass_filter.lowpass(lowpass, step_x, step_y)
+
+
+def _median(array):
+    """
+    Returns the median of an array using a single partial sort, which is faster than np.median.
+
+    Parameters
+    ----------
+    array : ndarray
+        Array without nan values.
+
+    Returns
+    -------
+    float
+    """
+    values = array.ravel()
+    k = values.size // 2
+    partitioned = np.partition(values, k)
+    if values.size % 2:
+        return partitioned[k]
+    # The lower middle value is the largest value of the lower partition
+    return 0.5 * (partitioned[k] + partitioned[:k].max())
+
+
+class RobustGaussianFilter(GaussianFilter):
+    """
+    Robust Gaussian regression filter according to ISO 16610-71. In contrast to the linear Gaussian filter, the mean
+    line is not distorted by deep valleys, high peaks or outliers. The filter is computed as an iteratively reweighted
+    zeroth order Gaussian regression, where each iteration consists of a normalized convolution
+
+        m = G * (w z) / G * w
+
+    of the height data z with the Gaussian weighting function G. The weights w are updated from the residuals
+    r = z - m using the biweight function w = (1 - (r / c)^2)^2 for |r| < c and w = 0 otherwise, with
+    c = 4.4478 * median(|r|). The first iteration uses uniform weights and is identical to the linear Gaussian
+    filter. The iteration stops once the relative change of c between two iterations falls below the tolerance or
+    after max_iterations iterations. Typically, the mean line converges within two or three reweighted iterations.
+
+    Each reweighted iteration costs about twice as much as a linear Gaussian filter. In the frequency domain, the
+    transfer function is computed once and the weighted data and the weights of an iteration are transformed together
+    in a single call. The median of the residuals is determined by selection instead of sorting.
+
+    Parameters
+    ----------
+    cutoff : float
+        Cutoff wavelength.
+    filter_type : {'lowpass', 'highpass'}
+        Type of filter to apply. For highpass, the robust mean line is subtracted from the original data.
+    endeffect_mode : {reflect, constant, nearest, mirror, wrap}, default reflect
+        The parameter determines how the endeffects of the filter at the boundaries of the data are managed.
+    method : {'auto', 'spatial', 'fft'}, default 'auto'
+        Method by which the convolutions are computed, see GaussianFilter.
+    max_iterations : int, default 20
+        Maximum number of iterations, including the initial linear Gaussian filter.
+    tolerance : float, default 0.01
+        Convergence threshold for the relative change of the biweight constant c between two iterations.
+
+    Examples
+    --------
+    >>> robust_filter = RobustGaussianFilter(80, 'highpass')
+    >>> roughness = robust_filter(original_surface)
+    """
+    # Constant of the biweight function defined by ISO 16610-71
+    BIWEIGHT_CONSTANT = 4.4478
+
+    def __init__(self, cutoff, filter_type, endeffect_mode='reflect', method='auto', max_iterations=20,
+                 tolerance=0.01):
+        super().__init__(cutoff, filter_type, endeffect_mode=endeffect_mode, method=method)
+        if max_iterations < 1:
+            raise ValueError('The maximum number of iterations must be at least 1.')
+        self._max_iterations = max_iterations
+        self._tolerance = tolerance
+        self.iterations = 0
+
+    def lowpass(self, data, step_x, step_y):
+        """
+        Returns the robust mean line of the height data. The number of iterations performed is stored in the
+        iterations attribute.
+
+        Parameters
+        ----------
+        data : ndarray
+            Two-dimensional height data.
+        step_x : float
+            Lateral step along the x-axis.
+        step_y : float
+            Lateral step along the y-axis.
+
+        Returns
+        -------
+        ndarray
+        """
+        if self.use_fft(step_x, step_y):
+            spectrum = GaussianSpectrum(data, step_x, step_y, self._cutoff, self._endeffect_mode)
+            transfer = spectrum.transfer_function(self._cutoff)
+            mean_line = spectrum.inverse(transfer)
+
+            def convolve_weighted(weights):
+                stacked = np.stack((weights * data, weights))
+                return GaussianSpectrum(stacked, step_x, step_y, self._cutoff, self._endeffect_mode).inverse(transfer)
+        else:
+            sigma = (self.sigma(self._cutoff / step_y), self.sigma(self._cutoff / step_x))
+            mean_line = ndimage.gaussian_filter(data, sigma, mode=self._endeffect_mode)
+
+            def convolve_weighted(weights):
+                return (ndimage.gaussian_filter(weights * data, sigma, mode=self._endeffect_mode),
+                        ndimage.gaussian_filter(weights, sigma, mode=self._endeffect_mode))
+
+        self.iterations = 1
+        previous_c = None
+        while self.iterations < self._max_iterations:
+            residuals = np.abs(data - mean_line)
+            c = self.BIWEIGHT_CONSTANT * _median(residuals)
+            if c == 0 or (previous_c is not None and abs(c - previous_c) <= self._tolerance * c):
+                break
+            previous_c = c
+            # w = max(1 - (r / c)^2, 0)^2 is zero for |r| >= c, computed in place on the residuals
+            weights = np.multiply(residuals, 1 / c, out=residuals)
+            np.square(weights, out=weights)
+            np.subtract(1, weights, out=weights)
+            np.maximum(weights, 0, out=weights)
+            np.square(weights, out=weights)
+            numerator, denominator = convolve_weighted(weights)
+            # Regions without any weight keep the previous estimate of the mean line
+            mean_line = np.divide(numerator, denominator, out=mean_line, where=denominator > 1e-12)
+            self.iterations += 1
+        return mean_line
@@ -0,0 +1,160 @@
+import numpy as np
+import scipy.ndimage as ndimage
+import scipy.sparse as sparse
+from scipy.sparse.linalg import spsolve
+from scipy.interpolate import griddata
+
+# Methods supported by fill_nonmeasured
+FILL_METHODS = ('nearest', 'linear', 'cubic', 'harmonic', 'biharmonic')
+
+# Width of the ring of measured points around each hole that is used for the interpolation by griddata
+INTERPOLATION_MARGIN = 1
+
+
+def fill_nearest(data):
+    """
+    Fills each non-measured point with the value of the nearest measured point, which is determined by an exact
+    Euclidean distance transform in linear time.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data containing nan values.
+
+    Returns
+    -------
+    ndarray
+    """
+    missing = np.isnan(data)
+    indices = ndimage.distance_transform_edt(missing, return_distances=False, return_indices=True)
+    return data[tuple(indices)]
+
+
+def fill_interpolate(data, method='linear', margin=INTERPOLATION_MARGIN):
+    """
+    Fills the non-measured points by piecewise linear or cubic interpolation using scipy.interpolate.griddata. Instead
+    of triangulating all measured points, only the measured points within a ring of margin points around the holes are
+    triangulated, such that the cost scales with the size of the holes rather than the size of the surface. Points
+    outside the convex hull of these measured points remain nan.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data containing nan values.
+    method : {'linear', 'cubic'}, default 'linear'
+        Interpolation method passed to griddata.
+    margin : int, default 1
+        Width of the ring of measured points around the holes used for the interpolation.
+
+    Returns
+    -------
+    ndarray
+    """
+    missing = np.isnan(data)
+    ring = ndimage.binary_dilation(missing, structure=np.ones((3, 3), dtype=bool), iterations=margin) & ~missing
+    filled = data.copy()
+    filled[missing] = griddata(np.argwhere(ring), data[ring], np.argwhere(missing), method=method)
+    return filled
+
+
+def _laplacian_rows(indices, shape):
+    """
+    Returns the rows of the five-point Laplacian of a grid with reflecting boundaries for the given flat indices as a
+    sparse matrix with one column per grid point.
+
+    Parameters
+    ----------
+    indices : ndarray[int]
+        Flat indices of the grid points for which to construct the rows.
+    shape : tuple[int, int]
+        Shape of the grid.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+    """
+    ny, nx = shape
+    row, col = np.divmod(indices, nx)
+    positions = np.arange(indices.size)
+    degree = np.zeros(indices.size)
+    rows, cols = [], []
+    for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        inside = (row + dy >= 0) & (row + dy < ny) & (col + dx >= 0) & (col + dx < nx)
+        degree += inside
+        rows.append(positions[inside])
+        cols.append(indices[inside] + dy * nx + dx)
+    rows.append(positions)
+    cols.append(indices)
+    values = np.concatenate([-np.ones(sum(r.size for r in rows[:-1])), degree])
+    return sparse.csr_matrix((values, (np.concatenate(rows), np.concatenate(cols))), shape=(indices.size, ny * nx))
+
+
+def fill_harmonic(data, order=1):
+    """
+    Fills the non-measured points by harmonic (order=1) or biharmonic (order=2) inpainting. The filled values solve
+    the Laplace equation or the biharmonic equation with the surrounding measured values as boundary conditions.
+    Harmonic inpainting yields the smoothest membrane spanned over a hole, biharmonic inpainting the smoothest thin
+    plate, which also continues the slope of the surrounding surface. Only the rows of the operator that belong to the
+    non-measured points are assembled, so that the size of the sparse linear system equals the number of non-measured
+    points.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data containing nan values.
+    order : {1, 2}, default 1
+        Order of the inpainting. 1 corresponds to the Laplace equation, 2 to the biharmonic equation.
+
+    Returns
+    -------
+    ndarray
+    """
+    if order not in (1, 2):
+        raise ValueError('The order must be 1 or 2.')
+    missing = np.isnan(data)
+    if missing.all():
+        return data.copy()
+    unknown = np.flatnonzero(missing)
+    if order == 1:
+        operator = _laplacian_rows(unknown, data.shape)
+    else:
+        # The rows of the biharmonic operator L @ L for the unknowns only depend on the rows of the Laplacian L of the
+        # points adjacent to the unknowns, since L is symmetric
+        adjacent = np.flatnonzero(ndimage.binary_dilation(missing))
+        laplacian = _laplacian_rows(adjacent, data.shape)
+        operator = (laplacian[:, unknown].T @ laplacian).tocsr()
+    known_values = np.nan_to_num(data.ravel())
+    rhs = -(operator @ known_values)
+    filled = data.copy()
+    filled[missing] = spsolve(operator[:, unknown].tocsc(), rhs)
+    return filled
+
+
+def inpaint(data, method='nearest'):
+    """
+    Fills the non-measured points of height data.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data containing nan values.
+    method : {'nearest', 'linear', 'cubic', 'harmonic', 'biharmonic'}, default 'nearest'
+        Method by which the non-measured points are filled.
+
+        - 'nearest': Value of the nearest measured point, see fill_nearest.
+        - 'linear', 'cubic': Piecewise linear or cubic interpolation, see fill_interpolate.
+        - 'harmonic', 'biharmonic': Solution of the Laplace or biharmonic equation, see fill_harmonic.
+
+    Returns
+    -------
+    ndarray
+    """
+    if method == 'nearest':
+        return fill_nearest(data)
+    if method in ('linear', 'cubic'):
+        return fill_interpolate(data, method=method)
+    if method == 'harmonic':
+        return fill_harmonic(data, order=1)
+    if method == 'biharmonic':
+        return fill_harmonic(data, order=2)
+    raise ValueError(f'Invalid method "{method}". Possible values are {", ".join(FILL_METHODS)}.')
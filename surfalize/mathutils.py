@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 from scipy.optimize import curve_fit
 from scipy.signal import find_peaks
@@ -37,6 +39,54 @@ def interpolate_line_on_2d_array(array, start, end, order=3, num_points=100):
     return ndimage.map_coordinates(array, coords, order=order)
 
 
+class Interpolator:
+    """
+    Linear interpolator for one-dimensional data. The data is sorted once upon construction and queries of arbitrary
+    shape are evaluated in a single call to np.interp.
+
+    Parameters
+    ----------
+    xdata : array_like
+        array of x-values
+    ydata : array_like
+        array of y-values
+    assume_sorted : bool, default False
+        If True, they xdata array must be supplied with ascendingly ordered values and sorting is skipped.
+        If False, the array xdata will be sorted in ascending order and the array ydata will be sorted accordingly.
+    """
+    def __init__(self, xdata, ydata, assume_sorted=False):
+        xdata = np.asarray(xdata)
+        ydata = np.asarray(ydata)
+        if not assume_sorted:
+            dx = np.diff(xdata)
+            if np.all(dx <= 0):
+                # Descending data only needs to be reversed
+                xdata = xdata[::-1]
+                ydata = ydata[::-1]
+            elif not np.all(dx >= 0):
+                idx_sorted = np.argsort(xdata, kind='stable')
+                xdata = xdata[idx_sorted]
+                ydata = ydata[idx_sorted]
+        self.xdata = np.ascontiguousarray(xdata, dtype=np.float64)
+        self.ydata = np.ascontiguousarray(ydata, dtype=np.float64)
+
+    def __call__(self, x):
+        """
+        Evaluates the interpolator at x.
+
+        Parameters
+        ----------
+        x : float | array_like
+            Value or array of values at which to interpolate.
+
+        Returns
+        -------
+        float | np.ndarray
+            Interpolated values with the same shape as x.
+        """
+        return np.interp(x, self.xdata, self.ydata)
+
+
 def interp1d(xdata, ydata, assume_sorted=False):
     """
     Creates a function that linearly interpolates the given x- and y-data at any value of x.
@@ -58,19 +108,343 @@ def interp1d(xdata, ydata, assume_sorted=False):
 
     Returns
     -------
-    function
-        Linear interpolation function y(x).
+    Interpolator
+        Linear interpolation function y(x), which accepts scalars as well as arrays.
     """
-    if not assume_sorted:
-        idx_sorted = np.argsort(xdata)
-        xdata = xdata[idx_sorted]
-        ydata = ydata[idx_sorted]
+    return Interpolator(xdata, ydata, assume_sorted=assume_sorted)
 
-    @np.vectorize
-    def y(x):
-        return np.interp(x, xdata, ydata)
 
-    return y
+def central_moments(data, block_size=2**16):
+    """
+    Computes the mean as well as the mean absolute, second, third and fourth central moments of an array in a single
+    blocked pass. The data is processed in blocks of rows, so that only two buffers of roughly block_size elements are
+    allocated regardless of the size of the input array, instead of multiple full-size temporaries.
+
+    Parameters
+    ----------
+    data : ndarray
+        Input array. Arrays with more than one dimension are processed in blocks along the first axis.
+    block_size : int, default 65536
+        Approximate number of elements processed per block.
+
+    Returns
+    -------
+    mean, m1, m2, m3, m4 : tuple[float, float, float, float, float]
+        Mean value, mean absolute deviation and the mean second, third and fourth powers of the deviation from the
+        mean.
+    """
+    data = np.asarray(data)
+    if data.ndim < 2:
+        data = data.reshape(1, -1)
+    elif data.ndim > 2:
+        data = data.reshape(data.shape[0], -1)
+    nrows, ncols = data.shape
+    mean = data.mean()
+    rows_per_block = max(1, min(nrows, block_size // max(ncols, 1)))
+    centered_buffer = np.empty((rows_per_block, ncols), dtype=np.result_type(data.dtype, np.float64))
+    square_buffer = np.empty_like(centered_buffer)
+    m1 = m2 = m3 = m4 = 0.0
+    for start in range(0, nrows, rows_per_block):
+        block = data[start:start + rows_per_block]
+        n = block.shape[0]
+        centered = np.subtract(block, mean, out=centered_buffer[:n]).ravel()
+        square = np.multiply(centered, centered, out=square_buffer[:n].ravel())
+        m2 += square.sum()
+        # Dot products reduce the higher order moments without allocating further temporaries
+        m3 += np.dot(square, centered)
+        m4 += np.dot(square, square)
+        m1 += np.abs(centered, out=centered).sum()
+    size = data.size
+    return mean, m1 / size, m2 / size, m3 / size, m4 / size
+
+
+def _nan_aware_sum(values, total, count):
+    """
+    Adds the sum of the non-nan elements of an array to a running total and their number to a running count.
+    """
+    valid = ~np.isnan(values)
+    return total + values.sum(where=valid), count + np.count_nonzero(valid)
+
+
+def _extrapolate_sum(total, count, size):
+    """
+    Extrapolates a sum over count valid elements to the sum over size elements. Returns nan if no element is valid.
+    """
+    if count == size:
+        return total
+    if count == 0:
+        return np.nan
+    return total * size / count
+
+
+def gradient_sums(data, step_x, step_y, block_size=2**16):
+    """
+    Computes the sum of the triangle areas spanned between neighbouring points and the sum of the squared local
+    gradients of a two-dimensional array in a single blocked pass. The finite differences of each block of rows are
+    computed once and shared by both sums. Only three buffers of roughly block_size elements are allocated regardless
+    of the size of the input array, instead of multiple full-size temporaries.
+
+    Non-measured points (nan values) are supported. Quads and differences that involve a non-measured point are
+    excluded and the sums are extrapolated to the full array based on the fraction of valid elements, such that the
+    ratio of the sums to the projected area remains comparable to that of a fully measured array. Blocks without
+    non-measured points are reduced without additional cost.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data.
+    step_x : float
+        Lateral step along the x-axis.
+    step_y : float
+        Lateral step along the y-axis.
+    block_size : int, default 65536
+        Approximate number of elements processed per block.
+
+    Returns
+    -------
+    area, gradient : tuple[float, float]
+        Sum of the areas of the two triangles spanned in every quad of four neighbouring points, according to the
+        method proposed by ISO 25178, and sum of the squared finite difference gradients along both axes. If no valid
+        quad or difference exists, the respective value is nan.
+    """
+    data = np.asarray(data)
+    nrows, ncols = data.shape
+    dtype = np.result_type(data.dtype, np.float64)
+    rows_per_block = max(1, min(nrows - 1, block_size // max(ncols, 1)))
+    dy_buffer = np.empty((rows_per_block, ncols), dtype=dtype)
+    dx_buffer = np.empty((rows_per_block, ncols - 1), dtype=dtype)
+    area_buffer = np.empty_like(dx_buffer)
+    cross_z = (step_x * step_y) ** 2
+    area = gradient_x = gradient_y = 0.0
+    area_count = gradient_x_count = gradient_y_count = 0
+    for start in range(0, nrows - 1, rows_per_block):
+        stop = min(start + rows_per_block, nrows - 1)
+        n = stop - start
+        dy = np.subtract(data[start + 1:stop + 1], data[start:stop], out=dy_buffer[:n])
+        dx = np.subtract(data[start:stop, 1:], data[start:stop, :-1], out=dx_buffer[:n])
+        # A nan result indicates non-measured points in the block, in which case the block is reduced again while
+        # excluding the nan values
+        block_sum = np.dot(dy.ravel(), dy.ravel())
+        if np.isnan(block_sum):
+            gradient_y, gradient_y_count = _nan_aware_sum(dy * dy, gradient_y, gradient_y_count)
+        else:
+            gradient_y += block_sum
+            gradient_y_count += dy.size
+        block_sum = np.dot(dx.ravel(), dx.ravel())
+        if np.isnan(block_sum):
+            gradient_x, gradient_x_count = _nan_aware_sum(dx * dx, gradient_x, gradient_x_count)
+        else:
+            gradient_x += block_sum
+            gradient_x_count += dx.size
+        # The area of each triangle is half the norm of the cross product of its edge vectors
+        cross = np.multiply(dy[:, :-1], step_y, out=area_buffer[:n])
+        np.multiply(cross, cross, out=cross)
+        np.multiply(dx, step_x, out=dx)
+        np.multiply(dx, dx, out=dx)
+        np.add(cross, dx, out=cross)
+        np.add(cross, cross_z, out=cross)
+        np.sqrt(cross, out=cross)
+        block_sum = cross.sum()
+        if np.isnan(block_sum):
+            area, area_count = _nan_aware_sum(cross, area, area_count)
+        else:
+            area += block_sum
+            area_count += cross.size
+    # The differences along the x-axis of the last row do not belong to any quad but contribute to the gradient
+    last = np.diff(data[-1])
+    gradient_x, gradient_x_count = _nan_aware_sum(last * last, gradient_x, gradient_x_count)
+    area = _extrapolate_sum(area, area_count, (nrows - 1) * (ncols - 1))
+    gradient_x = _extrapolate_sum(gradient_x, gradient_x_count, nrows * (ncols - 1))
+    gradient_y = _extrapolate_sum(gradient_y, gradient_y_count, (nrows - 1) * ncols)
+    return area, gradient_x / step_x ** 2 + gradient_y / step_y ** 2
+
+
+@lru_cache(maxsize=64)
+def orthonormal_polynomials(n, degree):
+    """
+    Returns a basis of polynomials up to the specified degree that are orthonormal on n equally spaced points. The
+    basis is obtained from the QR decomposition of the Vandermonde matrix, such that the i-th column is a polynomial
+    of degree i. The result is cached, since it only depends on the number of points and the degree.
+
+    Parameters
+    ----------
+    n : int
+        Number of points.
+    degree : int
+        Maximum polynomial degree.
+
+    Returns
+    -------
+    ndarray
+        Read-only array of shape (n, min(n, degree + 1)) whose columns are the values of the basis polynomials.
+    """
+    t = np.linspace(-1, 1, n)
+    basis, _ = np.linalg.qr(np.vander(t, degree + 1, increasing=True))
+    basis = basis[:, :min(n, degree + 1)]
+    basis.setflags(write=False)
+    return basis
+
+
+def polynomial_trend(data, degree, block_size=2**16):
+    """
+    Computes the least squares fit of a bivariate polynomial of the specified total degree to two-dimensional data.
+    Non-measured points (nan values) are ignored in the fit.
+
+    The polynomial is expressed in a separable basis of products of one-dimensional polynomials in x and y, which are
+    orthonormal on the grid (see orthonormal_polynomials). If the data contains no nan values, the basis functions are
+    orthonormal and the coefficients are obtained in closed form by projecting the data onto the basis. Otherwise, the
+    normal equations are solved, whereby the Gram matrix is accumulated from the mask of measured points in blocks of
+    rows using the separability of the basis, such that no design matrix is created. The trend is evaluated as a
+    product of the one-dimensional basis matrices with the coefficient matrix.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data.
+    degree : int
+        Total degree of the polynomial.
+    block_size : int, default 65536
+        Approximate number of elements processed per block when accumulating the Gram matrix.
+
+    Returns
+    -------
+    ndarray
+        Polynomial trend evaluated on all points of the grid.
+    """
+    rows, cols = data.shape
+    basis_y = orthonormal_polynomials(rows, degree)
+    basis_x = orthonormal_polynomials(cols, degree)
+    # Degree in y and x of each product of one-dimensional polynomials with total degree smaller or equal to degree
+    degree_y, degree_x = np.nonzero(np.add.outer(np.arange(basis_y.shape[1]), np.arange(basis_x.shape[1])) <= degree)
+    coefficients = np.zeros((basis_y.shape[1], basis_x.shape[1]))
+    missing = np.isnan(data)
+    if not missing.any():
+        coefficients[degree_y, degree_x] = (basis_y.T @ data @ basis_x)[degree_y, degree_x]
+        return basis_y @ coefficients @ basis_x.T
+    # The Gram matrix of the products of the one-dimensional polynomials restricted to the measured points is
+    # separable as well. For each row, the products of the x-polynomials are summed over the measured points of the row
+    # by a single matrix product with the mask, which are then weighted by the products of the y-polynomials.
+    ky, kx = basis_y.shape[1], basis_x.shape[1]
+    products_x = (basis_x[:, :, np.newaxis] * basis_x[:, np.newaxis, :]).reshape(cols, kx * kx)
+    gram = np.zeros((ky, kx, ky, kx))
+    moments = np.zeros((ky, kx))
+    rows_per_block = max(1, block_size // cols)
+    for start in range(0, rows, rows_per_block):
+        block = data[start:start + rows_per_block]
+        block_missing = missing[start:start + rows_per_block]
+        block_basis_y = basis_y[start:start + rows_per_block]
+        row_sums = ((~block_missing).astype(np.float64) @ products_x).reshape(-1, kx, kx)
+        gram += np.einsum('rj,rl,rik->jilk', block_basis_y, block_basis_y, row_sums, optimize=True)
+        moments += block_basis_y.T @ np.where(block_missing, 0, block) @ basis_x
+    gram = gram[degree_y, degree_x][:, degree_y, degree_x]
+    moments = moments[degree_y, degree_x]
+    coefficients[degree_y, degree_x] = np.linalg.lstsq(gram, moments, rcond=None)[0]
+    return basis_y @ coefficients @ basis_x.T
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch with bounded memory based on a hierarchy of compactors, similar to the KLL sketch but
+    deterministic. Values are added in blocks using `update`. Each level holds sorted items with a weight of 2**level.
+    When a level holds 2k or more items, every other item is promoted to the next level with twice the weight.
+
+    Each compaction at level h introduces a rank error of at most 2**h. The total rank error of a quantile query is
+    therefore bounded by about n * log2(n / k) / (2k) for n values, i.e. a relative rank error of log2(n / k) / (2k).
+    The exact bound for the data added so far is returned by `error_bound`. The memory usage is in the order of
+    k * log2(n / k) values.
+
+    Parameters
+    ----------
+    k : int, default 4096
+        Capacity parameter of the compactors. Larger values increase the accuracy and memory usage.
+    """
+    def __init__(self, k=4096):
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0)]
+        self._ncompactions = [0]
+
+    def __len__(self):
+        return sum(level.size for level in self._levels)
+
+    def update(self, values):
+        """
+        Adds values to the sketch.
+
+        Parameters
+        ----------
+        values : array-like
+            Values to add.
+
+        Returns
+        -------
+        None
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if items.size >= 2 * self.k:
+                if level == len(self._levels) - 1:
+                    self._levels.append(np.empty(0))
+                    self._ncompactions.append(0)
+                items = np.sort(items)
+                n = items.size - items.size % 2
+                # Alternating the offset between compactions makes the rank errors cancel out on average
+                offset = self._ncompactions[level] % 2
+                self._ncompactions[level] += 1
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], items[offset:n:2]])
+                self._levels[level] = items[n:]
+            level += 1
+
+    def error_bound(self):
+        """
+        Returns the upper bound of the relative rank error of quantile queries.
+
+        Returns
+        -------
+        float
+        """
+        if self.count == 0:
+            return 0.0
+        return sum(2 ** level * ncompactions for level, ncompactions in enumerate(self._ncompactions)) / self.count
+
+    def quantile(self, q):
+        """
+        Computes approximate quantiles of the values added to the sketch.
+
+        Parameters
+        ----------
+        q : float | array-like
+            Quantile or array of quantiles between 0 and 1.
+
+        Returns
+        -------
+        float | np.ndarray
+        """
+        if self.count == 0:
+            raise ValueError('Cannot compute quantiles of an empty sketch.')
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** i) for i, level in enumerate(self._levels)])
+        idx_sorted = np.argsort(values, kind='stable')
+        values = values[idx_sorted]
+        # Rank at the center of the weight of each item, normalized to the range from 0 to 1
+        cumulative_weights = np.cumsum(weights[idx_sorted])
+        ranks = (cumulative_weights - weights[idx_sorted] / 2) / cumulative_weights[-1]
+        ranks = np.concatenate([[0], ranks, [1]])
+        values = np.concatenate([[self.min], values, [self.max]])
+        return np.interp(q, ranks, values)
 
 
 def argclosest(x, xdata):
@@ -264,6 +638,91 @@ class Sinusoid:
             x0 = x0 - p / 2
         return cls(a, p, x0, y0)
 
+    @classmethod
+    def from_fit_multiple(cls, xdata, ydata, period, maxiter=100, tol=1.49012e-8):
+        """
+        Fit general sinusoids to multiple profiles sharing the same x data at once. All profiles are first fitted by
+        linear least squares to a sine and cosine basis with the known initial period estimate. Then, the amplitude,
+        period and offsets of each profile are refined simultaneously for all profiles using damped Gauss-Newton
+        (Levenberg-Marquardt) iterations.
+
+        Parameters
+        ----------
+        xdata : list-like
+            array of x-data of shape (n,)
+        ydata : list-like
+            array of y-data of shape (m, n), where each row is one profile
+        period : float
+            Initial estimate of the period shared by all profiles.
+        maxiter : int, default 100
+            Maximum number of refinement iterations.
+        tol : float, default 1.49012e-8
+            Relative tolerance of the parameter update and of the decrease of the sum of squared residuals at which the
+            refinement of a profile is terminated.
+
+        Returns
+        -------
+        list[Sinusoid]
+        """
+        xdata = np.asarray(xdata, dtype=np.float64)
+        ydata = np.atleast_2d(np.asarray(ydata, dtype=np.float64))
+        nprofiles = ydata.shape[0]
+        # The model is parametrized as y = A * sin(w * x) + B * cos(w * x) + C, which is linear in A, B and C
+        w0 = 2 * np.pi / period
+        basis = np.column_stack([np.sin(w0 * xdata), np.cos(w0 * xdata), np.ones_like(xdata)])
+        coefficients, *_ = np.linalg.lstsq(basis, ydata.T, rcond=None)
+        params = np.column_stack([coefficients.T, np.full(nprofiles, w0)])
+
+        def evaluate(params, ydata):
+            A, B, C, w = (params[:, [i]] for i in range(4))
+            sin, cos = np.sin(w * xdata), np.cos(w * xdata)
+            residuals = ydata - (A * sin + B * cos + C)
+            return residuals, sin, cos, np.einsum('ij,ij->i', residuals, residuals)
+
+        residuals, sin, cos, cost = evaluate(params, ydata)
+        damping = np.full(nprofiles, 1e-3)
+        active = np.arange(nprofiles)
+        diag = np.arange(4)
+        for _ in range(maxiter):
+            if active.size == 0:
+                break
+            A, B = params[active, 0:1], params[active, 1:2]
+            jacobian = np.stack([sin[active], cos[active], np.ones_like(sin[active]),
+                                 xdata * (A * cos[active] - B * sin[active])], axis=-1)
+            jtj = np.matmul(jacobian.transpose(0, 2, 1), jacobian)
+            gradient = np.matmul(jacobian.transpose(0, 2, 1), residuals[active, :, np.newaxis])[..., 0]
+            damped = jtj.copy()
+            damped[:, diag, diag] *= 1 + damping[active, np.newaxis]
+            try:
+                step = np.linalg.solve(damped, gradient[..., np.newaxis])[..., 0]
+            except np.linalg.LinAlgError:
+                raise FittingError('Sinusoid fitting was unsuccessful.') from None
+            trial = params[active] + step
+            trial_residuals, trial_sin, trial_cos, trial_cost = evaluate(trial, ydata[active])
+            accept = trial_cost < cost[active]
+            decrease = np.where(accept, cost[active] - trial_cost, np.inf)
+            accepted = active[accept]
+            params[accepted] = trial[accept]
+            residuals[accepted] = trial_residuals[accept]
+            sin[accepted] = trial_sin[accept]
+            cos[accepted] = trial_cos[accept]
+            cost[accepted] = trial_cost[accept]
+            damping[active] = np.where(accept, damping[active] / 10, damping[active] * 10)
+            # A profile is converged once the parameter update becomes negligible or no further decrease of the
+            # residuals can be achieved
+            converged = (np.all(np.abs(step) <= tol * (np.abs(trial) + tol), axis=1) |
+                         (decrease <= tol * trial_cost) | (damping[active] > 1e16))
+            active = active[~converged]
+
+        if not np.all(np.isfinite(params)):
+            raise FittingError('Sinusoid fitting was unsuccessful.')
+        A, B, C, w = params.T
+        # Convert to the parametrization a * sin((x - x0) / p * 2 * pi) + y0 with positive amplitude
+        p = 2 * np.pi / w
+        x0 = np.arctan2(-B, A) / w
+        a = np.hypot(A, B)
+        return [cls(*args) for args in zip(a, p, x0, C)]
+
     def __call__(self, x):
         """
         Computes the value of a generic sinusoid at position x.
@@ -0,0 +1,244 @@
+import numpy as np
+import scipy.ndimage as ndimage
+
+# Parameters which can be evaluated over a moving window
+MAP_PARAMETERS = ('Sa', 'Sq', 'Sp', 'Sv', 'Sz', 'Ssk', 'Sku', 'Sdr', 'Sdq')
+
+
+def _window_sums(array, window_y, window_x, starts_y, starts_x):
+    """
+    Computes the sums of an array over rectangular windows using separable summed-area tables. The table is first
+    accumulated along the rows and then along the columns of the row sums, which limits the magnitude of the
+    accumulated values and therefore the cancellation error compared to a two-dimensional summed-area table. The
+    computational cost is independent of the window size.
+
+    Parameters
+    ----------
+    array : ndarray
+        Two-dimensional array.
+    window_y : int
+        Number of rows of a window.
+    window_x : int
+        Number of columns of a window.
+    starts_y : ndarray[int]
+        Row indices of the upper left corners of the windows.
+    starts_x : ndarray[int]
+        Column indices of the upper left corners of the windows.
+
+    Returns
+    -------
+    ndarray
+        Window sums of shape (starts_y.size, starts_x.size).
+    """
+    table = np.zeros((array.shape[0], array.shape[1] + 1))
+    np.cumsum(array, axis=1, out=table[:, 1:])
+    row_sums = table[:, starts_x + window_x] - table[:, starts_x]
+    table = np.zeros((array.shape[0] + 1, starts_x.size))
+    np.cumsum(row_sums, axis=0, out=table[1:])
+    return table[starts_y + window_y] - table[starts_y]
+
+
+def _combine_moments(a, b):
+    """
+    Combines the moment statistics of two disjoint sets of values into the statistics of their union using the
+    numerically stable pairwise update of Chan et al., which does not require a common reference value.
+
+    Parameters
+    ----------
+    a, b : tuple
+        Moment statistics (n, mean, M2[, M3[, M4]]) of the two sets, where n is the number of values and Mk is the sum
+        of the k-th powers of the deviations from the mean. The elements can be arrays of broadcastable shapes. Both
+        tuples must contain the same number of moments.
+
+    Returns
+    -------
+    tuple
+        Moment statistics of the union with the same number of moments as the arguments.
+    """
+    n_a, mean_a, m2_a, *higher_a = a
+    n_b, mean_b, m2_b, *higher_b = b
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    delta_n = delta / n
+    product = n_a * n_b
+    mean = mean_a + n_b * delta_n
+    # Shared term delta^2 * n_a * n_b / n of all central moments
+    term = delta * delta_n * product
+    m2 = m2_a + m2_b + term
+    if not higher_a:
+        return n, mean, m2
+    m3_a, *m4_a = higher_a
+    m3_b, *m4_b = higher_b
+    m3 = m3_a + m3_b + term * (delta_n * (n_a - n_b)) + (3 * delta_n) * (n_a * m2_b - n_b * m2_a)
+    if not m4_a:
+        return n, mean, m2, m3
+    delta_n2 = delta_n * delta_n
+    m4 = (m4_a[0] + m4_b[0] + term * (delta_n2 * (n_a ** 2 - product + n_b ** 2))
+          + (6 * delta_n2) * (n_a ** 2 * m2_b + n_b ** 2 * m2_a) + (4 * delta_n) * (n_a * m3_b - n_b * m3_a))
+    return n, mean, m2, m3, m4
+
+
+def _window_moments(moments, window, starts):
+    """
+    Computes the moment statistics over windows along the first axis. The axis is divided into blocks of the window
+    size, and the statistics of all prefixes and suffixes within each block are accumulated with pairwise updates. Each
+    window consists of a suffix of one block and a prefix of the next block, such that its statistics are obtained from
+    a single update. In contrast to summed-area tables of the raw moments, no differences of large sums are formed,
+    which avoids the cancellation error for windows whose mean deviates strongly from the rest of the data. The
+    computational cost is independent of the window size.
+
+    Parameters
+    ----------
+    moments : tuple
+        Moment statistics (n, mean, M2[, M3[, M4]]) of each element along the first axis, see _combine_moments. n is
+        a scalar that is identical for all elements.
+    window : int
+        Number of elements of a window.
+    starts : ndarray[int]
+        Indices of the first elements of the windows.
+
+    Returns
+    -------
+    tuple
+        Moment statistics of the windows, whose first axis corresponds to starts.
+    """
+    count, *arrays = moments
+    length = arrays[0].shape[0]
+    blocks = -(-length // window)
+    # The padded elements are never part of a window, since a window ends at most at the end of the data
+    padding = [(0, blocks * window - length)] + [(0, 0)] * (arrays[0].ndim - 1)
+    blocked = [np.pad(array, padding).reshape(blocks, window, *array.shape[1:]) for array in arrays]
+    prefix = [np.empty_like(array) for array in blocked]
+    suffix = [np.empty_like(array) for array in blocked]
+    for array, element in zip(prefix, blocked):
+        array[:, 0] = element[:, 0]
+    for array, element in zip(suffix, blocked):
+        array[:, -1] = element[:, -1]
+    for k in range(1, window):
+        element = (count, *(array[:, k] for array in blocked))
+        _, *updated = _combine_moments((k * count, *(array[:, k - 1] for array in prefix)), element)
+        for array, value in zip(prefix, updated):
+            array[:, k] = value
+        j = window - 1 - k
+        element = (count, *(array[:, j] for array in blocked))
+        _, *updated = _combine_moments(element, (k * count, *(array[:, j + 1] for array in suffix)))
+        for array, value in zip(suffix, updated):
+            array[:, j] = value
+    ends = starts + window - 1
+    offsets = (starts % window).reshape(-1, *[1] * (arrays[0].ndim - 1))
+    head = ((window - offsets) * count, *(array[starts // window, starts % window] for array in suffix))
+    tail = (offsets * count, *(array[ends // window, ends % window] for array in prefix))
+    combined = _combine_moments(head, tail)
+    # Windows that coincide with a block consist of the suffix only
+    aligned = offsets == 0
+    return (window * count, *(np.where(aligned, h, c) for h, c in zip(head[1:], combined[1:])))
+
+
+def parameter_map(data, step_x, step_y, parameters, window_x, window_y, stride_x, stride_y):
+    """
+    Computes roughness parameters over a moving rectangular window. The parameter values of each window are identical
+    to the values obtained by evaluating the window as a separate Surface object, except for floating point deviations.
+
+    The central moments required for Sq, Ssk and Sku are accumulated over each window with numerically stable pairwise
+    updates in blocks of the window size, see _window_moments. The squared gradients required for Sdq and the area
+    elements required for Sdr are summed over each window using summed-area tables. Sp, Sv and Sz are computed with
+    running maximum and minimum filters. All of these cost O(N) regardless of the window size. Sa is the only
+    exception, since the absolute deviation from the mean of each window cannot be accumulated independently of the
+    mean. It is evaluated directly on the window data, which costs O(N * window size) in case of overlapping windows.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data.
+    step_x : float
+        Lateral step along the x-axis in µm.
+    step_y : float
+        Lateral step along the y-axis in µm.
+    parameters : list-like[str]
+        Parameters to compute. Must be a subset of MAP_PARAMETERS.
+    window_x : int
+        Number of points of a window along the x-axis.
+    window_y : int
+        Number of points of a window along the y-axis.
+    stride_x : int
+        Distance between the windows along the x-axis in points.
+    stride_y : int
+        Distance between the windows along the y-axis in points.
+
+    Returns
+    -------
+    dict[str: ndarray]
+        Dictionary of the parameter maps. The element (i, j) of a map corresponds to the window with the upper left
+        corner at the point (i * stride_y, j * stride_x).
+    """
+    if unsupported := set(parameters) - set(MAP_PARAMETERS):
+        raise ValueError(f'Parameters {", ".join(sorted(unsupported))} are not supported. '
+                         f'Supported parameters are {", ".join(MAP_PARAMETERS)}.')
+    ny, nx = data.shape
+    if not (2 < window_x <= nx and 2 < window_y <= ny):
+        raise ValueError('The window must be larger than 2 points and cannot exceed the size of the surface.')
+    if stride_x < 1 or stride_y < 1:
+        raise ValueError('The stride must be at least one point.')
+    starts_y = np.arange(0, ny - window_y + 1, stride_y)
+    starts_x = np.arange(0, nx - window_x + 1, stride_x)
+    size = window_y * window_x
+    sums = lambda array, wy=window_y, wx=window_x: _window_sums(array, wy, wx, starts_y, starts_x)
+    requested = set(parameters)
+    results = {}
+
+    if requested & {'Sa', 'Sp', 'Sv', 'Sz'}:
+        # Centering around the global mean reduces the rounding error of the summed-area table
+        offset = data.mean()
+        centered = data - offset
+        mean = sums(centered) / size
+
+    if requested & {'Sq', 'Ssk', 'Sku'}:
+        # Moments of the rows of each window along the x-axis, followed by the moments of the windows along the y-axis
+        # Only the moments up to the highest required order are accumulated
+        order = 4 if 'Sku' in requested else 3 if 'Ssk' in requested else 2
+        zeros = np.zeros_like(data.T)
+        moments = _window_moments((1, data.T) + (zeros,) * (order - 1), window_x, starts_x)
+        moments = _window_moments(tuple(array.T if np.ndim(array) else array for array in moments), window_y,
+                                  starts_y)
+        m2 = moments[2] / size
+        results['Sq'] = np.sqrt(m2)
+        if 'Ssk' in requested:
+            results['Ssk'] = moments[3] / size / m2 ** 1.5
+        if 'Sku' in requested:
+            results['Sku'] = moments[4] / size / m2 ** 2
+
+    if requested & {'Sp', 'Sv', 'Sz'}:
+        # The filters are anchored at the upper left corner of the window
+        origin = (-(window_y // 2), -(window_x // 2))
+        grid = np.ix_(starts_y, starts_x)
+        maximum = ndimage.maximum_filter(centered, size=(window_y, window_x), origin=origin)[grid]
+        minimum = ndimage.minimum_filter(centered, size=(window_y, window_x), origin=origin)[grid]
+        results['Sp'] = maximum - mean
+        results['Sv'] = np.abs(minimum - mean)
+        results['Sz'] = results['Sp'] + results['Sv']
+
+    if 'Sa' in requested:
+        # The absolute deviations depend on the mean of each window and cannot be accumulated in summed-area tables
+        sa = np.empty((starts_y.size, starts_x.size))
+        for i, start in enumerate(starts_y):
+            windows = np.lib.stride_tricks.sliding_window_view(centered[start:start + window_y], window_x, axis=1)
+            sa[i] = np.abs(windows[:, starts_x] - mean[i, np.newaxis, :, np.newaxis]).mean(axis=(0, 2))
+        results['Sa'] = sa
+
+    if 'Sdq' in requested:
+        # Same definition as Surface.Sdq applied to each window
+        diff_x = (np.diff(data, axis=1) / step_x) ** 2
+        diff_y = (np.diff(data, axis=0) / step_y) ** 2
+        gradient_sum = sums(diff_x, wx=window_x - 1) + sums(diff_y, wy=window_y - 1)
+        results['Sdq'] = np.sqrt(gradient_sum / size)
+
+    if 'Sdr' in requested:
+        # Same definition as Surface.surface_area and Surface.projected_area applied to each window
+        dz_y = np.diff(data, axis=0)[:, :-1]
+        dz_x = np.diff(data, axis=1)[:-1, :]
+        areas = 0.5 * np.sqrt((step_y * dz_y) ** 2 + (step_x * dz_x) ** 2 + (step_x * step_y) ** 2)
+        surface_area = 2 * sums(areas, wy=window_y - 1, wx=window_x - 1)
+        projected_area = ((window_x - 2) * step_x) * ((window_y - 2) * step_y)
+        results['Sdr'] = (surface_area / projected_area - 1) * 100
+
+    return {parameter: results[parameter] for parameter in parameters}
@@ -0,0 +1,158 @@
+import numpy as np
+import scipy.fft
+
+from .cache import CachedInstance, cache
+
+
+class Spectrum(CachedInstance):
+    """
+    Represents the 2d Fourier transform of the mean-subtracted height data of a Surface object. The transform is
+    computed once using a real-input FFT and shared by all methods that operate on the spectrum, such as the period and
+    orientation estimation, the autocorrelation function and the plotting of the Fourier transform.
+
+    Parameters
+    ----------
+    surface : Surface
+        Surface object of which to compute the spectrum.
+    """
+    def __init__(self, surface):
+        if surface.has_missing_points:
+            raise ValueError("Missing points must be filled before the spectrum can be computed.")
+        super().__init__()
+        self._surface = surface
+        data = surface.data - surface.data.mean()
+        self.shape = data.shape
+        # Only the non-negative frequencies along the last axis are stored, since the spectrum of real input is
+        # Hermitian symmetric
+        self.data = scipy.fft.rfft2(data)
+
+    @cache
+    def power_spectrum(self):
+        """
+        Returns the power spectrum for the non-negative frequencies along the x-axis.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        return self.data.real ** 2 + self.data.imag ** 2
+
+    @cache
+    def magnitude(self, shifted=True):
+        """
+        Returns the magnitude of the full two-sided spectrum, which is reconstructed from the one-sided spectrum using
+        the Hermitian symmetry of real input.
+
+        Parameters
+        ----------
+        shifted : bool, default True
+            If True, the zero frequency is shifted to the center of the array.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        N, M = self.shape
+        half = np.abs(self.data)
+        magnitude = np.empty(self.shape)
+        ncols = half.shape[1]
+        magnitude[:, :ncols] = half
+        # The negative frequencies are the complex conjugate of the positive frequencies mirrored at the origin
+        cols = np.arange(ncols, M)
+        magnitude[:, ncols:] = half[(-np.arange(N)) % N][:, M - cols]
+        if shifted:
+            magnitude = np.fft.fftshift(magnitude)
+        return magnitude
+
+    @cache
+    def frequencies(self, shifted=True):
+        """
+        Returns the spatial frequencies along the x- and y-axes in 1/µm.
+
+        Parameters
+        ----------
+        shifted : bool, default True
+            If True, the frequencies are ordered from negative to positive values, corresponding to the shifted
+            magnitude spectrum.
+
+        Returns
+        -------
+        freq_x, freq_y : tuple[np.ndarray, np.ndarray]
+        """
+        N, M = self.shape
+        freq_x = np.fft.fftfreq(M, d=self._surface.width_um / M)
+        freq_y = np.fft.fftfreq(N, d=self._surface.height_um / N)
+        if shifted:
+            return np.fft.fftshift(freq_x), np.fft.fftshift(freq_y)
+        return freq_x, freq_y
+
+    @cache
+    def autocorrelation(self):
+        """
+        Computes the circular autocorrelation function from the power spectrum, with the zero lag at the center of the
+        array.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        N, M = self.shape
+        return np.fft.fftshift(scipy.fft.irfft2(self.power_spectrum(), s=self.shape) / (N * M))
+
+    def _magnitude_at(self, row, col):
+        """
+        Returns the magnitude of the two-sided spectrum at the unshifted indices (row, col), which are mapped to the
+        stored one-sided spectrum using the Hermitian symmetry of real input.
+        """
+        N, M = self.shape
+        row, col = row % N, col % M
+        if col >= self.data.shape[1]:
+            row, col = (-row) % N, M - col
+        return np.abs(self.data[row, col])
+
+    @staticmethod
+    def _interpolate_peak(left, center, right):
+        """
+        Estimates the sub-bin offset of a peak from the magnitudes of the peak bin and its two neighbours by fitting a
+        Gaussian, i.e. a parabola to the logarithm of the magnitudes. If any of the magnitudes is zero, a parabola is
+        fitted to the magnitudes directly. The offset is in units of bins and limited to the interval [-0.5, 0.5].
+        """
+        if left > 0 and center > 0 and right > 0:
+            left, center, right = np.log(left), np.log(center), np.log(right)
+        denominator = left - 2 * center + right
+        if denominator == 0:
+            return 0.0
+        return float(np.clip(0.5 * (left - right) / denominator, -0.5, 0.5))
+
+    @cache
+    def peak(self, refine=False):
+        """
+        Returns the spatial frequency of the largest peak of the spectrum. Since the spectrum of real input is
+        Hermitian symmetric, the peak at (fx, fy) is always accompanied by a peak of the same magnitude at (-fx, -fy).
+        Therefore, only the stored half-plane of non-negative x-frequencies is searched.
+
+        Parameters
+        ----------
+        refine : bool, default False
+            If True, the position of the peak is refined to sub-bin resolution by Gaussian interpolation of the peak
+            bin and its neighbours along each axis. Otherwise, the frequency of the peak bin is returned.
+
+        Returns
+        -------
+        fx, fy : tuple[float, float]
+            Spatial frequencies of the peak in x and y in 1/µm.
+        """
+        freq_x, freq_y = self.frequencies(shifted=False)
+        magnitude = np.abs(self.data)
+        row, col = np.unravel_index(np.argmax(magnitude), magnitude.shape)
+        fx = col * freq_x[1]
+        fy = freq_y[row]
+        if refine:
+            center = magnitude[row, col]
+            fx += self._interpolate_peak(
+                self._magnitude_at(row, col - 1), center, self._magnitude_at(row, col + 1)
+            ) * freq_x[1]
+            fy += self._interpolate_peak(
+                self._magnitude_at(row - 1, col), center, self._magnitude_at(row + 1, col)
+            ) * freq_y[1]
+        return float(fx), float(fy)
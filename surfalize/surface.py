@@ -16,7 +16,6 @@ import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from scipy.linalg import lstsq
-from scipy.interpolate import griddata
 from scipy.signal import find_peaks
 from scipy.optimize import curve_fit
 import scipy.ndimage as ndimage
@@ -24,13 +23,19 @@ from sklearn.cluster import KMeans
 
 # Custom imports
 from .file import FileHandler
+from .file.common import LazyArray
 from .utils import is_list_like, approximately_equal
 from .cache import CachedInstance, cache
-from .mathutils import Sinusoid, argclosest, trapezoid
+from .mathutils import Sinusoid, argclosest, trapezoid, central_moments, gradient_sums, polynomial_trend
 from .autocorrelation import AutocorrelationFunction
+from .spectrum import Spectrum
+from .unitcells import UnitCells
+from .parametermap import parameter_map
+from .evaluation import EvaluationPlan
+from .inpainting import inpaint
 from .abbottfirestone import AbbottFirestoneCurve
 from .profile import Profile
-from .filter import GaussianFilter
+from .filter import GaussianFilter, RobustGaussianFilter, FilterBank, bandpass
 from .image import Image
 
 
@@ -167,6 +172,12 @@ class Surface(CachedInstance):
     step_y : float
         Interval between two datapoints in y-axis (vertical axis, first array dimension)
 
+    Attributes
+    ----------
+    read_timings : dict[str: float]
+        Durations in seconds of the format detection ('detection') and of reading the file ('read') for surfaces
+        loaded with Surface.load or Surface.open. Empty for surfaces that were not read from a file.
+
     Examples
     --------
     Constructing a surface from a 2d array.
@@ -203,6 +214,7 @@ class Surface(CachedInstance):
 
         self.metadata = metadata if metadata is not None else {}
         self.image_layers = image_layers if image_layers is not None else {}
+        self.read_timings = {}
 
         self.width_um = (height_data.shape[1] - 1) * step_x
         self.height_um = (height_data.shape[0] - 1) * step_y
@@ -210,6 +222,24 @@ class Surface(CachedInstance):
     def __repr__(self):
         return f'{self.__class__.__name__}({self.width_um:.2f} x {self.height_um:.2f} µm²)'
 
+    @property
+    def data(self):
+        """
+        Returns the height data of the surface. Surfaces loaded from uncompressed binary files defer reading and
+        scaling the height data from the memory-mapped file until the data is accessed for the first time.
+
+        Returns
+        -------
+        ndarray
+        """
+        if isinstance(self._data, LazyArray):
+            self._data = self._data.materialize()
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+
     @property
     def size(self):
         """
@@ -231,7 +261,7 @@ class Surface(CachedInstance):
         >>> surface.size.y
         768
         """
-        return size(*self.data.shape)
+        return size(*self._data.shape)
             
     def _set_data(self, data=None, step_x=None, step_y=None):
         """
@@ -350,9 +380,10 @@ class Surface(CachedInstance):
         return np.any(np.isnan(self.data))
 
     @classmethod
-    def load(cls, path_or_buffer, format=None, encoding='utf-8', read_image_layers=False):
+    def load(cls, path_or_buffer, format=None, encoding='utf-8', read_image_layers=False, roi=None):
         """
-        Classmethod to load a topography from a file.
+        Classmethod to load a topography from a file. The height data is read into memory before the surface is
+        returned. To defer reading the height data until it is accessed, use Surface.open.
 
         Parameters
         ----------
@@ -368,14 +399,79 @@ class Surface(CachedInstance):
             'utf-8'.
         read_image_layers : bool, Default False
             If true, reads all available image layers in the file and saves them in Surface.image_layers dict
+        roi : tuple[int, int, int, int] | None, default None
+            Region of interest as a (x0, x1, y0, y1) tuple of pixel indices, where the last row and column are
+            included. If specified, the surface is cropped to the region as in Surface.crop with in_units=False. For
+            formats whose height data is memory-mapped, i.e. uncompressed .sur, .plu, .al3d, .os3d, .zmg and binary
+            .sdf files, only the region of interest is read from the file.
+
+        Returns
+        -------
+        surface : surfalize.Surface
+        """
+        raw_surface = FileHandler(path_or_buffer, format_=format).read(encoding=encoding,
+                                                                      read_image_layers=read_image_layers, roi=roi)
+        surface = cls.from_raw_surface(raw_surface)
+        # Memory-mapped height data is read before returning, such that the file can be modified or deleted afterwards
+        surface.data
+        return surface
+
+    @classmethod
+    def open(cls, path_or_buffer, lazy=True, format=None, encoding='utf-8', read_image_layers=False, roi=None):
+        """
+        Classmethod to open a topography from a file. In contrast to Surface.load, the height data is not read by
+        default until it is accessed for the first time. The metadata, size and lateral steps of the surface are
+        available directly after opening, which allows to select files by their metadata without decoding the height
+        data.
+
+        Lazy loading is supported for files on disk whose format stores the height data uncompressed, in which case
+        the data is memory-mapped, and for formats whose reader is registered with lazy=True. For other formats and
+        for buffers, the height data is read immediately. The file must not be modified or deleted before the height
+        data is accessed.
+
+        Parameters
+        ----------
+        path_or_buffer : str | pathlib.Path | buffer
+            Filepath pointing to the topography file or buffer.
+        lazy : bool, default True
+            If True, defers reading the height data until it is accessed. If False, the height data is read
+            immediately.
+        format : str | None
+            File format in which file should be read. If the file is provided as a path and does not contain a suffix,
+            the format must be specified here. If both a suffix and format are given, the format overrides the suffix.
+            If the surface is read from a buffer, the format value must be specified.
+        encoding : str, Default utf-8
+            Encoding of characters in the file. If set to 'auto', the encoding is inferred automatically. For file
+            formats with fixed encoding (such as ASCII formats), this parameter has no effect. The default value is
+            'utf-8'.
+        read_image_layers : bool, Default False
+            If true, reads all available image layers in the file and saves them in Surface.image_layers dict. Image
+            layers are always read immediately.
+        roi : tuple[int, int, int, int] | None, default None
+            Region of interest as a (x0, x1, y0, y1) tuple of pixel indices, where the last row and column are
+            included. If specified, the surface is cropped to the region as in Surface.crop with in_units=False. For
+            formats whose height data is memory-mapped, i.e. uncompressed .sur, .plu, .al3d, .os3d, .zmg and binary
+            .sdf files, only the region of interest is read from the file.
 
         Returns
         -------
         surface : surfalize.Surface
+
+        Examples
+        --------
+        >>> surface = Surface.open('topography.sur')
+        >>> surface.size
+        Size(y=768, x=1024)
+        >>> surface.Sa()  # The height data is read here
+        1.23
         """
         raw_surface = FileHandler(path_or_buffer, format_=format).read(encoding=encoding,
-                                                                      read_image_layers=read_image_layers)
-        return cls.from_raw_surface(raw_surface)
+                                                                      read_image_layers=read_image_layers, lazy=lazy,
+                                                                      roi=roi)
+        surface = cls.from_raw_surface(raw_surface)
+        if not lazy:
+            surface.data
+        return surface
 
     @classmethod
     def from_raw_surface(cls, raw_surface):
@@ -392,8 +488,10 @@ class Surface(CachedInstance):
         surfalize.Surface
         """
         image_layers = {k: Image(v) for k, v in raw_surface.image_layers.items()}
-        return cls(raw_surface.data, raw_surface.step_x, raw_surface.step_y, metadata=raw_surface.metadata,
-                   image_layers=image_layers)
+        surface = cls(raw_surface.data, raw_surface.step_x, raw_surface.step_y, metadata=raw_surface.metadata,
+                      image_layers=image_layers)
+        surface.read_timings = dict(raw_surface.timings)
+        return surface
 
     def save(self, path_or_buffer, format=None, encoding='utf-8', **kwargs):
         """
@@ -425,6 +523,9 @@ class Surface(CachedInstance):
         -------
         None
         """
+        # The height data must be read before the file is opened for writing, since it might be memory-mapped from the
+        # same file
+        self.data
         FileHandler(path_or_buffer, format_=format).write(self, encoding=encoding, **kwargs)
 
     def get_image_layer_names(self):
@@ -764,12 +865,21 @@ class Surface(CachedInstance):
     @batch_method('operation')
     def fill_nonmeasured(self, method='nearest', inplace=False):
         """
-        Fills the non-measured points by interpolation.
+        Fills the non-measured points by interpolation. The computational cost of all methods scales with the number of
+        non-measured points and the size of the holes rather than the size of the surface.
 
         Parameters
         ----------
-        method : {‘linear’, ‘nearest’, ‘cubic’}, default 'nearest'
-            Method by which to perform the interpolation. See scipy.interpolate.griddata for details.
+        method : {'nearest', 'linear', 'cubic', 'harmonic', 'biharmonic'}, default 'nearest'
+            Method by which to perform the interpolation.
+
+            - 'nearest': Value of the nearest measured point, determined by a Euclidean distance transform.
+            - 'linear', 'cubic': Piecewise linear or cubic interpolation from the measured points surrounding the
+              holes. See scipy.interpolate.griddata for details.
+            - 'harmonic', 'biharmonic': Smooth inpainting by solving the Laplace or biharmonic equation with the
+              surrounding measured points as boundary conditions.
+
+            See surfalize.inpainting for details.
         inplace : bool, default False
             If False, create and return new Surface object with processed data. If True, changes data inplace and
             return self.
@@ -781,14 +891,8 @@ class Surface(CachedInstance):
         """
         if not self.has_missing_points:
             return self
-        values = self.data.ravel()
-        mask = ~np.isnan(values)
+        data_interpolated = inpaint(self.data, method=method)
 
-        grid_x, grid_y = np.meshgrid(np.arange(self.size.x), np.arange(self.size.y))
-        points = np.column_stack([grid_x.ravel(), grid_y.ravel()])
-
-        data_interpolated = griddata(points[mask], values[mask], (grid_x, grid_y), method=method)
-        
         if inplace:
             self._set_data(data=data_interpolated)
             return self
@@ -816,7 +920,9 @@ class Surface(CachedInstance):
     @batch_method('operation', fixed={'inplace': True, 'return_trend': False})
     def detrend_polynomial(self, degree=1, inplace=False, return_trend=False):
         """
-        Detrend a 2d array of height data using a polynomial surface, handling NaN values
+        Detrend a 2d array of height data using a polynomial surface, handling NaN values. The polynomial is fitted in
+        a basis of orthonormal polynomials, which is cached per surface size and degree, see
+        mathutils.polynomial_trend.
 
         Parameters
         ----------
@@ -832,41 +938,10 @@ class Surface(CachedInstance):
         -------
         Surface or tuple of Surfaces
         """
-        rows, cols = self.size
-        y, x = np.mgrid[:rows, :cols]
-
-        # Normalize coordinates to [-1, 1] range
-        x = (x - x.mean()) / x.max()
-        y = (y - y.mean()) / y.max()
-
-        x_flat = x.flatten()
-        y_flat = y.flatten()
-        z_flat = self.data.flatten()
-
-        # Create mask for non-NaN values
-        mask = ~np.isnan(z_flat)
-        x_valid = x_flat[mask]
-        y_valid = y_flat[mask]
-        z_valid = z_flat[mask]
-
-        # Create design matrix with cross-terms
-        A = np.ones((len(x_valid), 1))
-        for i in range(1, degree + 1):
-            for j in range(i + 1):
-                A = np.column_stack((A, (x_valid ** (i - j)) * (y_valid ** j)))
-
-        # Fit polynomial using SVD for improved numerical stability
-        coeffs, _, _, _ = np.linalg.lstsq(A, z_valid, rcond=None)
-
-        # Calculate trend for all points
-        A_full = np.ones((len(x_flat), 1))
-        for i in range(1, degree + 1):
-            for j in range(i + 1):
-                A_full = np.column_stack((A_full, (x_flat ** (i - j)) * (y_flat ** j)))
-        trend = np.dot(A_full, coeffs).reshape(self.size)
+        trend = polynomial_trend(self.data, degree)
 
-        # Subtract trend from data, preserving NaN values
-        detrended = np.where(np.isnan(self.data), np.nan, self.data - trend)
+        # NaN values are preserved by the subtraction
+        detrended = self.data - trend
 
         if inplace:
             self._set_data(data=detrended)
@@ -934,7 +1009,8 @@ class Surface(CachedInstance):
 
     @batch_method('operation')
     @no_nonmeasured_points
-    def filter(self, filter_type, cutoff, cutoff2=None, inplace=False, endeffect_mode='reflect'):
+    def filter(self, filter_type, cutoff, cutoff2=None, inplace=False, endeffect_mode='reflect', method='auto',
+               robust=False):
         """
         Filters the surface by applying a Gaussian filter.
 
@@ -966,6 +1042,14 @@ class Surface(CachedInstance):
             The parameter determines how the endeffects of the filter at the boundaries of the data are managed.
             For details, see the documentation of scipy.ndimage.gaussian_filter.
             https://docs.scipy.org/doc/scipy/reference/generated/scipy.ndimage.gaussian_filter.html
+        method : {'auto', 'spatial', 'fft'}, default 'auto'
+            Method by which the filter is applied. 'spatial' convolves the data with the Gaussian kernel, 'fft' applies
+            the ISO 16610-61 transfer function in the frequency domain. 'auto' uses 'fft' for large cutoffs relative to
+            the lateral step. See GaussianFilter for details.
+        robust : bool, default False
+            If True, the robust Gaussian regression filter according to ISO 16610-71 is applied instead of the linear
+            Gaussian filter, which prevents deep valleys, high peaks and outliers from distorting the mean line. See
+            RobustGaussianFilter for details.
 
         Returns
         -------
@@ -984,22 +1068,65 @@ class Surface(CachedInstance):
             if cutoff2 <= cutoff:
                 raise ValueError("The value of cutoff2 must be greater than the value of cutoff.")
 
-            lowpass_filter = GaussianFilter(filter_type='lowpass', cutoff=cutoff, endeffect_mode=endeffect_mode)
-            highpass_filter = GaussianFilter(filter_type='highpass', cutoff=cutoff2, endeffect_mode=endeffect_mode)
-            return highpass_filter(lowpass_filter(self, inplace=inplace), inplace=inplace)
-
+            if robust:
+                highpass_filter = RobustGaussianFilter(cutoff2, 'highpass', endeffect_mode=endeffect_mode,
+                                                       method=method)
+                lowpass_filter = RobustGaussianFilter(cutoff, 'lowpass', endeffect_mode=endeffect_mode, method=method)
+                lowpass = lowpass_filter.lowpass(self.data, self.step_x, self.step_y)
+                data = lowpass - highpass_filter.lowpass(lowpass, self.step_x, self.step_y)
+            else:
+                data = bandpass(self.data, self.step_x, self.step_y, cutoff, cutoff2, endeffect_mode=endeffect_mode,
+                                method=method)
+            if inplace:
+                self._set_data(data=data)
+                return self
+            return Surface(data, self.step_x, self.step_y)
+
+        filter_class = RobustGaussianFilter if robust else GaussianFilter
         if filter_type == 'lowpass':
-            lowpass_filter = GaussianFilter(filter_type='lowpass', cutoff=cutoff, endeffect_mode=endeffect_mode)
+            lowpass_filter = filter_class(filter_type='lowpass', cutoff=cutoff, endeffect_mode=endeffect_mode,
+                                          method=method)
             return lowpass_filter(self, inplace=inplace)
 
         if filter_type == 'highpass':
-            highpass_filter = GaussianFilter(filter_type='highpass', cutoff=cutoff, endeffect_mode=endeffect_mode)
+            highpass_filter = filter_class(filter_type='highpass', cutoff=cutoff, endeffect_mode=endeffect_mode,
+                                           method=method)
             return highpass_filter(self, inplace=inplace)
 
-        # If filter_type == 'both' is only remaining option
-        highpass_filter = GaussianFilter(filter_type='highpass', cutoff=cutoff, endeffect_mode=endeffect_mode)
-        lowpass_filter = GaussianFilter(filter_type='lowpass', cutoff=cutoff, endeffect_mode=endeffect_mode)
-        return highpass_filter(self, inplace=False), lowpass_filter(self, inplace=False)
+        # If filter_type == 'both' is only remaining option. Both surfaces are obtained from a single lowpass filter.
+        if robust:
+            lowpass_filter = RobustGaussianFilter(cutoff, 'lowpass', endeffect_mode=endeffect_mode, method=method)
+            lowpass = lowpass_filter.lowpass(self.data, self.step_x, self.step_y)
+            return Surface(self.data - lowpass, self.step_x, self.step_y), Surface(lowpass, self.step_x, self.step_y)
+        highpass, lowpass = FilterBank([cutoff], endeffect_mode=endeffect_mode, method=method).decompose(self)
+        return highpass, lowpass
+
+    @no_nonmeasured_points
+    def decompose(self, cutoffs, endeffect_mode='reflect', method='auto'):
+        """
+        Decomposes the surface into wavelength bands separated by the specified cutoff wavelengths, e.g. into roughness,
+        waviness and form. All bands are computed from a single shared intermediate, see FilterBank. The sum of the
+        returned surfaces is equal to the original surface.
+
+        Parameters
+        ----------
+        cutoffs : list-like[float]
+            Cutoff wavelengths in µm separating the bands.
+        endeffect_mode : {reflect, constant, nearest, mirror, wrap}, default reflect
+            The parameter determines how the endeffects of the filter at the boundaries of the data are managed.
+        method : {'auto', 'spatial', 'fft'}, default 'auto'
+            Method by which the filters are applied, see GaussianFilter.
+
+        Returns
+        -------
+        list[Surface]
+            Surfaces of the bands in order of increasing wavelength. For n cutoffs, n + 1 surfaces are returned.
+
+        Examples
+        --------
+        >>> roughness, waviness, form = surface.decompose([80, 800])
+        """
+        return FilterBank(cutoffs, endeffect_mode=endeffect_mode, method=method).decompose(self)
 
     @batch_method('operation')
     def zoom(self, factor, inplace=False):
@@ -1091,41 +1218,42 @@ class Surface(CachedInstance):
         return self.rotate(-angle, inplace=inplace)
 
     @cache
-    def _get_fourier_peak_dx_dy(self):
+    def get_spectrum(self):
         """
-        Calculates the distance in x and y in spatial frequency length units. The zero peak is avoided by
-        centering the data around the mean. This method is used by the period and orientation calculation.
+        Instantiates and returns a Spectrum object holding the 2d Fourier transform of the mean-subtracted height data.
+        LRU cache is used to return the same object with every function call, so that the Fourier transform is shared
+        between the period and orientation calculation, the autocorrelation function and plotting.
+
+        Returns
+        -------
+        Spectrum
+        """
+        return Spectrum(self)
+
+    @cache
+    def _get_fourier_peak_dx_dy(self, refine=False):
+        """
+        Calculates the distance in x and y in spatial frequency length units between the two largest peaks of the
+        Fourier transform. The zero peak is avoided by centering the data around the mean. This method is used by the
+        period and orientation calculation.
+
+        Parameters
+        ----------
+        refine : bool, default False
+            If True, the peak position is refined to sub-bin resolution.
 
         Returns
         -------
         (dx, dy) : tuple[float,float]
             Distance between largest Fourier peaks in x (dx) and in y (dy)
         """
-        # Get rid of the zero peak in the DFT for data that features a substantial offset in the z-direction
-        # by centering the values around the mean
-        data = self.data - self.data.mean()
-        fft = np.abs(np.fft.fftshift(np.fft.fft2(data)))
-        N, M = self.size
-        # Calculate the frequency values for the x and y axes
-        freq_x = np.fft.fftshift(np.fft.fftfreq(M, d=self.width_um / M))  # Frequency values for the x-axis
-        freq_y = np.fft.fftshift(np.fft.fftfreq(N, d=self.height_um / N))  # Frequency values for the y-axis
-        # Sort in descending order by computing sorting indices
-        idx_y, idx_x = np.unravel_index(np.argsort(fft.flatten())[::-1], fft.shape)
-        # Transform into spatial frequencies in length units
-        # If this is not done, the computed angle will be wrong since the frequency per pixel
-        # resolution is different in x and y due to the different sampling length!
-        peaks_x = freq_x[idx_x]
-        peaks_y = freq_y[idx_y]
-        # Create peak tuples for ease of use
-        peak0 = (peaks_x[0], peaks_y[0])
-        peak1 = (peaks_x[1], peaks_y[1])
-        # Peak1 should always be to the right of peak0
-        if peak0[0] > peak1[0]:
-            peak0, peak1 = peak1, peak0
-
-        dx = peak1[0] - peak0[0]
-        dy = peak0[1] - peak1[1]
-
+        # The spectrum of real input is Hermitian symmetric, so the two largest peaks are located at (fx, fy) and
+        # (-fx, -fy). The frequencies are in length units. If this is not done, the computed angle will be wrong since
+        # the frequency per pixel resolution is different in x and y due to the different sampling length!
+        fx, fy = self.get_spectrum().peak(refine=refine)
+        dx = 2 * abs(fx)
+        # The distance in y is measured from the left to the right peak
+        dy = -2 * fy if fx >= 0 else 2 * fy
         return dx, dy
 
     # Stepheight #######################################################################################################
@@ -1247,29 +1375,27 @@ class Surface(CachedInstance):
     # Height parameters ################################################################################################
 
     @cache
-    @no_nonmeasured_points
     def height_parameters(self):
         """
         Calculates the roughness parameters from the height parameter family.
-        Returns a dictionary of the height parameters.
+        Returns a dictionary of the height parameters. Non-measured points are excluded from the evaluation.
 
         Returns
         -------
         dict[str: float]
         """
-        mean = self.data.mean()
-        centered_data = self.data - mean
-        abs_centered_data = np.abs(centered_data)
-        centered_data_sq = abs_centered_data ** 2
-
-        size = self.data.size
-        sa = np.sum(abs_centered_data) / size
-        sq = np.sqrt(np.sum(centered_data_sq) / size)
-        sv = np.abs(centered_data.min())
-        sp = centered_data.max()
+        data = self.data
+        if self.has_missing_points:
+            data = data[~np.isnan(data)]
+        # The moments are accumulated blockwise to avoid allocating multiple full-size temporaries
+        mean, m1, m2, m3, m4 = central_moments(data)
+        sa = m1
+        sq = np.sqrt(m2)
+        sv = np.abs(data.min() - mean)
+        sp = data.max() - mean
         sz = sp + sv
-        ssk = np.sum(centered_data_sq * centered_data) / size / sq ** 3
-        sku = np.sum(centered_data_sq ** 2) / size / sq ** 4
+        ssk = m3 / sq ** 3
+        sku = m4 / sq ** 4
         return {'Sa': sa, 'Sq': sq, 'Sv': sv, 'Sp': sp, 'Sz': sz, 'Ssk': ssk, 'Sku': sku}
 
     @batch_method('parameter')
@@ -1352,6 +1478,19 @@ class Surface(CachedInstance):
         return self.height_parameters()['Sku']
     
     # Hybrid parameters ################################################################################################
+    @cache
+    def _gradient_sums(self):
+        """
+        Computes the surface area and the sum of the squared local gradients in a single blocked pass over the data,
+        which is shared by the surface area, Sdr and Sdq. Quads and differences involving non-measured points are
+        excluded and the sums are extrapolated to the full surface, see mathutils.gradient_sums.
+
+        Returns
+        -------
+        area, gradient : tuple[float, float]
+        """
+        return gradient_sums(self.data, self.step_x, self.step_y)
+
     @batch_method('parameter')
     @cache
     def projected_area(self):
@@ -1365,33 +1504,18 @@ class Surface(CachedInstance):
         return (self.width_um - self.step_x) * (self.height_um - self.step_y)
 
     @batch_method('parameter')
-    @no_nonmeasured_points
     @cache
     def surface_area(self):
         """
         Calculates the surface area of the surface according to the method proposed by ISO 25178 and used by
-        MountainsMap, whereby two triangles are spanned between four corner points.
+        MountainsMap, whereby two triangles are spanned between four corner points. If the surface contains
+        non-measured points, the area of the measured quads is extrapolated to the full projected area.
 
         Returns
         -------
         area : float
         """
-        # Calculate differences
-        dz_y = np.diff(self.data, axis=0)
-        dz_x = np.diff(self.data, axis=1)
-
-        # Calculate cross products
-        cross_x = self.step_y * dz_y[:, :-1]
-        cross_y = self.step_x * dz_x[:-1, :]
-        cross_z = self.step_x * self.step_y
-
-        # Calculate areas using vectorized operations
-        areas = 0.5 * np.sqrt(cross_x ** 2 + cross_y ** 2 + cross_z ** 2)
-
-        # Sum up all areas
-        total_area = 2 * np.sum(areas)  # Multiply by 2 for both triangles in each quad
-
-        return total_area
+        return self._gradient_sums()[0]
 
     @batch_method('parameter')
     def Sdr(self):
@@ -1405,34 +1529,41 @@ class Surface(CachedInstance):
         return (self.surface_area() / self.projected_area() -1) * 100
 
     @batch_method('parameter')
-    @no_nonmeasured_points
     @cache
     def Sdq(self):
         """
-        Calculates the root mean square gradient Sdq according to ISO 25178-2.
+        Calculates the root mean square gradient Sdq according to ISO 25178-2. Gradients involving non-measured points
+        are excluded.
 
         Returns
         -------
         Sdq : float
         """
         A = self.size.y * self.size.x
-        diff_x = np.diff(self.data, axis=1) / self.step_x
-        diff_y = np.diff(self.data, axis=0) / self.step_y
-        return np.sqrt((np.sum(diff_x**2) + np.sum(diff_y**2)) / A)
+        return np.sqrt(self._gradient_sums()[1] / A)
 
     # Spatial parameters ###############################################################################################
     @batch_method('parameter')
     @cache
-    def get_autocorrelation_function(self):
+    def get_autocorrelation_function(self, padded=False, workers=None, dtype=np.float64):
         """
         Instantiates and returns an AutocorrelationFunction object. LRU cache is used to return the same object with
-        every function call.
+        every function call. Sal and Str are computed from the autocorrelation function with the default arguments.
+
+        Parameters
+        ----------
+        padded : bool, default False
+            If True, computes the linear instead of the circular autocorrelation function by zero-padding the data.
+        workers : int | None, default None
+            Number of workers used by scipy.fft.
+        dtype : np.float64 | np.float32, default np.float64
+            Floating point precision of the computation.
 
         Returns
         -------
         AutocorrelationFunction
         """
-        return AutocorrelationFunction(self)
+        return AutocorrelationFunction(self, padded=padded, workers=workers, dtype=dtype)
 
     @batch_method('parameter')
     @cache
@@ -1485,16 +1616,26 @@ class Surface(CachedInstance):
 
     @batch_method('parameter')
     @cache
-    def get_abbott_firestone_curve(self):
+    def get_abbott_firestone_curve(self, nbins=10000, method='histogram'):
         """
         Instantiates and returns an AbbottFirestoneCurve object. LRU cache is used to return the same object with
-        every function call.
+        every function call. The functional parameters of the Surface class are computed from the curve with the
+        default arguments. To compute them with a different method, call them on the curve object directly, e.g.
+        surface.get_abbott_firestone_curve(method='exact').Sk().
+
+        Parameters
+        ----------
+        nbins : int, default 10000
+            Number of bins of the material density histogram or number of material ratio intervals for the methods
+            'exact' and 'sketch'.
+        method : {'histogram', 'exact', 'sketch'}, default 'histogram'
+            Method by which the material ratio curve is computed. See AbbottFirestoneCurve for details.
 
         Returns
         -------
         AbbottFirestoneCurve
         """
-        return AbbottFirestoneCurve(self)
+        return AbbottFirestoneCurve(self, nbins=nbins, method=method)
 
     @batch_method('parameter')
     def Sk(self):
@@ -1555,31 +1696,33 @@ class Surface(CachedInstance):
     def Smr(self, c):
         """
         Calculates the ratio of the area of the material at a specified height c (in µm) to the evaluation area.
+        If c is array-like, the material ratio is computed for all heights at once.
 
         Parameters
         ----------
-        c : float
+        c : float | array-like
             height in µm.
 
         Returns
         -------
-        areal material ratio : float
+        areal material ratio : float | np.ndarray
         """
         return self.get_abbott_firestone_curve().Smr(c)
 
     @batch_method('parameter')
     def Smc(self, mr):
         """
-        Calculates the height (c) in µm for a given areal material ratio (mr).
+        Calculates the height (c) in µm for a given areal material ratio (mr). If mr is array-like, the height is
+        computed for all material ratios at once.
 
         Parameters
         ----------
-        mr : float
+        mr : float | array-like
             areal material ratio in %.
 
         Returns
         -------
-        height : float
+        height : float | np.ndarray
         """
         return self.get_abbott_firestone_curve().Smc(mr)
 
@@ -1678,31 +1821,42 @@ class Surface(CachedInstance):
     @batch_method('parameter')
     @cache
     @no_nonmeasured_points
-    def period(self) -> float:
+    def period(self, refine=False) -> float:
         """
         Calculates the 1d spatial period based on the Fourier transform. This can yield unexcepted results if the
         surface contains peaks at lower spatial frequencies than the frequency of the periodic structure to be
         evaluated. It is advised to perform appropriate filtering and leveling to remove waviness before invoking this
         method.
 
+        Parameters
+        ----------
+        refine : bool, default False
+            If True, the position of the Fourier peak is refined to sub-bin resolution by Gaussian interpolation, which
+            improves the resolution of the period beyond the frequency resolution of the Fourier transform.
+
         Returns
         -------
         period : float
         """
-        dx, dy = self._get_fourier_peak_dx_dy()
+        dx, dy = self._get_fourier_peak_dx_dy(refine=refine)
         return 2/np.hypot(dx, dy)
 
     @cache
     @no_nonmeasured_points
-    def period_x_y(self) -> tuple[float, float]:
+    def period_x_y(self, refine=False) -> tuple[float, float]:
         """
         Calculates the spatial period along the x and y axes based on the Fourier transform.
 
+        Parameters
+        ----------
+        refine : bool, default False
+            If True, the position of the Fourier peak is refined to sub-bin resolution by Gaussian interpolation.
+
         Returns
         -------
         (periodx, periody) : tuple[float, float]
         """
-        dx, dy = self._get_fourier_peak_dx_dy()
+        dx, dy = self._get_fourier_peak_dx_dy(refine=refine)
         periodx = np.inf if dx == 0 else np.abs(2/dx)
         periody = np.inf if dy == 0 else np.abs(2/dy)
         return periodx, periody
@@ -1743,21 +1897,17 @@ class Surface(CachedInstance):
             period_px = int(period_x / self.step_x)
             dist_px = int(period_px * SAMPLE_RATE_FACTOR)
             nprofiles = int(self.size.y / dist_px)
-            get_profile = lambda idx: self.data[idx]
+            profiles = self.data[np.arange(nprofiles) * dist_px]
         else:
             period_px = int(period_y / self.step_y)
             dist_px = int(period_px * SAMPLE_RATE_FACTOR)
             nprofiles = int(self.size.x / dist_px)
-            get_profile = lambda idx: self.data[:, idx]
+            profiles = self.data[:, np.arange(nprofiles) * dist_px].T
 
-        xfp = np.zeros(nprofiles)
-        for i in range(nprofiles):
-            profile = get_profile(i * dist_px)
-            # We make an initial guess for the fit
-            p0 = ((profile.max() - profile.min()) / 2, period_px, 0, profile.mean())
-            sinusoid = Sinusoid.from_fit(np.arange(profile.size), profile, p0=p0)
-            # This computes the position of the first peak of the sinusoid
-            xfp[i] = sinusoid.first_extremum()
+        # All profiles are fitted at once using the period estimate as initial guess
+        sinusoids = Sinusoid.from_fit_multiple(np.arange(profiles.shape[1]), profiles, period_px)
+        # This computes the position of the first peak of the sinusoid
+        xfp = np.array([sinusoid.first_extremum() for sinusoid in sinusoids])
 
         # Now we need to get rid of the points where the first peak jumps by one period
         diff = np.diff(xfp)
@@ -1855,17 +2005,18 @@ class Surface(CachedInstance):
 
         cell_length_x = int(period / self.step_x)
         cell_length_y = int(period / self.step_y)
-        ncells_x = int(self.size.x / cell_length_x)
-        ncells_y = int(self.size.y / cell_length_y)
-        ncells = ncells_x * ncells_y
+        cells = UnitCells(self.data, cell_length_x, cell_length_y, self.step_x, self.step_y)
+        ncells = len(cells)
+        # Parameters with a vectorized kernel are computed for all cells at once
+        batch_results = cells.evaluate([parameter for parameter in parameters if parameter in UnitCells.PARAMETERS])
         results = np.zeros((len(parameters), ncells))
-        for i in range(ncells_y):
-            for j in range(ncells_x):
-                idx = i * int(ncells_x) + j
-                data = self.data[cell_length_y * i:cell_length_y * (i + 1), cell_length_x * j:cell_length_x * (j + 1)]
-                cell_surface = Surface(data, self.step_x, self.step_y)
-                for k, parameter in enumerate(parameters):
-                    results[k, idx] = getattr(cell_surface, parameter)()
+        for k, parameter in enumerate(parameters):
+            if parameter in batch_results:
+                results[k] = batch_results[parameter]
+                continue
+            # All other parameters are evaluated for each cell separately
+            for idx, data in enumerate(cells.cells):
+                results[k, idx] = getattr(Surface(data, self.step_x, self.step_y), parameter)()
 
         results = np.sort(results.round(8), axis=1)
         h = []
@@ -1925,57 +2076,52 @@ class Surface(CachedInstance):
             period_px = periody / self.step_y
             profile_dist_px = int(size.x / (nprofiles-1))
 
-        # Allocate depth array with twice the length of the number of periods to accommodate both peaks and valleys
-        # multiplied by the number of sampled profiles
-        depths = np.zeros(nprofiles * nintervals)
-
-        # Loop over each profile
-        for i in range(nprofiles):
-            if aligned_vertically:
-                line = self.data[profile_dist_px * i]
-            else:
-                line = self.data[:, profile_dist_px * i]
-            xp = np.arange(line.size)
-            # Define initial guess for fit parameters
-            p0=((line.max() - line.min())/2, period_px, 0, line.mean())
-            # Fit the data to the general sine function
-            sinusoid = Sinusoid.from_fit(xp, line, p0=p0)
-            first_extremum = sinusoid.first_extremum()
-            # Allocate depth array for line
-            depths_line = np.zeros(nintervals * 2)
-
-            if plot and i in plot:
-                fig, ax = plt.subplots(figsize=(16,4))
-                ax.plot(xp, line, lw=1.5, c='k', alpha=0.7)
-                ax.plot(xp, sinusoid(xp), c='orange', ls='--')
-                ax.set_xlim(xp.min(), xp.max())
-
-            # Loop over each interval
-            for j in range(nintervals*2):
-                #idx = (0.25 + 0.5*j) * sinusoid.period + sinusoid.x0
-                idx = (0.5 * j) * sinusoid.period + first_extremum
-
-                idx_min = int(idx) - int(sinusoid.period * sampling_width/2)
-                idx_max = int(idx) + int(sinusoid.period * sampling_width/2)
-                if idx_min < 0 or idx_max > line.size-1:
-                    depths_line[j] = np.nan
-                    continue
-                depth_mean = line[idx_min:idx_max+1].mean()
-                depth_median = np.median(line[idx_min:idx_max+1])
-                depths_line[j] = depth_median
-                # For plotting
-                if plot and i in plot:
-                    rx = xp[idx_min:idx_max+1].min()
-                    ry = line[idx_min:idx_max+1].min()
-                    rw = xp[idx_max] - xp[idx_min+1]
-                    rh = np.abs(line[idx_min:idx_max+1].min() - line[idx_min:idx_max+1].max())
-                    rect = Rectangle((rx, ry), rw, rh, facecolor='tab:orange')
-                    ax.plot([rx, rx+rw], [depth_mean, depth_mean], c='r')
-                    ax.plot([rx, rx+rw], [depth_median, depth_median], c='g')
-                    ax.add_patch(rect)   
-
-            # Subtract peaks and valleys from eachother by slicing with 2 step
-            depths[i*nintervals:(i+1)*nintervals] = np.abs(depths_line[0::2] - depths_line[1::2])
+        # Sample the profiles and fit all of them at once using the period estimate as initial guess
+        if aligned_vertically:
+            lines = self.data[profile_dist_px * np.arange(nprofiles)]
+        else:
+            lines = self.data[:, profile_dist_px * np.arange(nprofiles)].T
+        xp = np.arange(lines.shape[1])
+        sinusoids = Sinusoid.from_fit_multiple(xp, lines, period_px)
+        periods = np.array([sinusoid.period for sinusoid in sinusoids])
+        first_extrema = np.array([sinusoid.first_extremum() for sinusoid in sinusoids])
+
+        # Positions of the extrema with shape (nprofiles, nintervals * 2)
+        idx = (0.5 * np.arange(nintervals * 2)) * periods[:, np.newaxis] + first_extrema[:, np.newaxis]
+        half_widths = (periods * sampling_width / 2).astype(int)
+        idx_min = idx.astype(int) - half_widths[:, np.newaxis]
+        idx_max = idx.astype(int) + half_widths[:, np.newaxis]
+        valid = (idx_min >= 0) & (idx_max <= lines.shape[1] - 1)
+        depths_lines = np.full(idx.shape, np.nan)
+        # The window size depends on the fitted period of the profile, so the profiles are grouped by window size. The
+        # windows are gathered from a strided view of the profiles and reduced in a single call to np.median
+        for half_width in np.unique(half_widths):
+            if 2 * half_width + 1 > lines.shape[1]:
+                continue
+            rows = np.flatnonzero(half_widths == half_width)
+            windows = np.lib.stride_tricks.sliding_window_view(lines[rows], 2 * half_width + 1, axis=1)
+            starts = np.clip(idx_min[rows], 0, windows.shape[1] - 1)
+            depths_lines[rows] = np.median(windows[np.arange(rows.size)[:, np.newaxis], starts], axis=-1)
+        depths_lines[~valid] = np.nan
+        # Subtract peaks and valleys from eachother by slicing with 2 step
+        depths = np.abs(depths_lines[:, 0::2] - depths_lines[:, 1::2]).ravel()
+
+        for i in plot or []:
+            line = lines[i]
+            fig, ax = plt.subplots(figsize=(16,4))
+            ax.plot(xp, line, lw=1.5, c='k', alpha=0.7)
+            ax.plot(xp, sinusoids[i](xp), c='orange', ls='--')
+            ax.set_xlim(xp.min(), xp.max())
+            for j in np.flatnonzero(valid[i]):
+                window = line[idx_min[i, j]:idx_max[i, j]+1]
+                rx = xp[idx_min[i, j]]
+                ry = window.min()
+                rw = xp[idx_max[i, j]] - xp[idx_min[i, j]+1]
+                rh = np.abs(window.min() - window.max())
+                rect = Rectangle((rx, ry), rw, rh, facecolor='tab:orange')
+                ax.plot([rx, rx+rw], [window.mean(), window.mean()], c='r')
+                ax.plot([rx, rx+rw], [depths_lines[i, j], depths_lines[i, j]], c='g')
+                ax.add_patch(rect)
 
         return np.nanmean(depths), np.nanstd(depths)
 
@@ -1991,9 +2137,11 @@ class Surface(CachedInstance):
         """
         return self.depth()[0] / self.period()
 
-    def roughness_parameters(self, parameters: list[str] = None) -> dict[str: float]:
+    def roughness_parameters(self, parameters: list[str] = None, workers: int = 1) -> dict[str: float]:
         """
-        Computes multiple roughness parameters at once and returns them in a dictionary.
+        Computes multiple roughness parameters at once and returns them in a dictionary. The intermediate products
+        shared by the parameters, such as the height moments, the material ratio curve or the spectrum, are computed
+        only once and independent products can be computed in parallel. See EvaluationPlan for details.
 
         Examples
         --------
@@ -2005,6 +2153,10 @@ class Surface(CachedInstance):
         ----------
         parameters : list-like[str], default None
             List-like object of parameters to evaluate. If None, all available parameters are evaluated.
+        workers : int, default 1
+            Maximum number of threads used to compute independent intermediate products. By default, all products are
+            computed sequentially, which avoids oversubscription when surfaces are already processed in parallel, e.g.
+            by Batch.
 
         Returns
         -------
@@ -2012,13 +2164,50 @@ class Surface(CachedInstance):
         """
         if parameters is None:
             parameters = self.ISO_PARAMETERS
-        results = dict()
         for parameter in parameters:
-            if parameter in self.AVAILABLE_PARAMETERS:
-                results[parameter] = getattr(self, parameter)()
-            else:
+            if parameter not in self.AVAILABLE_PARAMETERS:
                 raise ValueError(f'Parameter "{parameter}" is undefined.')
-        return results
+        return EvaluationPlan(parameters).execute(self, workers=workers)
+
+    @no_nonmeasured_points
+    def parameter_map(self, parameters: list[str], window: float, stride: float = None) -> dict[str: 'Surface']:
+        """
+        Computes spatially resolved maps of roughness parameters over a moving square window. Each window is evaluated
+        as if it were a separate surface. The moments required for Sq, Ssk and Sku are accumulated blockwise with
+        numerically stable updates and the window sums required for Sdq and Sdr are computed from summed-area tables,
+        such that the computational cost does not depend on the window size. Sa is evaluated directly on the data of
+        each window, such that its cost grows with the window size. Supported parameters are Sa, Sq, Sp, Sv, Sz, Ssk,
+        Sku, Sdr and Sdq.
+
+        Parameters
+        ----------
+        parameters : list-like[str]
+            Parameters to compute.
+        window : float
+            Side length of the window in µm.
+        stride : float | None, default None
+            Distance between adjacent windows in µm. If None, the stride is equal to the window size, which results in
+            non-overlapping tiles.
+
+        Returns
+        -------
+        dict[str: Surface]
+            Dictionary of parameter maps. Each map is represented by a Surface object, whose step size is equal to
+            the stride and whose point (i, j) corresponds to the window with the upper left corner at
+            (i * stride, j * stride).
+
+        Examples
+        --------
+        >>> maps = surface.parameter_map(['Sa', 'Sdr'], window=10, stride=2)
+        >>> maps['Sa'].show()
+        """
+        if stride is None:
+            stride = window
+        window_x, window_y = int(window / self.step_x), int(window / self.step_y)
+        stride_x, stride_y = max(1, int(stride / self.step_x)), max(1, int(stride / self.step_y))
+        maps = parameter_map(self.data, self.step_x, self.step_y, parameters, window_x, window_y, stride_x, stride_y)
+        return {parameter: Surface(data, stride_x * self.step_x, stride_y * self.step_y)
+                for parameter, data in maps.items()}
 
     # Plotting #########################################################################################################
     def plot_abbott_curve(self, nbars: int = 20, save_to=None):
@@ -2120,21 +2309,25 @@ class Surface(CachedInstance):
         plt.Figure, plt.Axes
         """
         N, M = self.size
-        data = self.data
-        if subtract_mean:
-            data = data - self.data.mean()
+        spectrum = self.get_spectrum()
+        # Calculate the frequency values for the x and y axes
+        freq_x, freq_y = spectrum.frequencies()
 
-        if hanning:
-            hann_window_y = np.hanning(N)
-            hann_window_x = np.hanning(M)
-            hann_window_2d = np.outer(hann_window_y, hann_window_x)
-            data = data * hann_window_2d
+        if subtract_mean and not hanning:
+            # Reuse the shared spectrum of the surface
+            fft = spectrum.magnitude()
+        else:
+            data = self.data
+            if subtract_mean:
+                data = data - self.data.mean()
 
-        fft = np.abs(np.fft.fftshift(np.fft.fft2(data)))
+            if hanning:
+                hann_window_y = np.hanning(N)
+                hann_window_x = np.hanning(M)
+                hann_window_2d = np.outer(hann_window_y, hann_window_x)
+                data = data * hann_window_2d
 
-        # Calculate the frequency values for the x and y axes
-        freq_x = np.fft.fftshift(np.fft.fftfreq(M, d=self.width_um / M))  # Frequency values for the x-axis
-        freq_y = np.fft.fftshift(np.fft.fftfreq(N, d=self.height_um / N))  # Frequency values for the y-axis
+            fft = np.abs(np.fft.fftshift(np.fft.fft2(data)))
 
         if log:
             # We add a small offset to avoid ln(0)
@@ -0,0 +1,441 @@
+import numpy as np
+
+
+class _MaterialRatioCurves:
+    """
+    Material ratio curves of multiple cells, which are equivalent to the curves computed by the 'histogram' method of
+    the AbbottFirestoneCurve. Each curve consists of nbins + 1 points with descending height and ascending material
+    ratio. The heights are equally spaced and the material ratio only changes at non-empty histogram bins. Therefore,
+    a curve is stored as a sequence of runs of constant material ratio, which requires memory proportional to the
+    number of points of a cell instead of the number of bins.
+
+    Parameters
+    ----------
+    values : ndarray
+        Height values of shape (k, n), where each row corresponds to one cell.
+    nbins : int
+        Number of bins of the material density histogram.
+    """
+    def __init__(self, values, nbins):
+        k, n = values.shape
+        self.nbins = nbins
+        self.rows = np.arange(k)
+        # Same treatment of constant data as np.histogram
+        first_edge = values.min(axis=1)
+        last_edge = values.max(axis=1)
+        constant = first_edge == last_edge
+        self._first_edge = np.where(constant, first_edge - 0.5, first_edge)
+        self._last_edge = np.where(constant, last_edge + 0.5, last_edge)
+        self._bin_width = (self._last_edge - self._first_edge) / nbins
+
+        # Bin indices computed in the same way as by np.histogram
+        rows = self.rows[:, np.newaxis]
+        indices = (values - self._first_edge[:, np.newaxis]) / (self._last_edge - self._first_edge)[:, np.newaxis]
+        indices = (indices * nbins).astype(np.intp)
+        indices[indices == nbins] -= 1
+        indices[values < self._edge(indices, rows)] -= 1
+        increment = (values >= self._edge(indices + 1, rows)) & (indices != nbins - 1)
+        indices[increment] += 1
+
+        # Histogram bins that contain points in descending order of height
+        keys = np.sort((rows * nbins + nbins - 1 - indices).ravel())
+        is_new = np.ones(keys.size, dtype=bool)
+        is_new[1:] = keys[1:] != keys[:-1]
+        event_idx = np.flatnonzero(is_new)
+        counts = np.diff(np.append(event_idx, keys.size))
+        event_rows, event_bins = np.divmod(keys[event_idx], nbins)
+
+        # Each curve starts with a run of the single point at the maximum height, which has a material ratio of one
+        # point according to the AbbottFirestoneCurve. Every non-empty bin is followed by a run whose cumulated number
+        # of points includes that bin.
+        nevents = np.bincount(event_rows, minlength=k)
+        nruns = nevents + 1
+        self._row_start = np.concatenate([[0], np.cumsum(nruns)[:-1]])
+        size = nruns.sum()
+        first_run = np.zeros(size, dtype=bool)
+        first_run[self._row_start] = True
+        event_pos = np.flatnonzero(~first_run)
+        self._run_rows = np.repeat(self.rows, nruns)
+        # Index of the point preceding each run
+        run_bins = np.full(size, -1)
+        run_bins[event_pos] = event_bins
+        cumulated = np.ones(size)
+        cumulated[event_pos] = np.cumsum(counts) - event_rows * n
+        self._run_material_ratio = cumulated / n * 100
+        # Index of the last point of each run
+        self._run_end = np.empty(size, dtype=np.intp)
+        self._run_end[:-1] = run_bins[1:]
+        last_run = np.append(self._row_start[1:] - 1, size - 1)
+        self._run_end[last_run] = nbins
+        self._run_start = run_bins + 1
+        self._last_run = last_run
+
+        # Sum of the material ratio over all points preceding each run
+        run_sums = self._run_material_ratio * (self._run_end - self._run_start + 1)
+        padded = np.zeros((k, nruns.max()))
+        padded[self._run_rows, np.arange(size) - self._row_start[self._run_rows]] = run_sums
+        self._run_prefix = (np.cumsum(padded, axis=1) - padded)[self._run_rows,
+                                                                  np.arange(size) - self._row_start[self._run_rows]]
+
+        # Lexicographically sorted search keys for the material ratio and point index of the runs. Complex numbers are
+        # compared by their real part first, which allows the search in all rows at once with exact comparisons.
+        self._material_ratio_keys = self._run_rows + 1j * self._run_material_ratio
+        self._end_keys = self._run_rows * (nbins + 2) + self._run_end
+
+    def _edge(self, idx, rows):
+        """
+        Returns the histogram bin edges at the specified indices in the same way as np.linspace.
+        """
+        edge = idx * self._bin_width[rows] + self._first_edge[rows]
+        is_last = idx == self.nbins
+        if np.any(is_last):
+            edge = np.where(is_last, self._last_edge[rows], edge)
+        return edge
+
+    def height(self, idx, rows):
+        """
+        Returns the height of the points idx of the curves in the specified rows.
+        """
+        return self._edge(self.nbins - idx, rows)
+
+    def _run_of_point(self, idx, rows):
+        """
+        Returns the index of the run which contains the point idx.
+        """
+        return np.searchsorted(self._end_keys, rows * (self.nbins + 2) + idx, side='left')
+
+    def material_ratio(self, idx, rows):
+        """
+        Returns the material ratio of the points idx of the curves in the specified rows.
+        """
+        return self._run_material_ratio[self._run_of_point(idx, rows)]
+
+    def smc(self, mr, rows):
+        """
+        Returns the height at the material ratio mr, equivalent to np.interp(mr, material_ratio, height).
+        """
+        run = np.searchsorted(self._material_ratio_keys, rows + 1j * mr, side='right') - 1
+        below = run < self._row_start[rows]
+        run = np.maximum(run, self._row_start[rows])
+        at_end = run == self._last_run[rows]
+        idx = self._run_end[run]
+        x0 = self._run_material_ratio[run]
+        x1 = self._run_material_ratio[np.where(at_end, run, run + 1)]
+        f0 = self.height(idx, rows)
+        f1 = self.height(np.minimum(idx + 1, self.nbins), rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = f0 + (f1 - f0) / (x1 - x0) * (mr - x0)
+        result = np.where(below, self.height(0, rows), result)
+        return np.where(at_end, self.height(self.nbins, rows), result)
+
+    def locate(self, c):
+        """
+        Returns the index of the point above the height c on every curve, such that c lies between that point and the
+        next one.
+        """
+        rows = self.rows
+        top = self.height(0, rows)
+        idx = np.clip(np.floor((top - c) / self._bin_width).astype(np.intp), 0, self.nbins - 1)
+        # Correct the index where rounding places the height outside the interval
+        idx -= (c > self.height(idx, rows)) & (idx > 0)
+        idx += (c < self.height(idx + 1, rows)) & (idx < self.nbins - 1)
+        return idx
+
+    def smr(self, c):
+        """
+        Returns the material ratio at the height c of every curve, equivalent to
+        np.interp(c, height[::-1], material_ratio[::-1]).
+        """
+        rows = self.rows
+        idx = self.locate(c)
+        h0, h1 = self.height(idx + 1, rows), self.height(idx, rows)
+        mr0, mr1 = self.material_ratio(idx + 1, rows), self.material_ratio(idx, rows)
+        result = mr0 + (mr1 - mr0) / (h1 - h0) * (c - h0)
+        result = np.where(c <= self.height(self.nbins, rows), 100, result)
+        return np.where(c >= self.height(0, rows), self.material_ratio(0, rows), result)
+
+    def argclosest(self, c):
+        """
+        Returns the index of the point closest to the height c on every curve.
+        """
+        neighbours = np.clip(self.locate(c)[:, np.newaxis] + np.arange(-1, 3), 0, self.nbins)
+        distance = np.abs(self.height(neighbours, self.rows[:, np.newaxis]) - c[:, np.newaxis])
+        return neighbours[self.rows, np.argmin(distance, axis=1)]
+
+    def _prefix_sum(self, idx):
+        """
+        Returns the sum of the material ratio over the points preceding the point idx of every curve.
+        """
+        rows = self.rows
+        run = self._run_of_point(np.minimum(idx, self.nbins), rows)
+        return self._run_prefix[run] + self._run_material_ratio[run] * (idx - self._run_start[run])
+
+    def material_area(self, idx):
+        """
+        Returns the area between the curve and the height axis above the point idx, equivalent to
+        abs(trapezoid(material_ratio[:idx], x=height[:idx])).
+        """
+        rows = self.rows
+        idx = np.maximum(idx, 1)
+        area = self._prefix_sum(idx - 1) + self._prefix_sum(idx) - self.material_ratio(0, rows)
+        return self._bin_width * area / 2
+
+    def void_area(self, idx):
+        """
+        Returns the area between the curve and the 100% material ratio line below the point idx, equivalent to
+        abs(trapezoid(100 - material_ratio[idx:], x=height[idx:])).
+        """
+        nbins = self.nbins
+        total = self._prefix_sum(nbins) + self._prefix_sum(nbins + 1)
+        area = 200 * (nbins - idx) - (total - self._prefix_sum(idx) - self._prefix_sum(idx + 1))
+        return self._bin_width * area / 2
+
+    def equivalence_line(self, width):
+        """
+        Computes the slope and intercept of the equivalence line of every curve in the same way as the
+        AbbottFirestoneCurve.
+
+        Parameters
+        ----------
+        width : float
+            Width of the equivalence line in %.
+
+        Returns
+        -------
+        slope, intercept : tuple[ndarray, ndarray]
+        """
+        rows = self.rows
+        mr = self._run_material_ratio
+        # The equivalence line can start at every point of the curve that is at most 100% - width into the material
+        # ratio
+        run = np.searchsorted(self._material_ratio_keys, rows + 1j * (100 - width), side='right') - 1
+        nstart = np.where(run < self._row_start, 0, self._run_end[np.maximum(run, 0)] + 1)
+        nstart = np.maximum(1, nstart)
+        # Within a run of equal material ratio, the end point of the equivalence line is the same, while the height at
+        # the start point decreases. Therefore, only the last point of each run and the last start point can have the
+        # largest slope.
+        candidates = np.zeros(mr.size, dtype=bool)
+        candidates[:-1] = mr[1:] > mr[:-1]
+        candidates[self._last_run] = False
+        candidates &= self._run_end < nstart[self._run_rows] - 1
+        candidate_rows = np.concatenate([self._run_rows[candidates], rows])
+        candidate_idx = np.concatenate([self._run_end[candidates], nstart - 1])
+        order = np.argsort(candidate_rows, kind='stable')
+        candidate_rows, candidate_idx = candidate_rows[order], candidate_idx[order]
+        candidate_mr = self.material_ratio(candidate_idx, candidate_rows)
+        candidate_height = self.height(candidate_idx, candidate_rows)
+        end_height = self.smc(candidate_mr + width, candidate_rows)
+        slopes = (end_height - candidate_height) / width
+        # Since slope is always negative, the minimal gradient corresponds to the maximum value. The first occurence of
+        # the maximum is selected according to ISO 13565-2
+        slope = np.maximum.reduceat(slopes, np.searchsorted(candidate_rows, rows))
+        is_max = np.flatnonzero(slopes == slope[candidate_rows])
+        first = is_max[np.searchsorted(candidate_rows[is_max], rows)]
+        intercept = candidate_height[first] - slope * candidate_mr[first]
+        return slope, intercept
+
+
+class UnitCells:
+    """
+    Represents a surface divided into rectangular cells of equal size and computes roughness parameters for all cells
+    at once. The height data is reshaped into a tensor of shape (ncells, cell_length_y, cell_length_x), where the cells
+    are ordered row by row. Points which do not fit into a complete cell at the right and bottom border of the surface
+    are discarded.
+
+    Only the parameters listed in `UnitCells.PARAMETERS` are available. They are evaluated with vectorized kernels
+    which yield the same values as evaluating each cell as a separate Surface object using the default arguments.
+    The functional parameters are computed from the material ratio curve obtained with the 'histogram' method of the
+    AbbottFirestoneCurve.
+
+    Parameters
+    ----------
+    data : ndarray
+        Two-dimensional height data.
+    cell_length_x : int
+        Number of points of a cell along the x-axis.
+    cell_length_y : int
+        Number of points of a cell along the y-axis.
+    step_x : float
+        Lateral step along the x-axis in µm.
+    step_y : float
+        Lateral step along the y-axis in µm.
+    nbins : int, default 10000
+        Number of bins of the material density histogram used for the functional parameters.
+    """
+    PARAMETERS = {'Sa', 'Sq', 'Sp', 'Sv', 'Sz', 'Ssk', 'Sku', 'Sdr', 'Sdq', 'Sk', 'Spk', 'Svk', 'Smr1', 'Smr2',
+                  'Sxp', 'Vmp', 'Vmc', 'Vvv', 'Vvc'}
+    HEIGHT_PARAMETERS = {'Sa', 'Sq', 'Sp', 'Sv', 'Sz', 'Ssk', 'Sku'}
+    FUNCTIONAL_PARAMETERS = {'Sk', 'Spk', 'Svk', 'Smr1', 'Smr2', 'Sxp', 'Vmp', 'Vmc', 'Vvv', 'Vvc'}
+    # Width of the equivalence line in % as defined by ISO 25178-2
+    EQUIVALENCE_LINE_WIDTH = 40
+    # Approximate number of points processed at once for the functional parameters
+    FUNCTIONAL_BLOCK_SIZE = 2**18
+
+    def __init__(self, data, cell_length_x, cell_length_y, step_x, step_y, nbins=10000):
+        if cell_length_x < 1 or cell_length_y < 1:
+            raise ValueError('The cell length must be at least one point.')
+        self.ncells_y = data.shape[0] // cell_length_y
+        self.ncells_x = data.shape[1] // cell_length_x
+        self.cell_shape = (cell_length_y, cell_length_x)
+        self.step_x = step_x
+        self.step_y = step_y
+        self._nbins = nbins
+        cropped = data[:self.ncells_y * cell_length_y, :self.ncells_x * cell_length_x]
+        self.cells = (cropped.reshape(self.ncells_y, cell_length_y, self.ncells_x, cell_length_x)
+                      .swapaxes(1, 2).reshape(-1, cell_length_y, cell_length_x))
+
+    def __len__(self):
+        return self.cells.shape[0]
+
+    def height_parameters(self):
+        """
+        Calculates the height parameters of all cells.
+
+        Returns
+        -------
+        dict[str: ndarray]
+        """
+        values = self.cells.reshape(len(self), -1)
+        mean = values.mean(axis=1)
+        centered = values - mean[:, np.newaxis]
+        size = values.shape[1]
+        m1 = np.abs(centered).mean(axis=1)
+        centered_sq = centered ** 2
+        m2 = centered_sq.mean(axis=1)
+        m3 = np.einsum('ij,ij->i', centered_sq, centered) / size
+        m4 = np.einsum('ij,ij->i', centered_sq, centered_sq) / size
+        sq = np.sqrt(m2)
+        sv = np.abs(values.min(axis=1) - mean)
+        sp = values.max(axis=1) - mean
+        return {'Sa': m1, 'Sq': sq, 'Sv': sv, 'Sp': sp, 'Sz': sp + sv, 'Ssk': m3 / sq ** 3, 'Sku': m4 / sq ** 4}
+
+    def surface_area(self):
+        """
+        Calculates the surface area of all cells according to Surface.surface_area.
+
+        Returns
+        -------
+        ndarray
+        """
+        dz_y = np.diff(self.cells, axis=1)[:, :, :-1]
+        dz_x = np.diff(self.cells, axis=2)[:, :-1, :]
+        cross_z = self.step_x * self.step_y
+        areas = 0.5 * np.sqrt((self.step_y * dz_y) ** 2 + (self.step_x * dz_x) ** 2 + cross_z ** 2)
+        return 2 * areas.sum(axis=(1, 2))
+
+    def projected_area(self):
+        """
+        Calculates the projected area of a cell according to Surface.projected_area.
+
+        Returns
+        -------
+        float
+        """
+        ny, nx = self.cell_shape
+        return ((nx - 1) * self.step_x - self.step_x) * ((ny - 1) * self.step_y - self.step_y)
+
+    def Sdr(self):
+        """
+        Calculates the developed interfacial area ratio Sdr of all cells.
+
+        Returns
+        -------
+        ndarray
+        """
+        return (self.surface_area() / self.projected_area() - 1) * 100
+
+    def Sdq(self):
+        """
+        Calculates the root mean square gradient Sdq of all cells.
+
+        Returns
+        -------
+        ndarray
+        """
+        ny, nx = self.cell_shape
+        sum_x = np.sum((np.diff(self.cells, axis=2) / self.step_x) ** 2, axis=(1, 2))
+        sum_y = np.sum((np.diff(self.cells, axis=1) / self.step_y) ** 2, axis=(1, 2))
+        return np.sqrt((sum_x + sum_y) / (ny * nx))
+
+    def _functional_parameters_block(self, values):
+        """
+        Calculates the functional parameters for a block of cells.
+
+        Parameters
+        ----------
+        values : ndarray
+            Height values of shape (k, n), where each row corresponds to one cell.
+
+        Returns
+        -------
+        dict[str: ndarray]
+        """
+        curves = _MaterialRatioCurves(values, self._nbins)
+        k = values.shape[0]
+        slope, intercept = curves.equivalence_line(self.EQUIVALENCE_LINE_WIDTH)
+        yupper = intercept
+        ylower = slope * 100 + intercept
+        smr1 = curves.smr(yupper)
+        smr2 = curves.smr(ylower)
+        heights_mr = curves.smc(np.tile([2.5, 10, 50, 80], k), np.repeat(curves.rows, 4)).reshape(k, 4)
+        idx_10 = curves.argclosest(heights_mr[:, 1])
+        idx_80 = curves.argclosest(heights_mr[:, 3])
+        vmp = curves.material_area(idx_10) / 100
+        vvv = curves.void_area(idx_80) / 100
+        return {
+            'Sk': yupper - ylower,
+            'Spk': 2 * curves.material_area(curves.argclosest(yupper)) / smr1,
+            'Svk': 2 * curves.void_area(curves.argclosest(ylower)) / (100 - smr2),
+            'Smr1': smr1,
+            'Smr2': smr2,
+            'Sxp': heights_mr[:, 0] - heights_mr[:, 2],
+            'Vmp': vmp,
+            'Vmc': curves.material_area(idx_80) / 100 - vmp,
+            'Vvv': vvv,
+            'Vvc': curves.void_area(idx_10) / 100 - vvv
+        }
+
+    def functional_parameters(self):
+        """
+        Calculates the functional parameters of all cells. The cells are processed in blocks to limit the memory
+        usage.
+
+        Returns
+        -------
+        dict[str: ndarray]
+        """
+        values = self.cells.reshape(len(self), -1)
+        block_size = max(1, self.FUNCTIONAL_BLOCK_SIZE // values.shape[1])
+        results = {parameter: [np.empty(0)] for parameter in self.FUNCTIONAL_PARAMETERS}
+        for start in range(0, len(self), block_size):
+            block = self._functional_parameters_block(values[start:start + block_size])
+            for parameter, value in block.items():
+                results[parameter].append(value)
+        return {parameter: np.concatenate(value) for parameter, value in results.items()}
+
+    def evaluate(self, parameters):
+        """
+        Calculates the specified parameters for all cells. Parameters of the same family share the intermediate
+        results.
+
+        Parameters
+        ----------
+        parameters : list-like[str]
+            Parameters to compute. Must be a subset of `UnitCells.PARAMETERS`.
+
+        Returns
+        -------
+        dict[str: ndarray]
+        """
+        if unsupported := set(parameters) - self.PARAMETERS:
+            raise ValueError(f'Parameters {", ".join(sorted(unsupported))} are not supported.')
+        results = {}
+        if self.HEIGHT_PARAMETERS & set(parameters):
+            results.update(self.height_parameters())
+        if self.FUNCTIONAL_PARAMETERS & set(parameters):
+            results.update(self.functional_parameters())
+        if 'Sdr' in parameters:
+            results['Sdr'] = self.Sdr()
+        if 'Sdq' in parameters:
+            results['Sdq'] = self.Sdq()
+        return {parameter: results[parameter] for parameter in parameters}
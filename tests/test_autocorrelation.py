@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal
+from scipy.signal import correlate
+from surfalize.autocorrelation import AutocorrelationFunction
+
+
+@pytest.fixture
+def centered_data(surface):
+    return surface.data - surface.data.mean()
+
+
+def test_autocorrelation_circular(surface, centered_data):
+    data_fft = np.fft.fft2(centered_data)
+    expected = np.fft.fftshift(np.fft.ifft2(data_fft * np.conj(data_fft)).real / centered_data.size)
+    assert_array_almost_equal(AutocorrelationFunction(surface).data, expected)
+
+
+def test_autocorrelation_padded(surface, centered_data):
+    ny, nx = centered_data.shape
+    expected = correlate(centered_data, centered_data, mode='full', method='fft') / centered_data.size
+    expected = expected[ny - 1 - ny // 2:2 * ny - 1 - ny // 2, nx - 1 - nx // 2:2 * nx - 1 - nx // 2]
+    acf = AutocorrelationFunction(surface, padded=True, workers=2)
+    assert acf.data.shape == surface.data.shape
+    assert_array_almost_equal(acf.data, expected)
+
+
+def test_autocorrelation_single_precision(surface):
+    acf = AutocorrelationFunction(surface, dtype=np.float32)
+    assert acf.data.dtype == np.float32
+    assert acf.Sal() == pytest.approx(surface.Sal(), rel=1e-3)
@@ -3,6 +3,7 @@ import pytest
 import pandas as pd
 from pandas.testing import assert_frame_equal
 from surfalize.batch import Batch, FilenameParser, _Parameter, _Operation, _Token
+from surfalize.exceptions import BatchError
 
 module_path = Path(__file__).parent
 
@@ -71,3 +72,23 @@ def test_batch_from_dir():
     assert set(batch._files) == set((module_path / 'test_files').iterdir())
 
 
+
+@pytest.fixture
+def batch_files(surface, tmp_path):
+    files = []
+    for i in range(3):
+        path = tmp_path / f'surface_{i}.sur'
+        (surface + i).save(path)
+        files.append(path)
+    return files
+
+def test_batch_process_backend(batch_files):
+    batch = Batch(batch_files).level().Sa().Sq()
+    expected = batch.execute(multiprocessing=False).get_dataframe().sort_values('file', ignore_index=True)
+    result = batch.execute(backend='process', workers=2, chunksize=2).get_dataframe()
+    assert_frame_equal(result.sort_values('file', ignore_index=True), expected)
+
+def test_batch_process_backend_unpicklable(batch_files):
+    batch = Batch(batch_files).custom_parameter(lambda surface: {'mean': surface.data.mean()})
+    with pytest.raises(BatchError):
+        batch.execute(backend='process')
@@ -0,0 +1,90 @@
+import gc
+import numpy as np
+import pytest
+from surfalize.cache import (CachedInstance, CachePolicy, SizeAwarePolicy, cache, make_key, get_cache_stats,
+                             set_global_cache_limit, DEFAULT_GLOBAL_CACHE_LIMIT)
+
+
+class Dummy(CachedInstance):
+
+    def __init__(self, cache_policy=None):
+        super().__init__(cache_policy)
+        self.ncalls = 0
+
+    @cache
+    def array(self, n, fill=0):
+        self.ncalls += 1
+        return np.full(n, fill, dtype=np.float64)
+
+    @cache
+    def total(self, values):
+        self.ncalls += 1
+        return sum(values)
+
+
+def test_make_key_arrays():
+    a = np.arange(2000)
+    b = a.copy()
+    b[1000] = -1
+    # str(a) abbreviates the array, so both arrays used to produce the same key
+    assert str(a) == str(b)
+    assert make_key('f', (a,), {}) != make_key('f', (b,), {})
+    assert make_key('f', (a,), {}) == make_key('f', (a.copy(),), {})
+    assert make_key('f', (), dict(x=1, y=2)) == make_key('f', (), dict(y=2, x=1))
+
+
+def test_cache_hits_and_misses():
+    dummy = Dummy()
+    dummy.array(10)
+    dummy.array(10)
+    dummy.total([1, 2, 3])
+    dummy.total([1, 2, 3])
+    assert dummy.ncalls == 2
+    assert dummy.cache_stats.hits == 2
+    assert dummy.cache_stats.misses == 2
+
+
+def test_cache_instance_byte_budget():
+    dummy = Dummy(CachePolicy(max_bytes=2000))
+    dummy.array(100, 1)
+    dummy.array(100, 2)
+    dummy.array(100, 3)
+    assert dummy._method_cache.nbytes <= 2000
+    assert dummy.cache_stats.evictions == 1
+    # The least recently used entry was evicted
+    dummy.array(100, 1)
+    assert dummy.ncalls == 4
+
+
+def test_cache_size_aware_policy():
+    dummy = Dummy(SizeAwarePolicy(max_entries=3))
+    dummy.array(1000)
+    dummy.array(1)
+    dummy.array(2)
+    dummy.array(3)
+    assert len(dummy._method_cache) == 3
+    ncalls = dummy.ncalls
+    dummy.array(1)
+    assert dummy.ncalls == ncalls
+
+
+def test_cache_global_budget():
+    try:
+        set_global_cache_limit(10000)
+        first, second = Dummy(), Dummy()
+        first.array(1000)
+        second.array(1000)
+        assert first.cache_stats.evictions == 1
+        assert get_cache_stats()['nbytes'] <= 10000
+    finally:
+        set_global_cache_limit(DEFAULT_GLOBAL_CACHE_LIMIT)
+
+
+def test_cache_released_on_garbage_collection():
+    nbytes = get_cache_stats()['nbytes']
+    dummy = Dummy()
+    dummy.array(1000)
+    assert get_cache_stats()['nbytes'] > nbytes
+    del dummy
+    gc.collect()
+    assert get_cache_stats()['nbytes'] == nbytes
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from surfalize import Surface
+from surfalize.evaluation import EvaluationPlan, PARAMETER_STAGES
+
+
+def test_all_parameters_have_stages():
+    assert set(Surface.AVAILABLE_PARAMETERS) == set(PARAMETER_STAGES)
+
+
+def test_plan_stages():
+    assert EvaluationPlan(['Sa', 'Sq']).stages == ('moments',)
+    assert EvaluationPlan(['Sdq', 'Sdr']).stages == ('gradients',)
+    plan = EvaluationPlan(['Sal', 'Sk', 'Sa'])
+    assert plan.levels == [['moments', 'material_ratio', 'spectrum'], ['autocorrelation'], ['decay_lengths']]
+    assert EvaluationPlan(['stepheight']).stages == ()
+
+
+def test_plan_invalid_parameter():
+    with pytest.raises(ValueError):
+        EvaluationPlan(['Sa', 'Sx'])
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_plan_execute(surface, workers):
+    reference = Surface(surface.data.copy(), surface.step_x, surface.step_y)
+    expected = {parameter: getattr(reference, parameter)() for parameter in Surface.ISO_PARAMETERS}
+    plan = EvaluationPlan(Surface.ISO_PARAMETERS)
+    results = plan.execute(surface, workers=workers)
+    assert list(results) == list(Surface.ISO_PARAMETERS)
+    for parameter, value in expected.items():
+        assert results[parameter] == pytest.approx(value)
+    assert list(plan.timings) == list(plan.stages) + ['parameters']
+    assert all(timing >= 0 for timing in plan.timings.values())
+
+
+def test_roughness_parameters(surface):
+    results = surface.roughness_parameters(['Sa', 'Sdr', 'Sk'])
+    assert list(results) == ['Sa', 'Sdr', 'Sk']
+    assert results['Sa'] == pytest.approx(surface.Sa())
+    with pytest.raises(ValueError):
+        surface.roughness_parameters(['Sa', 'Sx'])
+
+
+def test_plan_execute_nonmeasured_points(surface):
+    surface.data[10, 10] = np.nan
+    surface.clear_cache()
+    results = EvaluationPlan(['Sa', 'Sk']).execute(surface)
+    assert np.isfinite(results['Sa'])
+    with pytest.raises(ValueError, match='Non-measured points'):
+        EvaluationPlan(['Sa', 'Sal']).execute(surface)
@@ -1,9 +1,11 @@
+import struct
 import pytest
 from pathlib import Path
 import io
 import numpy as np
 from surfalize import Surface
 from surfalize.file import supported_formats_read, supported_formats_write
+from surfalize.file.common import read_array, LazyArray, Layout, Entry, Reserved, FormatFromPrevious, FileHandler
 
 module_path = Path(__file__).parent
 
@@ -66,3 +68,136 @@ def test_sur_encoding(testfile_dir):
 
 
 
+
+def test_read_array_mmap(tmpdir):
+    path = tmpdir / 'array.bin'
+    expected = np.arange(100, dtype='>i4')
+    with open(path, 'wb') as file:
+        file.write(b'header')
+        file.write(expected.tobytes())
+        file.write(b'trailer')
+    for mmap in (False, True):
+        with open(path, 'rb') as file:
+            file.seek(6)
+            data = read_array(file, dtype='>i4', count=100, mmap=mmap)
+            assert file.read() == b'trailer'
+        np.testing.assert_array_equal(data, expected)
+        # Modifications of a memory-mapped array are not written back to the file
+        data[:] = 0
+    with open(path, 'rb') as file:
+        assert read_array(file, dtype='>i4', count=100, offset=6, mmap=True)[-1] == 99
+        file.seek(6)
+        # Truncated data is not mapped
+        assert read_array(file, dtype='>i4', count=200, mmap=True).size == 101
+
+def test_lazy_loading_from_path(testfile_dir, tmpdir):
+    file = testfile_dir / 'test_uncompressed.sur'
+    with open(file, 'rb') as f:
+        buffer = io.BytesIO(f.read())
+    surface = Surface.load(file)
+    assert surface.size == Surface.load(buffer, format='.sur').size
+    np.testing.assert_array_equal(surface.data, Surface.load(buffer, format='.sur').data)
+    # Overwriting the file from which a surface was loaded must not invalidate its data
+    path = tmpdir / 'test.sur'
+    Surface.load(file).save(path)
+    surface = Surface.load(path)
+    assert not isinstance(surface._data, LazyArray)
+    surface.save(path)
+    assert almost_equal(Surface.load(path), surface)
+    # Truncating the file before the data of a loaded surface is accessed must not invalidate it either
+    expected = Surface.open(path, lazy=False).data
+    surface = Surface.load(path)
+    surface[:10, :10].save(path)
+    np.testing.assert_array_equal(surface.data, expected)
+
+@pytest.mark.parametrize('filename', ['test_1.dat', 'test_1.nms', 'test_1.plu', 'test_uncompressed.sur'])
+def test_open_lazy(testfile_dir, filename):
+    surface = Surface.open(testfile_dir / filename)
+    assert isinstance(surface._data, LazyArray)
+    expected = Surface.load(testfile_dir / filename)
+    assert surface.size == expected.size
+    assert surface.step_x == expected.step_x
+    np.testing.assert_array_equal(surface.data, expected.data)
+    assert not isinstance(Surface.open(testfile_dir / filename, lazy=False)._data, LazyArray)
+
+def test_lazy_array_copy():
+    original = np.arange(6, dtype='float64').reshape(2, 3)
+    lazy = LazyArray(original.copy, original.shape)
+    copied = np.array(lazy)
+    copied[:] = -1
+    np.testing.assert_array_equal(lazy.materialize(), original)
+    assert np.asarray(lazy) is lazy.materialize()
+    assert np.array(lazy, dtype='float32').dtype == np.float32
+    if np.lib.NumpyVersion(np.__version__) >= '2.0.0':
+        with pytest.raises(ValueError):
+            np.asarray(lazy, dtype='float32', copy=False)
+
+def test_open_lazy_compressed_sur(surface, tmpdir):
+    path = tmpdir / 'compressed.sur'
+    surface.save(path, compressed=True)
+    opened = Surface.open(path)
+    assert isinstance(opened._data, LazyArray)
+    assert opened.size == surface.size
+    assert almost_equal(opened, surface)
+
+@pytest.mark.parametrize('compressed', [False, True])
+def test_load_roi(surface, tmpdir, compressed):
+    path = tmpdir / 'test.sur'
+    surface.save(path, compressed=compressed)
+    expected = Surface.load(path).crop((100, 299, 50, 149), in_units=False)
+    cropped = Surface.load(path, roi=(100, 299, 50, 149))
+    assert cropped.size == (100, 200)
+    np.testing.assert_array_equal(cropped.data, expected.data)
+    opened = Surface.open(path, roi=(100, 299, 50, 149))
+    assert isinstance(opened._data, LazyArray)
+    np.testing.assert_array_equal(opened.data, expected.data)
+    with pytest.raises(ValueError):
+        Surface.load(path, roi=(100, 1000, 50, 149))
+    # An invalid region of interest is not a reader failure and must not trigger the format detection
+    handler = FileHandler(path)
+    with pytest.raises(ValueError):
+        handler.read(roi=(100, 1000, 50, 149))
+    assert handler.timings['detection'] == 0.0
+
+def test_layout_compiled_read():
+    layout = Layout(
+        Entry('a', '<I'),
+        Entry('b', '>h'),
+        Reserved(3),
+        Entry('name_length', 'B'),
+        Entry('name', FormatFromPrevious('name_length', 's')),
+        Entry('c', 'd'),
+        Entry('d', '>3f'),
+        Entry('e', '8s'),
+        Entry('f', 'l'),
+    )
+    buffer = io.BytesIO()
+    buffer.write(struct.pack('<I', 7) + struct.pack('>h', -3) + bytes(3) + struct.pack('B', 4) + b'abcd')
+    buffer.write(struct.pack('=d', 1.5) + struct.pack('>3f', 1, 2, 3) + b'xyz  \x00\x00\x00' + struct.pack('l', -9))
+    size = buffer.tell()
+    buffer.seek(0)
+    assert layout.read(buffer) == {'a': 7, 'b': -3, 'name_length': 4, 'name': 'abcd', 'c': 1.5, 'd': 1, 'e': 'xyz',
+                                   'f': -9}
+    assert buffer.tell() == size
+
+@pytest.mark.parametrize('filename', ['test_1.dat', 'test_1.nms', 'test_1.opd', 'test_1.plu', 'test_ascii.sdf',
+                                      'test_uncompressed.sur'])
+def test_format_detection(testfile_dir, filename):
+    with open(testfile_dir / filename, 'rb') as f:
+        buffer = io.BytesIO(f.read())
+    handler = FileHandler(buffer)
+    detected = handler.read()
+    expected = Surface.load(testfile_dir / filename)
+    np.testing.assert_array_equal(Surface.from_raw_surface(detected).data, expected.data)
+    assert handler.timings['detection'] > 0
+    assert len(FileHandler.detect(buffer.getvalue()[:4096])) == 1
+    assert Surface.load(buffer).read_timings['detection'] > 0
+    assert Surface.load(testfile_dir / filename).read_timings['detection'] == 0.0
+
+def test_format_detection_wrong_suffix(surface, tmpdir):
+    path = tmpdir / 'test.plu'
+    surface.save(tmpdir / 'test.sur')
+    (tmpdir / 'test.sur').rename(path)
+    with pytest.warns(UserWarning):
+        assert almost_equal(Surface.load(path), surface)
+    assert FileHandler.detect(b'\x00' * 4096) == []
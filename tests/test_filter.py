@@ -1,6 +1,7 @@
+import numpy as np
 import pytest
 from surfalize import Surface
-from surfalize.filter import GaussianFilter
+from surfalize.filter import GaussianFilter, RobustGaussianFilter, FilterBank, gaussian_transfer_function
 
 @pytest.mark.parametrize('cutoff, expected_mean, expected_std', [
     (2, 0.00045879628758761483, 0.7023321806489939),
@@ -11,4 +12,98 @@ def test_filter_lowpass(surface, cutoff, expected_mean, expected_std):
     filter = GaussianFilter(cutoff, 'lowpass')
     filtered_surface = filter.apply(surface)
     assert filtered_surface.data.mean() == pytest.approx(expected_mean)
-    assert filtered_surface.data.std() == pytest.approx(expected_std)
\ No newline at end of file
+    assert filtered_surface.data.std() == pytest.approx(expected_std)
+
+@pytest.mark.parametrize('endeffect_mode', ['reflect', 'mirror', 'nearest', 'constant', 'wrap'])
+@pytest.mark.parametrize('filter_type', ['lowpass', 'highpass'])
+def test_filter_fft(surface, endeffect_mode, filter_type):
+    spatial = GaussianFilter(8, filter_type, endeffect_mode=endeffect_mode, method='spatial').apply(surface)
+    fft = GaussianFilter(8, filter_type, endeffect_mode=endeffect_mode, method='fft').apply(surface)
+    assert np.abs(fft.data - spatial.data).max() < 1e-3 * np.abs(spatial.data).max()
+
+
+def test_filter_fft_anisotropic_step():
+    data = np.random.default_rng(0).normal(size=(120, 80))
+    surface = Surface(data, 0.1, 0.2)
+    spatial = GaussianFilter(3, 'lowpass', method='spatial').apply(surface)
+    fft = GaussianFilter(3, 'lowpass', method='fft').apply(surface)
+    assert np.abs(fft.data - spatial.data).max() < 1e-3 * np.abs(spatial.data).max()
+
+
+def test_gaussian_transfer_function():
+    transfer = gaussian_transfer_function(100, 0.5, 10)
+    frequencies = np.fft.fftfreq(100, d=0.5)
+    # The amplitude transmission at the cutoff wavelength is 50%
+    assert np.interp(1 / 10, frequencies[:50], transfer[:50]) == pytest.approx(0.5, abs=1e-3)
+    assert gaussian_transfer_function(100, 0.5, 10) is transfer
+
+
+def test_filter_method_auto(surface):
+    assert not GaussianFilter(2, 'lowpass').use_fft(surface.step_x, surface.step_y)
+    assert GaussianFilter(100, 'lowpass').use_fft(surface.step_x, surface.step_y)
+    with pytest.raises(ValueError):
+        GaussianFilter(2, 'lowpass', method='wavelet')
+
+
+@pytest.mark.parametrize('method', ['spatial', 'fft'])
+def test_filter_bank_decompose(surface, method):
+    roughness, waviness, form = FilterBank([10, 2], method=method).decompose(surface)
+    np.testing.assert_allclose(roughness.data + waviness.data + form.data, surface.data, atol=1e-12)
+    expected_form = GaussianFilter(10, 'lowpass', method=method).apply(surface)
+    np.testing.assert_allclose(form.data, expected_form.data, atol=1e-12)
+    assert surface.decompose([2, 10], method=method)[1].data == pytest.approx(waviness.data)
+
+
+def test_filter_bank_invalid_cutoffs():
+    with pytest.raises(ValueError):
+        FilterBank([])
+    with pytest.raises(ValueError):
+        FilterBank([5, 5])
+
+
+@pytest.mark.parametrize('method', ['spatial', 'fft'])
+def test_filter_both_bandpass(surface, method):
+    highpass, lowpass = surface.filter('both', 2, method=method)
+    np.testing.assert_array_equal(highpass.data, GaussianFilter(2, 'highpass', method=method).apply(surface).data)
+    np.testing.assert_array_equal(lowpass.data, GaussianFilter(2, 'lowpass', method=method).apply(surface).data)
+    chained = GaussianFilter(5, 'highpass', method=method).apply(
+        GaussianFilter(1, 'lowpass', method=method).apply(surface)).data
+    bandpass = surface.filter('bandpass', 1, 5, method=method).data
+    assert np.abs(bandpass - chained).max() < 1e-3 * np.abs(chained).max()
+
+
+@pytest.fixture
+def surface_with_valleys():
+    x = np.arange(300) * 0.5
+    data = np.tile(np.sin(2 * np.pi * x / 60), (200, 1))
+    valleys = np.random.default_rng(0).random(data.shape) < 0.02
+    data[valleys] -= 5
+    return Surface(data, 0.5, 0.5), np.tile(np.sin(2 * np.pi * x / 60), (200, 1))
+
+
+@pytest.mark.parametrize('method', ['spatial', 'fft'])
+def test_robust_filter(surface_with_valleys, method):
+    surface, waviness = surface_with_valleys
+    linear = GaussianFilter(10, 'lowpass', method=method).apply(surface)
+    robust_filter = RobustGaussianFilter(10, 'lowpass', method=method)
+    robust = robust_filter.apply(surface)
+    assert 1 < robust_filter.iterations < 20
+    assert np.abs(robust.data - waviness).mean() < 0.5 * np.abs(linear.data - waviness).mean()
+
+
+def test_robust_filter_single_iteration(surface):
+    linear = GaussianFilter(5, 'highpass').apply(surface)
+    robust = RobustGaussianFilter(5, 'highpass', max_iterations=1).apply(surface)
+    np.testing.assert_array_equal(robust.data, linear.data)
+    with pytest.raises(ValueError):
+        RobustGaussianFilter(5, 'highpass', max_iterations=0)
+
+
+def test_filter_robust(surface_with_valleys):
+    surface, _ = surface_with_valleys
+    expected = RobustGaussianFilter(10, 'highpass').apply(surface)
+    np.testing.assert_array_equal(surface.filter('highpass', 10, robust=True).data, expected.data)
+    highpass, lowpass = surface.filter('both', 10, robust=True)
+    np.testing.assert_allclose(highpass.data, expected.data, atol=1e-12)
+    np.testing.assert_allclose(highpass.data + lowpass.data, surface.data, atol=1e-12)
+    assert surface.filter('bandpass', 2, 10, robust=True).data.shape == surface.data.shape
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from scipy.interpolate import griddata
+from surfalize import Surface
+from surfalize.inpainting import inpaint, fill_nearest, fill_interpolate, fill_harmonic, FILL_METHODS
+
+
+@pytest.fixture
+def smooth_data():
+    y, x = np.mgrid[:80, :100]
+    return np.sin(x / 10) + np.cos(y / 15)
+
+
+@pytest.fixture
+def missing(smooth_data):
+    mask = np.zeros(smooth_data.shape, dtype=bool)
+    mask[10:14, 20:25] = True
+    mask[40, 50] = True
+    mask[60:70, 0:3] = True
+    mask[0, 90:95] = True
+    return mask
+
+
+def test_fill_nearest(smooth_data, missing):
+    data = smooth_data.copy()
+    data[missing] = np.nan
+    filled = fill_nearest(data)
+    points = np.argwhere(~missing)
+    expected = griddata(points, data[~missing], np.argwhere(missing), method='nearest')
+    distance = lambda p, q: np.hypot(*(p - q).T)
+    # Ties between equidistant points may be resolved differently, but the distance must be identical
+    for point, value, reference in zip(np.argwhere(missing), filled[missing], expected):
+        nearest = points[(data[~missing] == value)]
+        reference_point = points[(data[~missing] == reference)]
+        assert distance(nearest, point).min() == pytest.approx(distance(reference_point, point).min())
+    np.testing.assert_array_equal(filled[~missing], smooth_data[~missing])
+
+
+@pytest.mark.parametrize('method', ['linear', 'cubic'])
+def test_fill_interpolate(smooth_data, missing, method):
+    data = smooth_data.copy()
+    data[missing] = np.nan
+    filled = fill_interpolate(data, method=method)
+    assert not np.isnan(filled).any()
+    assert np.abs(filled - smooth_data).max() < 0.05
+
+
+@pytest.mark.parametrize('order', [1, 2])
+def test_fill_harmonic(smooth_data, missing, order):
+    data = smooth_data.copy()
+    data[missing] = np.nan
+    filled = fill_harmonic(data, order=order)
+    assert not np.isnan(filled).any()
+    # The holes at the boundary are filled with reflecting boundary conditions, which do not continue the slope
+    assert np.abs(filled - smooth_data)[:50].max() < 0.05
+    np.testing.assert_array_equal(filled[~missing], smooth_data[~missing])
+
+
+def test_fill_biharmonic_reproduces_plane():
+    y, x = np.mgrid[:30, :40]
+    plane = 0.3 * x - 0.2 * y + 1
+    data = plane.copy()
+    data[10:20, 15:25] = np.nan
+    np.testing.assert_allclose(fill_harmonic(data, order=2), plane)
+    np.testing.assert_allclose(fill_harmonic(data, order=1), plane)
+
+
+def test_inpaint_invalid_method():
+    with pytest.raises(ValueError):
+        inpaint(np.ones((3, 3)), method='spline')
+
+
+@pytest.mark.parametrize('method', FILL_METHODS)
+def test_surface_fill_nonmeasured(smooth_data, missing, method):
+    data = smooth_data.copy()
+    data[missing] = np.nan
+    surface = Surface(data, 0.1, 0.1)
+    assert not surface.fill_nonmeasured(method=method).has_missing_points
@@ -1,7 +1,8 @@
 import numpy as np
 from numpy.testing import assert_array_almost_equal
 import pytest
-from surfalize.mathutils import argclosest, closest, interp1d, _sinusoid, Sinusoid
+from surfalize.mathutils import (argclosest, closest, interp1d, _sinusoid, Sinusoid, central_moments, gradient_sums,
+                                QuantileSketch, polynomial_trend, orthonormal_polynomials)
 
 np.random.seed(0)
 
@@ -65,4 +66,111 @@ class TestSinusoid:
         assert sinusoid.amplitude == pytest.approx(4.945544, abs=0.01)
         assert sinusoid.period == pytest.approx(0.5, abs=0.1)
         assert sinusoid.x0 == pytest.approx(0, abs=0.1)
-        assert sinusoid.y0 == pytest.approx(-0.54, abs=0.1)
\ No newline at end of file
+        assert sinusoid.y0 == pytest.approx(-0.54, abs=0.1)
+
+    def test_from_fit_multiple(self):
+        rng = np.random.default_rng(0)
+        xdata = np.arange(1000)
+        params = [(3, 199, 5, 1), (2, 203, -40, 0), (1, 200, 80, -2)]
+        ydata = np.array([_sinusoid(xdata, *p) + rng.normal(size=xdata.size) * 0.5 for p in params])
+        sinusoids = Sinusoid.from_fit_multiple(xdata, ydata, 200)
+        assert len(sinusoids) == len(params)
+        for sinusoid, line, p in zip(sinusoids, ydata, params):
+            expected = Sinusoid.from_fit(xdata, line, p0=(p[0], 200, 0, p[3]))
+            assert sinusoid.amplitude == pytest.approx(expected.amplitude, rel=1e-4)
+            assert sinusoid.period == pytest.approx(expected.period, rel=1e-4)
+            assert sinusoid.first_extremum() == pytest.approx(expected.first_extremum(), abs=1e-3)
+            assert sinusoid.y0 == pytest.approx(expected.y0, abs=1e-4)
+
+@pytest.mark.parametrize('block_size', [1, 7, 2**16])
+def test_central_moments(block_size):
+    data = np.random.default_rng(0).normal(size=(31, 17)) + 3
+    centered = data - data.mean()
+    mean, m1, m2, m3, m4 = central_moments(data, block_size=block_size)
+    assert mean == pytest.approx(data.mean())
+    assert m1 == pytest.approx(np.abs(centered).mean())
+    assert m2 == pytest.approx((centered ** 2).mean())
+    assert m3 == pytest.approx((centered ** 3).mean())
+    assert m4 == pytest.approx((centered ** 4).mean())
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 2**16])
+def test_gradient_sums(block_size):
+    data = np.random.default_rng(0).normal(size=(31, 17)).cumsum(axis=1)
+    step_x, step_y = 0.3, 0.2
+    dz_y = np.diff(data, axis=0)
+    dz_x = np.diff(data, axis=1)
+    expected_area = np.sum(np.sqrt((step_y * dz_y[:, :-1]) ** 2 + (step_x * dz_x[:-1]) ** 2 + (step_x * step_y) ** 2))
+    expected_gradient = np.sum((dz_x / step_x) ** 2) + np.sum((dz_y / step_y) ** 2)
+    area, gradient = gradient_sums(data, step_x, step_y, block_size=block_size)
+    assert area == pytest.approx(expected_area)
+    assert gradient == pytest.approx(expected_gradient)
+
+
+def test_gradient_sums_nonmeasured():
+    data = np.random.default_rng(0).normal(size=(31, 17)).cumsum(axis=1)
+    area, gradient = gradient_sums(data, 0.3, 0.2)
+    data[5, 7] = np.nan
+    area_missing, gradient_missing = gradient_sums(data, 0.3, 0.2, block_size=7)
+    assert np.isfinite(area_missing) and np.isfinite(gradient_missing)
+    assert area_missing == pytest.approx(area, rel=0.05)
+    assert gradient_missing == pytest.approx(gradient, rel=0.05)
+    assert np.isnan(gradient_sums(np.full((3, 3), np.nan), 1, 1)[0])
+
+
+def test_interp1d_array_queries():
+    rng = np.random.default_rng(0)
+    x = rng.permutation(np.linspace(0, 10, 200))
+    y = x ** 2
+    f = interp1d(x, y)
+    query = np.linspace(-1, 11, 50)
+    assert_array_almost_equal(f(query), [float(f(q)) for q in query])
+    assert f(query.reshape(5, 10)).shape == (5, 10)
+    # Descending data is reversed instead of sorted
+    f_descending = interp1d(np.sort(x)[::-1], np.sort(y)[::-1])
+    assert_array_almost_equal(f_descending(query), f(query))
+
+
+def test_smc_batched(surface):
+    mr = np.linspace(0, 100, 100)
+    heights = surface.Smc(mr)
+    assert heights.shape == mr.shape
+    assert heights[25] == pytest.approx(surface.Smc(mr[25]))
+    assert_array_almost_equal(surface.Smr(heights[1:-1]), mr[1:-1], decimal=1)
+
+
+def test_quantile_sketch():
+    data = np.random.default_rng(0).gamma(2, size=200000)
+    sketch = QuantileSketch(k=256)
+    for block in np.array_split(data, 37):
+        sketch.update(block)
+    assert sketch.count == data.size
+    assert len(sketch) < data.size / 10
+    q = np.linspace(0, 1, 51)
+    ranks = np.searchsorted(np.sort(data), sketch.quantile(q)) / data.size
+    assert np.all(np.abs(ranks - q) <= sketch.error_bound() + 1 / data.size)
+    assert sketch.quantile(0) == data.min()
+    assert sketch.quantile(1) == data.max()
+
+
+@pytest.mark.parametrize('degree', [0, 1, 2, 4])
+@pytest.mark.parametrize('missing', [False, True])
+def test_polynomial_trend(degree, missing):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(23, 31))
+    if missing:
+        data[rng.random(data.shape) < 0.2] = np.nan
+    y, x = np.mgrid[:23, :31]
+    x, y = x / 30, y / 22
+    design = np.column_stack([x.ravel() ** (i - j) * y.ravel() ** j for i in range(degree + 1) for j in range(i + 1)])
+    valid = ~np.isnan(data.ravel())
+    coefficients = np.linalg.lstsq(design[valid], data.ravel()[valid], rcond=None)[0]
+    expected = (design @ coefficients).reshape(data.shape)
+    assert_array_almost_equal(polynomial_trend(data, degree, block_size=50), expected)
+
+
+def test_orthonormal_polynomials():
+    basis = orthonormal_polynomials(20, 3)
+    assert_array_almost_equal(basis.T @ basis, np.eye(4))
+    assert orthonormal_polynomials(20, 3) is basis
+    assert not basis.flags.writeable
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from surfalize import Surface
+from surfalize.parametermap import MAP_PARAMETERS
+
+
+@pytest.mark.parametrize('window, stride', [(5, 3), (7.5, 7.5)])
+def test_parameter_map(surface, window, stride):
+    maps = surface.parameter_map(MAP_PARAMETERS, window=window, stride=stride)
+    window_px = int(window / surface.step_x)
+    stride_px = int(stride / surface.step_x)
+    assert list(maps) == list(MAP_PARAMETERS)
+    assert maps['Sa'].size == ((surface.size.y - window_px) // stride_px + 1,
+                               (surface.size.x - window_px) // stride_px + 1)
+    assert maps['Sa'].step_x == pytest.approx(stride_px * surface.step_x)
+    rng = np.random.default_rng(0)
+    for i, j in zip(rng.integers(0, maps['Sa'].size.y, 10), rng.integers(0, maps['Sa'].size.x, 10)):
+        y, x = i * stride_px, j * stride_px
+        window_surface = Surface(surface.data[y:y + window_px, x:x + window_px], surface.step_x, surface.step_y)
+        for parameter, parameter_map in maps.items():
+            expected = getattr(window_surface, parameter)()
+            assert parameter_map.data[i, j] == pytest.approx(expected, rel=1e-8), parameter
+
+
+def test_parameter_map_invalid(surface):
+    with pytest.raises(ValueError):
+        surface.parameter_map(['Sal'], window=5)
+    with pytest.raises(ValueError):
+        surface.parameter_map(['Sa'], window=1000)
+
+
+def test_parameter_map_step():
+    # Large height offset between the windows must not affect the moments of a single window
+    rng = np.random.default_rng(0)
+    data = rng.normal(0, 0.01, (100, 100))
+    data[:, 50:] += 200
+    surface = Surface(data, 0.1, 0.1)
+    maps = surface.parameter_map(['Sq', 'Ssk', 'Sku'], window=2, stride=0.1)
+    for i, j in [(0, 0), (40, 40), (70, 35), (30, 75)]:
+        window_surface = Surface(data[i:i + 20, j:j + 20], 0.1, 0.1)
+        for parameter, parameter_map in maps.items():
+            expected = getattr(window_surface, parameter)()
+            assert parameter_map.data[i, j] == pytest.approx(expected, rel=1e-8), parameter
@@ -108,3 +108,31 @@ def test_size(surface):
     size = surface.size
     assert size.x == surface.data.shape[1]
     assert size.y == surface.data.shape[0]
+
+
+@pytest.mark.parametrize('method', ['exact', 'sketch'])
+def test_abbott_firestone_curve_methods(surface, method):
+    reference = surface.get_abbott_firestone_curve()
+    curve = surface.get_abbott_firestone_curve(method=method)
+    assert curve.error_bound() < 0.5
+    assert curve.Sk() == pytest.approx(reference.Sk(), abs=0.01)
+    assert curve.Smr1() == pytest.approx(reference.Smr1(), abs=0.1)
+    assert curve.Smr2() == pytest.approx(reference.Smr2(), abs=0.1)
+    assert curve.Vmc() == pytest.approx(reference.Vmc(), abs=0.01)
+
+
+def test_nonmeasured_points(surface):
+    data = surface.data.copy()
+    mask = np.random.default_rng(0).random(data.shape) < 0.01
+    data[mask] = np.nan
+    surface_with_missing_points = Surface(data, surface.step_x, surface.step_y)
+    values = surface.data[~mask]
+    assert surface_with_missing_points.Sa() == pytest.approx(np.abs(values - values.mean()).mean())
+    assert surface_with_missing_points.Sq() == pytest.approx(values.std())
+    assert surface_with_missing_points.Sp() == pytest.approx(values.max() - values.mean())
+    # Hybrid and functional parameters are expected to change only slightly when 1% of the points are missing
+    for parameter in ['Sdr', 'Sdq', 'Sk', 'Spk', 'Svk', 'Vmc', 'Vvv']:
+        value = getattr(surface_with_missing_points, parameter)()
+        assert value == pytest.approx(getattr(surface, parameter)(), rel=0.02)
+    with pytest.raises(ValueError):
+        surface_with_missing_points.Sal()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal
+from surfalize import Surface
+
+
+def test_spectrum_magnitude(surface):
+    centered_data = surface.data - surface.data.mean()
+    expected = np.abs(np.fft.fftshift(np.fft.fft2(centered_data)))
+    assert_array_almost_equal(surface.get_spectrum().magnitude(), expected)
+    assert_array_almost_equal(surface.get_spectrum().magnitude(shifted=False), np.fft.ifftshift(expected))
+
+
+def test_spectrum_odd_shape():
+    data = np.random.default_rng(0).normal(size=(51, 37))
+    surface = Surface(data, 0.1, 0.1)
+    expected = np.abs(np.fft.fftshift(np.fft.fft2(data - data.mean())))
+    assert_array_almost_equal(surface.get_spectrum().magnitude(), expected)
+
+
+def test_spectrum_frequencies(surface):
+    freq_x, freq_y = surface.get_spectrum().frequencies()
+    ny, nx = surface.size
+    assert_array_almost_equal(freq_x, np.fft.fftshift(np.fft.fftfreq(nx, d=surface.width_um / nx)))
+    assert_array_almost_equal(freq_y, np.fft.fftshift(np.fft.fftfreq(ny, d=surface.height_um / ny)))
+
+
+def test_spectrum_shared(surface):
+    spectrum = surface.get_spectrum()
+    surface.period()
+    surface.Sal()
+    assert surface.get_spectrum() is spectrum
+    assert surface.get_autocorrelation_function().data is spectrum.autocorrelation()
+
+
+def test_spectrum_peak(surface):
+    spectrum = surface.get_spectrum()
+    magnitude = spectrum.magnitude()
+    freq_x, freq_y = spectrum.frequencies()
+    idx_y, idx_x = np.unravel_index(np.argmax(magnitude), magnitude.shape)
+    fx, fy = spectrum.peak()
+    # The largest peak of the full spectrum is either the peak of the half-plane or its mirrored counterpart
+    assert abs(fx) == pytest.approx(abs(freq_x[idx_x]))
+    assert abs(fy) == pytest.approx(abs(freq_y[idx_y]))
+
+
+@pytest.mark.parametrize('period', [1.7, 3.3, 12.5])
+def test_period_refined(period):
+    y, x = np.mgrid[0:400, 0:501] * 0.1
+    data = np.sin(2 * np.pi * x / period) + np.random.default_rng(0).normal(size=x.shape) * 0.2
+    surface = Surface(data, 0.1, 0.1)
+    # Compensate for the width of the surface being defined as (n - 1) * step
+    correction = 501 / 500
+    error = abs(surface.period() * correction - period)
+    error_refined = abs(surface.period(refine=True) * correction - period)
+    assert error_refined < error
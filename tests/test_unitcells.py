@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from surfalize import Surface
+from surfalize.unitcells import UnitCells
+
+
+@pytest.mark.parametrize('cell_length', [(10, 10), (37, 50)])
+def test_unitcells_match_surface(surface, cell_length):
+    cell_length_x, cell_length_y = cell_length
+    cells = UnitCells(surface.data, cell_length_x, cell_length_y, surface.step_x, surface.step_y)
+    assert len(cells) == (surface.size.x // cell_length_x) * (surface.size.y // cell_length_y)
+    results = cells.evaluate(sorted(UnitCells.PARAMETERS))
+    for idx in np.random.default_rng(0).choice(len(cells), 20, replace=False):
+        i, j = divmod(idx, cells.ncells_x)
+        data = surface.data[cell_length_y * i:cell_length_y * (i + 1), cell_length_x * j:cell_length_x * (j + 1)]
+        cell_surface = Surface(data, surface.step_x, surface.step_y)
+        for parameter, values in results.items():
+            assert values[idx] == pytest.approx(getattr(cell_surface, parameter)(), rel=1e-9), parameter
+
+
+def test_unitcells_unsupported_parameter(surface):
+    cells = UnitCells(surface.data, 100, 100, surface.step_x, surface.step_y)
+    with pytest.raises(ValueError):
+        cells.evaluate(['Sa', 'Sal'])
+
+
+def test_homogeneity_fallback(surface):
+    # Sal has no vectorized kernel and is evaluated for each cell separately
+    assert 0 < surface.homogeneity(parameters=('Sa', 'Sal')) <= 1